@@ -1,154 +1,441 @@
+import argparse
 import json
+import os
+import re
+import shutil
 import subprocess
+import threading
+import time
 from pathlib import Path
 from datetime import datetime
 
+import instrumentation
+from columnar import ColumnarSink
+from dataset_sink import JsonlSink, TeeSink, TextSink, iter_jsonl
+from git_bulk import REF_FORMAT, REF_PATTERNS, CatFileBatch, parse_refs, read_refs
+from git_runner import GIT_ENV, AsyncGitRunner, GitResult, Watchdog
+from history_stats import branch_divergence, lifespan_summary, stream_history
+
+# Refs cuja amostra de commits é extraída (gravado no extract_state.json: se mudar, o
+# modo incremental refaz tudo em vez de reaproveitar amostras de outro escopo)
+SAMPLE_REFS = ["refs/heads/", "refs/remotes/origin/"]
+
+
+def repo_id_from_url(url: str, fallback: str = "") -> str:
+    """
+    Normaliza a URL do remote para um identificador portável, ex.:
+    https://github.com/Mintplex-Labs/anything-llm.git -> github.com/Mintplex-Labs/anything-llm
+    git@github.com:Mintplex-Labs/anything-llm.git      -> github.com/Mintplex-Labs/anything-llm
+    Remotes locais (caminho ou file://) viram local/<nome>.
+    """
+    url = (url or "").strip()
+    if not url:
+        return f"local/{fallback}" if fallback else "local/unknown"
+
+    m = re.match(r"^[\w+.-]+://(?:[^@/]*@)?([^/:]+)(?::\d+)?/(.+)$", url)
+    if m and not url.startswith("file://"):
+        host, path = m.groups()
+    else:
+        m = re.match(r"^(?:[^@/]+@)?([^/:]+):(?!/)(.+)$", url)
+        if not m:
+            local = url[len("file://"):] if url.startswith("file://") else url
+            name = os.path.basename(os.path.normpath(local))
+            if name.endswith(".git"):
+                name = name[:-4]
+            return f"local/{name or fallback}"
+        host, path = m.groups()
+
+    path = path.strip("/")
+    if path.endswith(".git"):
+        path = path[:-4]
+    return f"{host}/{path}"
+
+
+def is_git_repo(path) -> bool:
+    """Repositório com working tree (.git) ou bare/mirror (HEAD, objects/ e refs/ na raiz)."""
+    path = Path(path)
+    return (path / ".git").exists() or (
+        (path / "HEAD").is_file() and (path / "objects").is_dir() and (path / "refs").is_dir()
+    )
+
 
 class GitStrategyExtractorEssential:
     """
     Versão ESSENCIAL:
     - Branches: overview + amostra dos últimos N commits por branch
     - Releases: tags timeline + git describe
+    - Opcional (full_history): resumo do histórico completo, agregado em streaming
     Saídas:
     - dataset.jsonl com os dados estruturados
+    - opcionalmente, dataset.columns/ (formato colunar com índice, ver columnar.py)
     - alguns .txt mínimos para conferência humana
+    - extract_state.json com as pontas das refs (usado pelo modo incremental)
+    Funciona também em clones bare/mirror, parciais (--filter=blob:none ou tree:0) e
+    rasos (--depth): só commits e tags são lidos, e histórico truncado é registrado
+    no dataset (registro clone_info) em vez de sair vazio em silêncio.
     """
 
-    def __init__(self, repo_path: str, output_dir: str = "git_strategy_output", recent_commits_per_branch: int = 10):
+    STATE_FILE = "extract_state.json"
+
+    def __init__(self, repo_path: str, output_dir: str = "git_strategy_output", recent_commits_per_branch: int = 10,
+                 batch_size: int = 1000, incremental: bool = False, repo_id: str = None,
+                 git_timeout: float = 120, max_git_processes: int = 4, columnar: bool = False,
+                 full_history: bool = False):
         self.repo = Path(repo_path)
         self.out = Path(output_dir)
         self.out.mkdir(parents=True, exist_ok=True)
         self.n = int(recent_commits_per_branch)
 
-        if not (self.repo / ".git").exists():
+        if not is_git_repo(self.repo):
             raise ValueError(f"Isso não parece um repositório Git: {self.repo}")
 
         self.dataset_path = self.out / "dataset.jsonl"
-        self.dataset_path.write_text("", encoding="utf-8")
+        self.columns_path = self.out / "dataset.columns"
+        self.columnar = columnar
+        self.full_history = full_history
+        self.state_path = self.out / self.STATE_FILE
+        self.batch_size = batch_size
+        self.incremental = incremental
+        self._repo_id_value = repo_id
+        self._refs = None
+        self._describe = None
+        self._head_sha = None
+        self._clone = None
+        self.truncated_branches = set()
+        # Execução do git com timeout e limite de processos simultâneos
+        self.runner = AsyncGitRunner(self.repo, max_concurrency=max_git_processes, timeout=git_timeout)
+        self.git_errors = []
+        # Um único handle para todo o dataset, com escrita em lotes.
+        # No modo incremental o dataset anterior é preservado até sabermos o que mudou.
+        self.sink = None if incremental else self._open_sink(self.dataset_path, self.columns_path)
+
+    def _open_sink(self, jsonl_path, columns_path):
+        sink = JsonlSink(jsonl_path, batch_size=self.batch_size)
+        if self.columnar:
+            sink = TeeSink(sink, ColumnarSink(columns_path, batch_size=self.batch_size))
+        return sink
+
+    def _check(self, result):
+        # Falhas e timeouts não interrompem a extração, mas ficam registrados
+        if not result.ok:
+            self.git_errors.append(result)
+        return result
 
     def git(self, args) -> str:
-        cmd = ["git"] + list(args)
-        r = subprocess.run(
+        return self._check(self.runner.run_sync(args)).stdout.strip()
+
+    @instrumentation.timed("extract", phase="prefetch")
+    def prefetch(self):
+        """
+        Dispara em paralelo as consultas git independentes entre si
+        (refs, describe, HEAD e remote) antes dos extract_*.
+        """
+        commands = [
+            ["for-each-ref", f"--format={REF_FORMAT}"] + REF_PATTERNS,
+            ["describe", "--tags", "--long", "--always"],
+            ["rev-parse", "HEAD"],
+        ] + self._CLONE_COMMANDS
+        if self._repo_id_value is None:
+            commands.append(["config", "--get", "remote.origin.url"])
+
+        results = self.runner.gather_sync(commands)
+        # `git config --get` retorna 1 quando não há remote (ou filtro): não é falha
+        for r in results[:4]:
+            self._check(r)
+        self._refs = list(parse_refs(results[0].stdout.splitlines()))
+        self._describe = results[1].stdout.strip()
+        self._head_sha = results[2].stdout.strip()
+        self._clone = self._parse_clone(results[3], results[4])
+        if len(results) > 5:
+            self._repo_id_value = repo_id_from_url(results[5].stdout, fallback=self.repo.resolve().name)
+
+    def git_lines(self, args, input: str = None):
+        """
+        Versão em streaming de git(): produz a saída linha a linha, direto do pipe.
+        `input` vai para o stdin do comando (ex.: revisões para --stdin), que é fechado em seguida.
+        Ao fim da leitura, o resultado (stderr, código de saída, duração) passa por _check,
+        como nos comandos de git(). Como a saída parcial não serve, uma falha levanta
+        subprocess.CalledProcessError e um timeout, subprocess.TimeoutExpired. O --git-timeout
+        vale como tempo máximo sem nenhuma linha nova. Parar de ler antes do fim (fechar o
+        gerador) encerra o git sem registrar falha.
+        """
+        args = list(args)
+        cmd = ["git"] + args
+        start, read = time.perf_counter(), 0
+        p = subprocess.Popen(
             cmd,
             cwd=self.repo,
-            capture_output=True,
+            env=GIT_ENV,
+            stdin=subprocess.PIPE if input is not None else subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
             text=True,
             encoding="utf-8",
             errors="replace",
         )
-        return (r.stdout or "").strip()
+        # stderr é lido em paralelo: um git que escreve muito nele não fica preso no pipe
+        err = []
+        reader = threading.Thread(target=lambda: err.append(p.stderr.read()), daemon=True)
+        reader.start()
+        watchdog = Watchdog(p, self.runner.timeout)
+        complete = False
+        try:
+            watchdog.arm()
+            if input is not None:
+                # rev-list --stdin lê todas as revisões antes de produzir saída
+                try:
+                    p.stdin.write(input)
+                    p.stdin.close()
+                except BrokenPipeError:
+                    # O git saiu (ou foi encerrado pelo timeout) antes de ler tudo
+                    pass
+            for line in p.stdout:
+                watchdog.arm()
+                read += len(line)
+                yield line.rstrip("\n")
+            watchdog.disarm()
+            complete = True
+        finally:
+            watchdog.close()
+            p.stdout.close()
+            if not complete and p.poll() is None:
+                # O chamador parou antes do fim (ou falhou): o restante da saída não interessa
+                p.kill()
+            p.wait()
+            reader.join()
+            p.stderr.close()
+            # Em streaming, o tempo inclui o consumo das linhas pelo chamador
+            instrumentation.observe("git", time.perf_counter() - start, command=args[0])
+            instrumentation.count("git_calls_total", command=args[0])
+            instrumentation.count("git_bytes_read_total", read, command=args[0])
+
+        if watchdog.expired:
+            result = GitResult(args, "", f"timeout após {watchdog.timeout}s", -1,
+                               time.perf_counter() - start, timed_out=True)
+        else:
+            result = GitResult(args, "", "".join(err), p.returncode, time.perf_counter() - start)
+        if not self._check(result).ok:
+            if result.timed_out:
+                raise subprocess.TimeoutExpired(cmd, watchdog.timeout)
+            raise subprocess.CalledProcessError(result.returncode, cmd, stderr=result.stderr)
 
     def save_txt(self, filename: str, content: str):
         (self.out / filename).write_text((content or "").rstrip() + "\n", encoding="utf-8")
 
+    def open_txt(self, filename: str) -> TextSink:
+        return TextSink(self.out / filename)
+
     def append_jsonl(self, obj: dict):
-        with self.dataset_path.open("a", encoding="utf-8") as f:
-            f.write(json.dumps(obj, ensure_ascii=False) + "\n")
+        self.sink.write(obj)
+
+    def close(self):
+        if self.sink is not None:
+            self.sink.close()
 
     def _repo_id(self) -> str:
-        return "github.com/Mintplex-Labs/anything-llm"
+        # Derivado do remote "origin" (sem expor o caminho local da máquina)
+        if self._repo_id_value is None:
+            url = self.runner.run_sync(["config", "--get", "remote.origin.url"]).stdout
+            self._repo_id_value = repo_id_from_url(url, fallback=self.repo.resolve().name)
+        return self._repo_id_value
+
+
+    def _all_refs(self):
+        # Uma única chamada a for-each-ref para branches, remotas e tags
+        if self._refs is None:
+            self._refs = read_refs(self.git_lines)
+        return self._refs
+
+    def _refs_under(self, *prefixes):
+        return [r for r in self._all_refs() if r["refname"].startswith(prefixes)]
+
+    # Tipo de clone (bare, raso, parcial)
+    # -----------------------
+    _CLONE_COMMANDS = [
+        ["rev-parse", "--is-bare-repository", "--is-shallow-repository", "--git-path", "shallow"],
+        ["config", "--get-regexp", r"^remote\..*\.partialclonefilter$"],
+    ]
+
+    def _parse_clone(self, rev_parse, filters) -> dict:
+        lines = rev_parse.stdout.splitlines()
+        bare, shallow = (lines + ["false", "false"])[:2]
+        shallow_commits = set()
+        if shallow == "true" and len(lines) > 2:
+            shallow_file = self.repo / lines[2]
+            if shallow_file.exists():
+                shallow_commits = set(shallow_file.read_text(encoding="utf-8").split())
+        partial = sorted({line.split(" ", 1)[1] for line in filters.stdout.splitlines() if " " in line})
+        return {
+            "bare": bare == "true",
+            "shallow": shallow == "true",
+            "shallow_commits": shallow_commits,
+            "partial_filter": ",".join(partial) or None,
+        }
 
+    def _clone_state(self) -> dict:
+        if self._clone is None:
+            rev_parse, filters = [self.runner.run_sync(c) for c in self._CLONE_COMMANDS]
+            self._clone = self._parse_clone(self._check(rev_parse), filters)
+        return self._clone
 
     def _list_local_branches(self):
-        raw = self.git(["for-each-ref", "refs/heads", "--format=%(refname:short)"])
-        return [b.strip() for b in raw.splitlines() if b.strip()]
+        return [r["short"] for r in self._refs_under("refs/heads/")]
 
   
     # ESSENCIAL: Branch strategy
     # -----------------------
+    @instrumentation.timed("extract", phase="branches_overview")
     def extract_branches_overview(self):
         # No formato branch | last_commit_date | author | subject para jogar na LLM
-        overview_raw = self.git([
-         "for-each-ref", "refs/heads", "refs/remotes/origin",
-         "--sort=-committerdate",
-         "--format=%(refname:short)|%(committerdate:short)|%(authorname)|%(subject)"
-                ])
-
-        
-        self.save_txt("branches_overview.txt", overview_raw)
-
-        for line in overview_raw.splitlines():
-            parts = line.split("|", 3)
-            if len(parts) < 4:
-                continue
-            branch, date, author, subject = parts
-            self.append_jsonl({
-                "type": "branch_overview",
-                "repo": self._repo_id(),
-                "branch": branch,
-                "last_commit": {
-                    "date": date,
-                    "author": author,
-                    "subject": subject
-                }
-            })
+        # (equivalente a --sort=-committerdate; o sort estável mantém o desempate por nome)
+        refs = sorted(
+            self._refs_under("refs/heads/", "refs/remotes/origin/"),
+            key=lambda r: -r["committer_ts"],
+        )
+        with self.open_txt("branches_overview.txt") as txt:
+            for r in refs:
+                branch, date, author, subject = r["short"], r["committer_date"], r["author"], r["subject"]
+                txt.write_line(f"{branch}|{date}|{author}|{subject}")
+                self.append_jsonl({
+                    "type": "branch_overview",
+                    "repo": self._repo_id(),
+                    "branch": branch,
+                    "last_commit": {
+                        "date": date,
+                        "author": author,
+                        "subject": subject
+                    }
+                })
+        self.sink.flush()
 
-    def extract_recent_commits_sample(self):
-        # amostra: últimos N commits por branch
-        branches = self._list_local_branches()
+    def _sample_refs(self):
+        """
+        Branches locais e remotas (origin/*) cuja amostra é extraída. Uma remota que
+        aponta para o mesmo commit da branch local de mesmo nome teria a mesma
+        amostra e fica de fora; origin/HEAD é só um apelido.
+        """
+        heads, remote = SAMPLE_REFS
+        local = self._refs_under(heads)
+        tips = {r["short"]: r["sha"] for r in local}
+        remotes = [
+            r for r in self._refs_under(remote)
+            if r["refname"] != "refs/remotes/origin/HEAD"
+            and tips.get(r["short"][len("origin/"):]) != r["sha"]
+        ]
+        return local + remotes
 
-        txt_lines = ["branch|hash|date|author|subject"]
+    def _sample_records(self, ref, commits):
+        b = ref["short"]
+        abbrev = len(ref["abbrev"])
+        for c in commits:
+            yield {
+                "type": "commit_sample",
+                "repo": self._repo_id(),
+                "branch": b,
+                "hash": c["sha"][:abbrev],
+                "date": c["date"],
+                "author": c["author"],
+                "subject": c["subject"]
+            }
 
-        for b in branches:
-            log_raw = self.git([
-                "log", f"-n{self.n}",
-                "--date=short",
-                "--pretty=format:%h|%ad|%an|%s",
-                b
-            ])
-            if not log_raw:
+    def _previous_samples(self, previous_dataset):
+        # Agrupa os commit_sample do dataset anterior por branch (já vêm em ordem de nome)
+        group, rows = None, []
+        for rec in iter_jsonl(previous_dataset, contains='"commit_sample"'):
+            if rec.get("type") != "commit_sample":
                 continue
+            if rec["branch"] != group:
+                if rows:
+                    yield group, rows
+                group, rows = rec["branch"], []
+            rows.append(rec)
+        if rows:
+            yield group, rows
 
-            for row in log_raw.splitlines():
-                row = row.strip()
-                if not row:
-                    continue
+    @instrumentation.timed("extract", phase="recent_commits_sample")
+    def extract_recent_commits_sample(self, unchanged=(), previous_dataset=None):
+        # amostra: últimos N commits por branch, locais e remotas
+        # Uma única caminhada pelo grafo (CatFileBatch.recent_commits_by_ref) atende
+        # todas as branches; commits compartilhados são lidos e enfileirados uma vez.
+        # Branches em `unchanged` (modo incremental) reaproveitam os registros de `previous_dataset`.
+        refs = self._sample_refs()
+        reused = {}
+        if unchanged:
+            reused = {b: rows for b, rows in self._previous_samples(previous_dataset) if b in unchanged}
+            self.truncated_branches |= self._previous_truncated(previous_dataset) & set(reused)
 
-                parts = row.split("|", 3)
-                if len(parts) < 4:
-                    continue
+        clone = self._clone_state()
+        fresh = {r["short"]: r["sha"] for r in refs if r["short"] not in reused}
+        with CatFileBatch(self.repo, shallow=clone["shallow_commits"], timeout=self.runner.timeout) as batch:
+            samples = batch.recent_commits_by_ref(fresh, self.n)
+            # Clone raso: a amostra parou antes do histórico real da branch
+            self.truncated_branches |= batch.truncated_refs
 
-                h, d, a, s = parts
-                txt_lines.append(f"{b}|{h}|{d}|{a}|{s}")
+        with self.open_txt("branches_recent_commits_sample.txt") as txt:
+            txt.write_line("branch|hash|date|author|subject")
+            for ref in refs:
+                b = ref["short"]
+                records = reused[b] if b in reused else self._sample_records(ref, samples[b])
+                for rec in records:
+                    txt.write_line(f"{b}|{rec['hash']}|{rec['date']}|{rec['author']}|{rec['subject']}")
+                    self.append_jsonl(rec)
 
-                self.append_jsonl({
-                    "type": "commit_sample",
-                    "repo": self._repo_id(),
-                    "branch": b,
-                    "hash": h,
-                    "date": d,
-                    "author": a,
-                    "subject": s
-                })
+        self.sink.flush()
 
-        self.save_txt("branches_recent_commits_sample.txt", "\n".join(txt_lines))
+    def _previous_truncated(self, previous_dataset):
+        for rec in iter_jsonl(previous_dataset, contains='"clone_info"'):
+            if rec.get("type") == "clone_info":
+                return set(rec.get("truncated_branches", []))
+        return set()
+
+    def extract_clone_info(self):
+        """
+        Registra o tipo de clone quando ele afeta os dados (bare, raso ou parcial) e
+        as branches cuja amostra foi cortada pelo histórico ausente. Em um clone
+        completo comum nada é gravado.
+        """
+        clone = self._clone_state()
+        if not (clone["bare"] or clone["shallow"] or clone["partial_filter"] or self.truncated_branches):
+            return
+        info = {
+            "type": "clone_info",
+            "repo": self._repo_id(),
+            "bare": clone["bare"],
+            "shallow": clone["shallow"],
+            "partial_filter": clone["partial_filter"],
+            "truncated_branches": sorted(self.truncated_branches),
+        }
+        self.append_jsonl(info)
+        self.sink.flush()
+        if self.truncated_branches:
+            print(f"Aviso: histórico truncado (clone raso) em {len(self.truncated_branches)} branches; "
+                  f"a amostra delas tem menos de {self.n} commits ou pode estar incompleta.")
 
     # ESSENCIAL: Release strategy
     # -----------------------
+    @instrumentation.timed("extract", phase="tags_timeline")
     def extract_tags_timeline(self):
         # tag | date | subject
-        tags_timeline = self.git([
-            "for-each-ref", "refs/tags",
-            "--sort=creatordate",
-            "--format=%(refname:short)|%(creatordate:short)|%(subject)"
-        ])
-        self.save_txt("tags_timeline.txt", tags_timeline)
-
-        for line in tags_timeline.splitlines():
-            parts = line.split("|", 2)
-            if len(parts) < 3:
-                continue
-            tag, date, subject = parts
-            self.append_jsonl({
-                "type": "tag",
-                "repo": self._repo_id(),
-                "tag": tag,
-                "date": date,
-                "subject": subject
-            })
+        # (equivalente a --sort=creatordate)
+        tags = sorted(self._refs_under("refs/tags/"), key=lambda r: r["creator_ts"])
+        with self.open_txt("tags_timeline.txt") as txt:
+            for r in tags:
+                tag, date, subject = r["short"], r["creator_date"], r["subject"]
+                txt.write_line(f"{tag}|{date}|{subject}")
+                self.append_jsonl({
+                    "type": "tag",
+                    "repo": self._repo_id(),
+                    "tag": tag,
+                    "date": date,
+                    "subject": subject
+                })
+        self.sink.flush()
 
+    @instrumentation.timed("extract", phase="git_describe")
     def extract_git_describe(self):
-        describe = self.git(["describe", "--tags", "--long", "--always"])
+        describe = self._describe
+        if describe is None:
+            describe = self.git(["describe", "--tags", "--long", "--always"])
         self.save_txt("git_describe.txt", describe)
 
         self.append_jsonl({
@@ -156,24 +443,229 @@ class GitStrategyExtractorEssential:
             "repo": self._repo_id(),
             "describe": describe
         })
+        self.sink.flush()
+
+    # Histórico completo (opcional)
+    # -----------------------
+    def _main_branch(self):
+        branches = self._refs_under("refs/heads/")
+        for name in ("main", "master", "trunk"):
+            for r in branches:
+                if r["short"] == name:
+                    return r
+        return next((r for r in branches if r["sha"] == self._head()), None)
+
+    def _branch_stats(self, main):
+        """
+        Para cada branch local ou remota (as mesmas da amostra): commits próprios (fora
+        da main), quantos são merges, ponto de bifurcação (merge-base com a main) e
+        duração até a ponta. Branches cuja ponta já está na main são marcadas como integradas.
+        Tudo sai de uma caminhada conjunta pelo grafo (branch_divergence), e não de
+        processos git por branch.
+        """
+        others = [r for r in self._sample_refs() if r["short"] != main["short"]]
+        div = branch_divergence(self.git_lines, main["sha"], {r["short"]: r["sha"] for r in others})
+        branches = {}
+        with CatFileBatch(self.repo, timeout=self.runner.timeout) as batch:
+            for r in others:
+                d = div[r["short"]]
+                base = r["sha"] if d["in_base"] else d["merge_base"]
+                fork = batch.commit(base) if base else None
+                branches[r["short"]] = {
+                    "commits": d["commits"],
+                    "merges": d["merges"],
+                    "direct": d["commits"] - d["merges"],
+                    # Data e duração pelo committer: num rebase ou cherry-pick a data do autor é a original
+                    "fork_point_date": fork["committer_date"] if fork else None,
+                    "lifespan_days": round((r["committer_ts"] - fork["committer_ts"]) / 86400, 2) if fork else None,
+                    "merged": base == r["sha"],
+                }
+        return branches
+
+    @instrumentation.timed("extract", phase="history_summary")
+    def extract_history_summary(self):
+        # Uma passada pelo log de todas as refs, em memória constante.
+        # Se algum comando git falhar (já registrado em git_errors), a parte que dependia
+        # dele fica de fora e o resumo sai com incomplete=True: contagens parciais nunca
+        # aparecem como totais.
+        summary = {"incomplete": False}
+        try:
+            summary.update(stream_history(self.git_lines).summary())
+        except subprocess.SubprocessError:
+            summary["incomplete"] = True
+        main = self._main_branch()
+        if main is not None:
+            merges, direct = self.runner.gather_sync([
+                ["rev-list", "--first-parent", "--merges", "--count", main["sha"]],
+                ["rev-list", "--first-parent", "--no-merges", "--count", main["sha"]],
+            ])
+            if self._check(merges).ok and self._check(direct).ok:
+                summary["main"] = {
+                    "branch": main["short"],
+                    "first_parent_merges": int(merges.stdout.strip() or 0),
+                    "first_parent_direct": int(direct.stdout.strip() or 0),
+                }
+            else:
+                summary["incomplete"] = True
+            try:
+                summary["branches"] = self._branch_stats(main)
+                summary.update(lifespan_summary(summary["branches"]))
+            except subprocess.SubprocessError:
+                summary["incomplete"] = True
+
+        with self.open_txt("history_summary.txt") as txt:
+            for key, value in summary.items():
+                if not isinstance(value, (dict, list)):
+                    txt.write_line(f"{key}|{value}")
+            if "main" in summary:
+                m = summary["main"]
+                txt.write_line(f"main|{m['branch']}|first_parent_merges={m['first_parent_merges']}"
+                               f"|first_parent_direct={m['first_parent_direct']}")
+            txt.write_line("branch|commits|merges|direct|fork_point_date|lifespan_days|merged")
+            for name, b in summary.get("branches", {}).items():
+                txt.write_line(f"{name}|{b['commits']}|{b['merges']}|{b['direct']}|"
+                               f"{b['fork_point_date']}|{b['lifespan_days']}|{b['merged']}")
+        self.append_jsonl({"type": "history_summary", "repo": self._repo_id(), **summary})
+        self.sink.flush()
+
+    # Modo incremental
+    # -----------------------
+    def _head(self) -> str:
+        if self._head_sha is None:
+            self._head_sha = self.git(["rev-parse", "HEAD"])
+        return self._head_sha
+
+    def _current_state(self) -> dict:
+        refs = self._all_refs()
+        return {
+            "repo": self._repo_id(),
+            "recent_commits_per_branch": self.n,
+            "full_history": self.full_history,
+            "sample_refs": SAMPLE_REFS,
+            "head": self._head(),
+            "branches": {r["refname"]: r["sha"] for r in refs if not r["refname"].startswith("refs/tags/")},
+            "tags": {r["refname"]: r["sha"] for r in refs if r["refname"].startswith("refs/tags/")},
+        }
+
+    def _load_state(self):
+        if not self.state_path.exists() or not self.dataset_path.exists():
+            return None
+        try:
+            return json.loads(self.state_path.read_text(encoding="utf-8"))
+        except ValueError:
+            return None
+
+    def _save_state(self, state: dict):
+        tmp = self.state_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(state, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp, self.state_path)
+
+    def extract_incremental(self) -> dict:
+        """
+        Compara as refs atuais com o extract_state.json da execução anterior e só
+        refaz a amostra de commits das branches (locais e remotas) cujas pontas mudaram.
+        Visão geral, tags e describe saem da mesma leitura de for-each-ref (baratos).
+        Retorna um resumo das refs alteradas; em um repositório sem mudanças nada é reescrito.
+        """
+        self.prefetch()
+        previous = self._load_state()
+        current = self._current_state()
+
+        if (previous is None or previous.get("recent_commits_per_branch") != self.n
+                or previous.get("repo") != current["repo"]
+                or previous.get("full_history", False) != self.full_history
+                or previous.get("sample_refs", SAMPLE_REFS[:1]) != SAMPLE_REFS
+                or (self.columnar and not (self.columns_path / "meta.json").exists())):
+            self.sink = self._open_sink(self.dataset_path, self.columns_path)
+            self.extract_all(state=current)
+            return {"full": True}
+
+        old_refs = {**previous.get("branches", {}), **previous.get("tags", {})}
+        new_refs = {**current["branches"], **current["tags"]}
+        changed = {name for name, sha in new_refs.items() if old_refs.get(name) != sha}
+        removed = set(old_refs) - set(new_refs)
+        summary = {"full": False, "changed": sorted(changed), "removed": sorted(removed)}
+
+        if not changed and not removed and previous.get("head") == current["head"]:
+            return summary
+
+        unchanged = {r["short"] for r in self._sample_refs() if r["refname"] not in changed}
+        tmp_path = self.dataset_path.with_suffix(".jsonl.tmp")
+        tmp_columns = self.columns_path.with_name(self.columns_path.name + ".tmp")
+        self.sink = self._open_sink(tmp_path, tmp_columns)
+        self.extract_branches_overview()
+        self.extract_recent_commits_sample(unchanged=unchanged, previous_dataset=self.dataset_path)
+        self.extract_tags_timeline()
+        self.extract_git_describe()
+        self.extract_clone_info()
+        if self.full_history:
+            self.extract_history_summary()
+        self.close()
+        os.replace(tmp_path, self.dataset_path)
+        if self.columnar:
+            # Pastas não podem ser trocadas com os.replace se o destino existir
+            shutil.rmtree(self.columns_path, ignore_errors=True)
+            os.replace(tmp_columns, self.columns_path)
+        self._save_state(current)
+        return summary
+
+    def extract_all(self, state: dict = None):
+        if self.incremental and self.sink is None:
+            return self.extract_incremental()
+
+        if self._refs is None:
+            self.prefetch()
 
-    def extract_all(self):
         # Ordem simples: branches -> commits -> tags -> describe
         self.extract_branches_overview()
         self.extract_recent_commits_sample()
         self.extract_tags_timeline()
         self.extract_git_describe()
+        self.extract_clone_info()
+        if self.full_history:
+            self.extract_history_summary()
+        self.close()
+        self._save_state(state or self._current_state())
 
 
 if __name__ == "__main__":
     REPO = r"ADICIONE AQUI O CAMIHNO PARA O REPOSITÓRIO GIT LOCAL"
     N_COMMITS_PER_BRANCH = 20  
+
+    parser = argparse.ArgumentParser(description="Extrai branches, commits e tags para o dataset.jsonl")
+    parser.add_argument("--repo", default=REPO, help="caminho do repositório Git local")
+    parser.add_argument("--output", default="git_strategy_output", help="pasta de saída")
+    parser.add_argument("-n", "--commits", type=int, default=N_COMMITS_PER_BRANCH,
+                        help="últimos N commits por branch")
+    parser.add_argument("--incremental", action="store_true",
+                        help="só reprocessa as refs que mudaram desde a última execução")
+    parser.add_argument("--repo-id", default=None,
+                        help="identificador do repositório (padrão: derivado do remote origin)")
+    parser.add_argument("--git-timeout", type=float, default=120,
+                        help="tempo máximo de cada comando git (s); nas leituras em streaming, tempo máximo sem resposta")
+    parser.add_argument("--columnar", action="store_true",
+                        help="grava também dataset.columns/ (formato colunar indexado, ver columnar.py)")
+    parser.add_argument("--full-history", action="store_true",
+                        help="inclui um resumo de todo o histórico (git log --branches --remotes --tags, agregado em streaming)")
+    args = parser.parse_args()
+
     extractor = GitStrategyExtractorEssential(
-        repo_path=REPO,
-        output_dir="git_strategy_output",
-        recent_commits_per_branch=N_COMMITS_PER_BRANCH
+        repo_path=args.repo,
+        output_dir=args.output,
+        recent_commits_per_branch=args.commits,
+        incremental=args.incremental,
+        repo_id=args.repo_id,
+        git_timeout=args.git_timeout,
+        columnar=args.columnar,
+        full_history=args.full_history
     )
-    extractor.extract_all()
+    result = extractor.extract_all()
+    for err in extractor.git_errors:
+        print(f"Aviso: git {' '.join(err.args[:2])} falhou ({err.stderr.strip() or err.returncode})")
+    if args.incremental and result and not result["full"]:
+        print(f"Incremental: {len(result['changed'])} refs alteradas, {len(result['removed'])} removidas.")
 
-    print(f"Concluído. Saída em: {Path('git_strategy_output').resolve()}")
-    print(f"Dataset JSONL: {Path('git_strategy_output/dataset.jsonl').resolve()}")
+    print(f"Concluído. Saída em: {Path(args.output).resolve()}")
+    print(f"Dataset JSONL: {(Path(args.output) / 'dataset.jsonl').resolve()}")
+    if args.columnar:
+        print(f"Dataset colunar: {(Path(args.output) / 'dataset.columns').resolve()}")
@@ -1,165 +1,213 @@
-import pandas as pd
-from transformers import pipeline
-from typing import Dict, Any
-
-def load_zero_shot_classifier(model_name: str = "MoritzLaurer/mDeBERTa-v3-base-xnli-multilingual-nli-2mil7"):
-    """
-    Carrega o modelo zero-shot-classification (sem necessidade de treino).
-    """
-    return pipeline("zero-shot-classification", model=model_name)
-
-# ===============================================================
-# 🔹 Função de classificação por similaridade semântica
-# ===============================================================
-def classify(description: str,
-                          descriptions: Dict[str, str],
-                          model_name: str = "MoritzLaurer/mDeBERTa-v3-base-xnli-multilingual-nli-2mil7",
-                          multi_label: bool = True) -> Dict[str, Any]:
-    """
-    Usa zero-shot-classification para identificar qual arquitetura o texto mais descreve.
-    """
-    classifier = load_zero_shot_classifier(model_name)
-    candidate_labels = list(descriptions.keys())
-
-    result = classifier(description, candidate_labels, multi_label=multi_label)
-    labels_scores = list(zip(result["labels"], result["scores"]))
-    labels_scores = sorted(labels_scores, key=lambda x: x[1], reverse=True)
-
-    return {
-        "sequence": result.get("sequence", description),
-        "labels_scores": labels_scores
-    }
-def pretty_print(result: Dict[str, Any], top_k: int = 6):
-    print("\nTexto analisado:\n", result["sequence"][:600], "...\n")
-    print(f"Top {top_k} estratégias mais prováveis (label : score):\n")
-    lista = []
-    for label, score in result["labels_scores"][:top_k]:
-        print(f"  - {label:<30} : {score:.4f}")
-        lista.append({
-            "label": label,
-            "score": score
-        })
-    df = pd.DataFrame(data=lista)
-    #df.to_csv('Zero-Shot.csv', index=False)
-
-# ==========================================
-# PASSO 2: Configuração do Modelo e do Texto
-# ==========================================
-
-# O texto técnico do projeto AnythingLLM (Fornecido no prompt)
-texto_analise = """
-Com base nos dados técnicos e estatísticos abaixo sobre o projeto open source "AnythingLLM", 
-identifique e justifique:
-1. Qual é o Modelo de Fluxo de Trabalho (Branching Model) utilizado (ex: Gitflow, GitHub Flow, 
-Trunk-Based Development)?
-2. Qual é a Estratégia de Releases utilizada (ex: Versionamento Semântico, Release Train, Rolling 
-Release)?
-✷ Visão Geral do Projeto
-• Nome: Mintplex-Labs/anything-llm.
-• Descrição: Aplicação "all-in-one" de IA para Desktop e Docker, focada em RAG (Retrieval Augmented 
-Generation).
-• Arquitetura: Monorepo contendo Frontend (ViteJS/React), Server (NodeJS), Collector e configurações de 
-Docker.
-• Linguagem Dominante: JavaScript (98%).
-✷ Dados sobre Branches e Fluxo de Trabalho (Branching)
-• Estrutura de Branches: O repositório possui cerca de 67 branches, sendo 24 ativas. A maioria segue o 
-padrão de nomenclatura convencional: feat/...,bug/...,refactor/....
-• Ausência de Branch "Develop": Não foi identificada uma branch intermediária fixa chamada develop. 
-As alterações ocorrem em branches temporárias e são mescladas diretamente na branch principal 
-(master ou main).
-• Integração e Code Review:
-◦ O uso de Pull Requests (PRs) é mandatório e intenso: houve 58 PRs mesclados em um período de 30 
-dias (15/nov a 15/dez).
-◦ Existem templates de contribuição (pull_request_template.md e CONTRIBUTING.md).
-◦ A integração na branch principal é controlada: apenas 5 autores realizaram commits diretos na main, 
-enquanto 58 commits ocorreram via merge de branches auxiliares.
-• Automação (CI): Todas as branches analisadas passam por verificações automáticas de testes (CI via 
-GitHub Actions), garantindo integridade antes do merge.
-✷ Dados sobre Releases e Entrega
-• Versionamento: O projeto utiliza tags no formato de Versionamento Semântico (ex: v1.9.0, v1.9.1),.
-• Artefatos de Entrega: O software não é apenas um serviço web, mas gera binários instaláveis para 
-Desktop (Windows, Mac, Linux) e Imagens Docker,.
-• Histórico: O projeto contabiliza mais de 21 releases registradas no GitHub.
-• Gestão de Mudanças: As releases parecem ser isoladas pontualmente em branches específicas ou 
-tags para garantir estabilidade sem travar o desenvolvimento paralelo na branch principal.
-"""
-
-# Carregando o pipeline de Zero-Shot Classification
-# Usamos o 'facebook/bart-large-mnli' pois ele é excelente em inferência lógica (NLI)
-print("Carregando modelo Zero-Shot (pode demorar alguns segundos)...")
-
-
-# ==========================================
-# PASSO 3: Definição das Hipóteses (Rótulos)
-# ==========================================
-
-# ==========================================
-# PASSO 3: Definição das Hipóteses (Rótulos)
-# ==========================================
-
-# Modelos de Branching com descrições explícitas (hipóteses NLI)
-BRANCHING_DESCRIPTIONS = {
-    "GitHub Flow": (
-         "GitHub Flow, caracterizado por uma única branch principal (main) e branches curtas de feature, "
-    "com integração contínua via pull requests"
-    ),
-
-    "Gitflow": (
-         "Gitflow, caracterizado pelo uso de branches fixas como develop, master, release e hotfix, "
-    "com ciclos de desenvolvimento bem definidos"
-    ),
-
-    "Trunk-Based Development": (
-        "Trunk-Based Development, caracterizado por commits frequentes diretamente na branch principal "
-    "ou em branches de vida muito curta, com forte uso de CI"
-    ),
-
-    "GitLab Flow": (
-        "GitLab Flow, caracterizado pela combinação de branches de feature com branches específicas "
-        "por ambiente ou versão"
-    ),
-}
-
-RELEASE_STRATEGY_DESCRIPTIONS = {
-    "Semantic Versioning": (
-        "Semantic Versioning, caracterizado pelo uso de versões no formato MAJOR.MINOR.PATCH, "
-        "indicando compatibilidade e tipo de mudança"
-    ),
-
-    "Release Train": (
-        "Release Train, caracterizado por releases em datas fixas e previsíveis, "
-        "independentemente do volume de mudanças"
-    ),
-
-    "Rolling Release": (
-        "Rolling Release, caracterizado por entregas contínuas sem versões bem definidas, "
-    "onde o software está sempre sendo atualizado"
-    ),
-
-    "Ad-hoc Release": (
-        "Ad-hoc Release, caracterizado por releases manuais e pontuais, "
-    "sem periodicidade fixa ou estratégia formal"
-    ),
-}
-
-
-# Estratégias de Release com descrições explícitas
-
-
-
-# ==========================================
-# PASSO 4: Execução da Análise
-# ==========================================
-
-print("Analisando o texto...")
-
-result = classify(texto_analise, BRANCHING_DESCRIPTIONS)
-lista = []
-lista.append(result["sequence"])
-print(lista)
-pretty_print(result, top_k=4)
-result = classify(texto_analise, RELEASE_STRATEGY_DESCRIPTIONS)
-lista = []
-lista.append(result["sequence"])
-print(lista)
+import os
+import sys
+from pathlib import Path
+from typing import Dict, Any
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import instrumentation
+from chunking import chunk_text, pool, token_counter, window_weights
+from data_report import report_from_dataset
+from embedding_cache import EmbeddingCache, cosine_scores
+from model_server import EMBEDDING_MODEL, ModelClient
+from result_cache import open_cache, result_key, texts_hash
+from strategies import BRANCHING_DESCRIPTIONS, RELEASE_STRATEGY_DESCRIPTIONS
+
+# Cliente do servidor de modelos (model_server.py): o modelo fica carregado no servidor.
+# Sem servidor no ar, é carregado uma única vez neste processo.
+client = ModelClient()
+
+# Textos maiores que o contexto do modelo são divididos em janelas; os scores
+# de cada janela são agregados com o pooling escolhido (mean, max ou attention).
+TOKEN_BUDGET = 448
+POOLING = "attention"
+MODEL_NAME = "MoritzLaurer/mDeBERTa-v3-base-xnli-multilingual-nli-2mil7"
+
+# Classificação em duas etapas: com mais de SHORTLIST_K estratégias, uma pré-seleção
+# barata por similaridade de embeddings (descrições x texto) escolhe as K mais próximas
+# e só elas passam pelo NLI. O custo do NLI deixa de crescer com o número de estratégias.
+SHORTLIST_K = 4          # None desativa a pré-seleção
+SHORTLIST_MODEL = EMBEDDING_MODEL
+
+# Cache persistente de resultados: o mesmo texto com as mesmas descrições e o mesmo
+# modelo não é classificado de novo (mudar as descrições invalida o resultado)
+results = open_cache()
+
+@instrumentation.timed("zero_shot.load_classifier")
+def load_zero_shot_classifier(model_name: str = MODEL_NAME):
+    """
+    Retorna o classificador zero-shot-classification (sem necessidade de treino),
+    servido pelo servidor de modelos em vez de recriar o pipeline a cada chamada.
+    """
+    def classifier(sequences, candidate_labels, multi_label=True):
+        # Como o pipeline da Hugging Face: str -> um resultado, lista -> lista de resultados (em lote)
+        if isinstance(sequences, str):
+            return client.zero_shot(sequences, candidate_labels, model=model_name, multi_label=multi_label)
+        return client.zero_shot_many(sequences, candidate_labels, model=model_name, multi_label=multi_label)
+    return classifier
+
+@instrumentation.timed("zero_shot.shortlist")
+def shortlist_labels(janelas, descriptions: Dict[str, str], k: int = SHORTLIST_K,
+                     model_name: str = SHORTLIST_MODEL):
+    """
+    Etapa 1: as `k` estratégias cujas descrições são mais parecidas com o texto
+    (similaridade de cosseno entre embeddings, em ordem decrescente).
+    Com `k` estratégias ou menos, todas seguem para o NLI sem calcular embeddings.
+    """
+    labels = list(descriptions.keys())
+    if k is None or len(labels) <= k:
+        return labels
+    # Descrições e janelas já vistas vêm do cache de embeddings em disco
+    cache = EmbeddingCache(model_name)
+    encode = lambda faltantes: client.embed(faltantes, model=model_name)
+    emb_labels = cache.get_many(list(descriptions.values()), encode)
+    emb_texto = pool(cache.get_many(janelas, encode), "mean", weights=window_weights(janelas))
+    sims = cosine_scores(emb_labels, emb_texto)
+    return [labels[i] for i in sorted(range(len(labels)), key=lambda i: -sims[i])[:k]]
+
+# ===============================================================
+# 🔹 Função de classificação por similaridade semântica
+# ===============================================================
+@instrumentation.timed("zero_shot.classify")
+def classify(description: str,
+                          descriptions: Dict[str, str],
+                          model_name: str = MODEL_NAME,
+                          multi_label: bool = True,
+                          pooling: str = POOLING,
+                          token_budget: int = TOKEN_BUDGET,
+                          shortlist_k: int = SHORTLIST_K) -> Dict[str, Any]:
+    """
+    Usa zero-shot-classification para identificar qual arquitetura o texto mais descreve.
+    Textos longos são classificados por janelas (em lote) e os scores são agregados.
+    Só as `shortlist_k` estratégias pré-selecionadas por embeddings passam pelo NLI
+    (todos os pares janela x estratégia em um único lote); as demais ficam com score 0.
+    """
+    classifier = load_zero_shot_classifier(model_name)
+
+    # Janelas medidas com o tokenizer do próprio modelo (estimativa conservadora se não houver)
+    janelas = chunk_text(description, token_budget, token_counter(model_name)) or [description]
+    candidate_labels = shortlist_labels(janelas, descriptions, shortlist_k)
+    results = classifier(janelas, candidate_labels, multi_label=multi_label)
+    matriz = [
+        [dict(zip(r["labels"], r["scores"]))[label] for label in candidate_labels]
+        for r in results
+    ]
+    labels_scores = list(zip(candidate_labels, [float(s) for s in pool(matriz, pooling)]))
+    labels_scores = sorted(labels_scores, key=lambda x: x[1], reverse=True)
+    labels_scores += [(label, 0.0) for label in descriptions if label not in candidate_labels]
+
+    return {
+        "sequence": description,
+        "labels_scores": labels_scores,
+        "shortlist": candidate_labels,
+    }
+
+def classify_cached(description: str,
+                    descriptions: Dict[str, str],
+                    model_name: str = MODEL_NAME,
+                    multi_label: bool = True,
+                    pooling: str = POOLING,
+                    token_budget: int = TOKEN_BUDGET,
+                    shortlist_k: int = SHORTLIST_K) -> Dict[str, Any]:
+    """
+    Igual a classify, mas consulta antes o cache de resultados (result_cache.py).
+    O resultado vindo do cache tem as mesmas chaves, inclusive `shortlist`.
+    """
+    if results is None:
+        return classify(description, descriptions, model_name, multi_label, pooling, token_budget, shortlist_k)
+    shortlist = {"shortlist_k": shortlist_k, "shortlist_model": SHORTLIST_MODEL} if shortlist_k else {}
+    # `output` faz as entradas antigas (só labels_scores, sem a shortlist) não serem reaproveitadas
+    key = result_key(model_name, descriptions, texts_hash([description]), engine="zero_shot",
+                     multi_label=multi_label, pooling=pooling, token_budget=token_budget,
+                     output=["labels_scores", "shortlist"], **shortlist)
+    cached = results.get(key)
+    if cached is not None:
+        return {
+            "sequence": description,
+            "labels_scores": [tuple(item) for item in cached["labels_scores"]],
+            "shortlist": cached["shortlist"],
+        }
+    result = classify(description, descriptions, model_name, multi_label, pooling, token_budget, shortlist_k)
+    results.put(key, {"labels_scores": result["labels_scores"], "shortlist": result["shortlist"]}, model_name)
+    return result
+
+def pretty_print(result: Dict[str, Any], top_k: int = 6):
+    print("\nTexto analisado:\n", result["sequence"][:600], "...\n")
+    print(f"Top {top_k} estratégias mais prováveis (label : score):\n")
+    for label, score in result["labels_scores"][:top_k]:
+        print(f"  - {label:<30} : {score:.4f}")
+
+# ==========================================
+# PASSO 2: Configuração do Modelo e do Texto
+# ==========================================
+
+# O texto técnico do projeto AnythingLLM (Fornecido no prompt)
+texto_analise = """
+Com base nos dados técnicos e estatísticos abaixo sobre o projeto open source "AnythingLLM", 
+identifique e justifique:
+1. Qual é o Modelo de Fluxo de Trabalho (Branching Model) utilizado (ex: Gitflow, GitHub Flow, 
+Trunk-Based Development)?
+2. Qual é a Estratégia de Releases utilizada (ex: Versionamento Semântico, Release Train, Rolling 
+Release)?
+✷ Visão Geral do Projeto
+• Nome: Mintplex-Labs/anything-llm.
+• Descrição: Aplicação "all-in-one" de IA para Desktop e Docker, focada em RAG (Retrieval Augmented 
+Generation).
+• Arquitetura: Monorepo contendo Frontend (ViteJS/React), Server (NodeJS), Collector e configurações de 
+Docker.
+• Linguagem Dominante: JavaScript (98%).
+✷ Dados sobre Branches e Fluxo de Trabalho (Branching)
+• Estrutura de Branches: O repositório possui cerca de 67 branches, sendo 24 ativas. A maioria segue o 
+padrão de nomenclatura convencional: feat/...,bug/...,refactor/....
+• Ausência de Branch "Develop": Não foi identificada uma branch intermediária fixa chamada develop. 
+As alterações ocorrem em branches temporárias e são mescladas diretamente na branch principal 
+(master ou main).
+• Integração e Code Review:
+◦ O uso de Pull Requests (PRs) é mandatório e intenso: houve 58 PRs mesclados em um período de 30 
+dias (15/nov a 15/dez).
+◦ Existem templates de contribuição (pull_request_template.md e CONTRIBUTING.md).
+◦ A integração na branch principal é controlada: apenas 5 autores realizaram commits diretos na main, 
+enquanto 58 commits ocorreram via merge de branches auxiliares.
+• Automação (CI): Todas as branches analisadas passam por verificações automáticas de testes (CI via 
+GitHub Actions), garantindo integridade antes do merge.
+✷ Dados sobre Releases e Entrega
+• Versionamento: O projeto utiliza tags no formato de Versionamento Semântico (ex: v1.9.0, v1.9.1),.
+• Artefatos de Entrega: O software não é apenas um serviço web, mas gera binários instaláveis para 
+Desktop (Windows, Mac, Linux) e Imagens Docker,.
+• Histórico: O projeto contabiliza mais de 21 releases registradas no GitHub.
+• Gestão de Mudanças: As releases parecem ser isoladas pontualmente em branches específicas ou 
+tags para garantir estabilidade sem travar o desenvolvimento paralelo na branch principal.
+"""
+
+# Com um dataset.jsonl no diretório atual (saída do extrator), o texto é gerado a
+# partir dele pelo data_report.py em vez de usar o texto escrito à mão acima
+if os.path.exists("dataset.jsonl"):
+    texto_analise = report_from_dataset("dataset.jsonl")
+
+# Carregando o pipeline de Zero-Shot Classification
+# Usamos o 'facebook/bart-large-mnli' pois ele é excelente em inferência lógica (NLI)
+print("Carregando modelo Zero-Shot (pode demorar alguns segundos)...")
+
+
+# ==========================================
+# PASSO 3: Definição das Hipóteses (Rótulos)
+# ==========================================
+
+# Modelos de Branching e Estratégias de Release com descrições explícitas (hipóteses NLI):
+# BRANCHING_DESCRIPTIONS e RELEASE_STRATEGY_DESCRIPTIONS, em strategies.py
+
+# ==========================================
+# PASSO 4: Execução da Análise
+# ==========================================
+
+print("Analisando o texto...")
+
+result = classify_cached(texto_analise, BRANCHING_DESCRIPTIONS)
+lista = []
+lista.append(result["sequence"])
+print(lista)
+pretty_print(result, top_k=4)
+result = classify_cached(texto_analise, RELEASE_STRATEGY_DESCRIPTIONS)
+lista = []
+lista.append(result["sequence"])
+print(lista)
 pretty_print(result, top_k=4)
\ No newline at end of file
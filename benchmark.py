@@ -0,0 +1,519 @@
+import argparse
+import contextlib
+import inspect
+import io
+import json
+import os
+import platform
+import random
+import runpy
+import shutil
+import string
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Benchmark reproduzível do pipeline: extração + os três motores de classificação.
+# - Repositórios git sintéticos (branches, commits e tags configuráveis) gerados com
+#   `git fast-import` e reaproveitados entre execuções;
+# - Modelos minúsculos locais (BERT de 2 camadas, pesos aleatórios) no lugar dos
+#   modelos reais: medem o custo do pipeline, não a qualidade da classificação;
+# - Saída JSON com vazão, latência p50/p99 e pico de RSS por etapa (o pico é zerado
+#   antes de cada etapa; só no Linux);
+# - Modo de regressão: compara o p50 de cada etapa com um baseline salvo.
+#
+# Uso:
+#   python benchmark.py --branches 200 --commits 2000 --tags 50 --output bench.json
+#   python benchmark.py --baseline bench.json --tolerance 0.2
+
+ROOT = Path(__file__).resolve().parent
+DEFAULT_BENCH_DIR = Path(os.environ.get(
+    "BENCH_DIR", Path.home() / ".cache" / "git-strategy" / "bench"
+))
+SUITES = ["extract", "zero-shot", "reranker", "embedding"]
+
+BRANCH_PREFIXES = ["feat", "bug", "refactor", "chore", "release", "hotfix"]
+AUTHORS = [("Ana Souza", "ana"), ("Bruno Lima", "bruno"), ("Carla Dias", "carla"), ("Diego Alves", "diego"),
+           ("Elisa Rocha", "elisa"), ("Felipe Costa", "felipe"), ("Gabi Nunes", "gabi"), ("Hugo Melo", "hugo")]
+
+
+# ===============================================================
+# 🔹 Repositório sintético
+# ===============================================================
+def _fast_import_stream(branches: int, commits: int, branch_commits: int, tags: int, seed: int) -> str:
+    rnd = random.Random(seed)
+    out, mark, ts = [], 0, 1_600_000_000
+
+    def commit(ref, subject, parent):
+        nonlocal mark, ts
+        mark += 1
+        ts += rnd.randint(60, 36_000)
+        name, email = rnd.choice(AUTHORS)
+        ident = f"{name} <{email}@example.com> {ts} +0000"
+        content = f"{subject}\n"
+        out.extend([f"commit {ref}", f"mark :{mark}", f"author {ident}", f"committer {ident}",
+                    f"data {len(subject)}", subject])
+        if parent:
+            out.append(f"from :{parent}")
+        out.extend(["M 644 inline CHANGELOG", f"data {len(content)}", content])
+        return mark
+
+    main, parent = [], None
+    for i in range(max(1, commits)):
+        parent = commit("refs/heads/main", f"chore: commit {i} na main", parent)
+        main.append(parent)
+
+    for i in range(branches):
+        prefix = rnd.choice(BRANCH_PREFIXES)
+        ref = f"refs/heads/{prefix}/item-{i:05d}"
+        parent = rnd.choice(main)
+        for j in range(rnd.randint(1, max(1, branch_commits))):
+            parent = commit(ref, f"{prefix}: passo {j} de item-{i}", parent)
+
+    step = max(1, len(main) // max(1, tags))
+    for i, target in enumerate(main[::step][:tags]):
+        ts += 1
+        name = f"v{1 + i // 100}.{i // 10 % 10}.{i % 10}"
+        msg = f"Release {name}"
+        out.extend([f"tag {name}", f"from :{target}", f"tagger Bot <bot@example.com> {ts} +0000",
+                    f"data {len(msg)}", msg])
+    return "\n".join(out) + "\n"
+
+
+def make_repo(path, branches: int = 50, commits: int = 500, branch_commits: int = 5,
+              tags: int = 20, seed: int = 0) -> Path:
+    """Cria (ou reaproveita) um repositório sintético com os parâmetros dados."""
+    path = Path(path)
+    if (path / ".git").exists():
+        return path
+    tmp = path.with_name(path.name + ".tmp")
+    shutil.rmtree(tmp, ignore_errors=True)
+    tmp.mkdir(parents=True)
+    subprocess.run(["git", "init", "-q", str(tmp)], check=True)
+    subprocess.run(["git", "-C", str(tmp), "symbolic-ref", "HEAD", "refs/heads/main"], check=True)
+    subprocess.run(["git", "-C", str(tmp), "fast-import", "--quiet"], check=True,
+                   input=_fast_import_stream(branches, commits, branch_commits, tags, seed).encode("utf-8"))
+    subprocess.run(["git", "-C", str(tmp), "reset", "-q", "--hard"], check=True)
+    os.replace(tmp, path)
+    return path
+
+
+# ===============================================================
+# 🔹 Modelos substitutos (minúsculos, locais)
+# ===============================================================
+def make_tiny_models(root) -> dict:
+    """Gera modelos BERT minúsculos (zero-shot NLI, reranker e embeddings) em `root`."""
+    from transformers import BertConfig, BertForSequenceClassification, BertModel, BertTokenizerFast
+
+    root = Path(root)
+    dirs = {"zero-shot": root / "zero-shot", "reranker": root / "reranker", "embedding": root / "embedding"}
+    if all((d / "config.json").exists() for d in dirs.values()):
+        return dirs
+
+    import torch
+    torch.manual_seed(0)
+    root.mkdir(parents=True, exist_ok=True)
+    chars = string.ascii_lowercase + string.digits
+    vocab = ["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]"] + list(chars + ".,|:/-_") + ["##" + c for c in chars]
+    vocab_file = root / "vocab.txt"
+    vocab_file.write_text("\n".join(vocab), encoding="utf-8")
+    tokenizer = BertTokenizerFast(vocab_file=str(vocab_file), do_lower_case=True, model_max_length=512)
+    config = dict(vocab_size=len(vocab), hidden_size=32, num_hidden_layers=2, num_attention_heads=2,
+                  intermediate_size=64, max_position_embeddings=512)
+    nli = {"entailment": 0, "neutral": 1, "contradiction": 2}
+    models = {
+        "zero-shot": BertForSequenceClassification(BertConfig(
+            **config, num_labels=3, label2id=nli, id2label={v: k for k, v in nli.items()})),
+        "reranker": BertForSequenceClassification(BertConfig(**config, num_labels=1)),
+        "embedding": BertModel(BertConfig(**config)),
+    }
+    for kind, model in models.items():
+        model.save_pretrained(dirs[kind])
+        tokenizer.save_pretrained(dirs[kind])
+    return dirs
+
+
+class TinyReranker:
+    """Substituto do FlagReranker: mesmos atributos (tokenizer, model) e compute_score."""
+
+    def __init__(self, path):
+        from transformers import AutoModelForSequenceClassification, AutoTokenizer
+        self.tokenizer = AutoTokenizer.from_pretrained(path)
+        self.model = AutoModelForSequenceClassification.from_pretrained(path).eval()
+
+    def compute_score(self, pairs, batch_size: int = 16, max_length: int = 512):
+        import torch
+        scores = []
+        for start in range(0, len(pairs), batch_size):
+            batch = pairs[start:start + batch_size]
+            enc = self.tokenizer([p[0] for p in batch], [p[1] for p in batch], padding=True,
+                                 truncation="only_first", max_length=max_length, return_tensors="pt")
+            with torch.no_grad():
+                scores.extend(self.model(**enc).logits.view(-1).tolist())
+        return scores
+
+
+class TinyEmbedder:
+    """Substituto do SentenceTransformer: encode() com mean pooling normalizado."""
+
+    def __init__(self, path):
+        from transformers import AutoModel, AutoTokenizer
+        self.tokenizer = AutoTokenizer.from_pretrained(path)
+        self.model = AutoModel.from_pretrained(path).eval()
+
+    def encode(self, texts, batch_size: int = 32):
+        import torch
+        out = []
+        for start in range(0, len(texts), batch_size):
+            enc = self.tokenizer(texts[start:start + batch_size], padding=True, truncation=True,
+                                 max_length=512, return_tensors="pt")
+            with torch.no_grad():
+                hidden = self.model(**enc).last_hidden_state
+            mask = enc["attention_mask"].unsqueeze(-1).float()
+            emb = (hidden * mask).sum(1) / mask.sum(1).clamp(min=1e-9)
+            out.append(torch.nn.functional.normalize(emb, dim=1).numpy())
+        return np.concatenate(out) if out else np.zeros((0, self.model.config.hidden_size), dtype=np.float32)
+
+
+def install_standins(model_dirs: dict, backend: str = "torch", threads: int = None):
+    """
+    Troca os modelos do registro local do model_server pelos substitutos: qualquer
+    nome de modelo pedido pelos scripts carrega o modelo minúsculo do mesmo tipo.
+    """
+    import model_server
+
+    registry = model_server.ModelRegistry(max_models=3, backend=backend, threads=threads)
+    if backend == "onnx":
+        onnx_loaders = registry.loaders
+        registry.loaders = {kind: (lambda _name, k=kind: onnx_loaders[k](str(model_dirs[k])))
+                            for kind in model_dirs}
+    else:
+        from transformers import pipeline
+        registry.loaders = {
+            "zero-shot": lambda _name: pipeline("zero-shot-classification", model=str(model_dirs["zero-shot"])),
+            "reranker": lambda _name: TinyReranker(model_dirs["reranker"]),
+            "embedding": lambda _name: TinyEmbedder(model_dirs["embedding"]),
+        }
+    model_server._local_registry = registry
+    # Os scripts devem usar os substitutos do processo, nunca um servidor no ar
+    model_server.LOCAL_ONLY = True
+    return registry
+
+
+# ===============================================================
+# 🔹 Medição
+# ===============================================================
+def peak_rss_mb(children: bool = False) -> float:
+    try:
+        import resource
+    except ImportError:  # Windows
+        return 0.0
+    who = resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF
+    peak = resource.getrusage(who).ru_maxrss
+    # Linux devolve KB; macOS, bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def reset_peak_rss() -> bool:
+    """
+    Zera o pico de RSS do processo (VmHWM), para que cada etapa meça o próprio pico e
+    não o maior já visto (ru_maxrss só cresce). Só o Linux permite isso (clear_refs = 5);
+    nos demais sistemas devolve False e as etapas ficam sem pico próprio.
+    """
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def _hwm_mb() -> float:
+    with open("/proc/self/status", encoding="ascii") as f:
+        for line in f:
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) / 1024
+    return peak_rss_mb()
+
+
+def summarize(times, units: float = 0, unit: str = "", rss=()) -> dict:
+    t = np.asarray(times, dtype=np.float64)
+    p50 = float(np.percentile(t, 50))
+    rss = [r for r in rss if r is not None]
+    return {
+        "runs": len(t),
+        "p50_ms": p50 * 1000,
+        "p99_ms": float(np.percentile(t, 99)) * 1000,
+        "mean_ms": float(t.mean()) * 1000,
+        "throughput": units / p50 if units and p50 > 0 else None,
+        "unit": unit,
+        # Maior pico entre as rodadas da própria etapa (None se o sistema não permite medir)
+        "peak_rss_mb": round(max(rss), 1) if rss else None,
+    }
+
+
+def _timed(fn):
+    """Executa uma etapa e devolve (duração, resultado, pico de RSS da etapa em MB ou None)."""
+    resettable = reset_peak_rss()
+    t0 = time.perf_counter()
+    out = fn()
+    dt = time.perf_counter() - t0
+    return dt, out, _hwm_mb() if resettable else None
+
+
+@contextlib.contextmanager
+def _quiet():
+    # Os scripts de classificação imprimem os resultados; no benchmark só interessa o tempo
+    with contextlib.redirect_stdout(io.StringIO()):
+        yield
+
+
+@contextlib.contextmanager
+def _chdir(path):
+    old = os.getcwd()
+    os.chdir(path)
+    try:
+        yield
+    finally:
+        os.chdir(old)
+
+
+def _run_script(relpath: str, cwd) -> dict:
+    with _quiet(), _chdir(cwd):
+        return runpy.run_path(str(ROOT / relpath), run_name="benchmark")
+
+
+# ===============================================================
+# 🔹 Suítes
+# ===============================================================
+def bench_extract(repo, out_root, commits_per_branch: int, repeat: int) -> dict:
+    from DataSet_extractor import GitStrategyExtractorEssential
+
+    phases = {
+        "prefetch": lambda ex: (ex.prefetch(), len(ex._refs))[1],
+        "branches_overview": lambda ex: ex.extract_branches_overview(),
+        "recent_commits_sample": lambda ex: ex.extract_recent_commits_sample(),
+        "tags_timeline": lambda ex: ex.extract_tags_timeline(),
+        "git_describe": lambda ex: ex.extract_git_describe(),
+        "clone_info": lambda ex: ex.extract_clone_info(),
+        # Caminho do --full-history: log completo em streaming e estatísticas por branch
+        "history_summary": lambda ex: ex.extract_history_summary(),
+        "close": lambda ex: ex.close(),
+        "save_state": lambda ex: ex._save_state(ex._current_state()),
+    }
+    times = {name: [] for name in phases}
+    rss = {name: [] for name in phases}
+    units = {name: 0 for name in phases}
+    totals, records = [], 0
+    for i in range(repeat):
+        out = Path(out_root) / f"run-{i}"
+        shutil.rmtree(out, ignore_errors=True)
+        ex = GitStrategyExtractorEssential(str(repo), str(out), recent_commits_per_branch=commits_per_branch)
+        total = 0.0
+        for name, phase in phases.items():
+            before = ex.sink.records
+            dt, n, peak = _timed(lambda: phase(ex))
+            times[name].append(dt)
+            rss[name].append(peak)
+            total += dt
+            units[name] = n if name == "prefetch" else ex.sink.records - before
+        totals.append(total)
+        records = ex.sink.records
+
+    results = {f"extract.{name}": summarize(times[name], units[name],
+                                            "refs/s" if name == "prefetch" else "records/s", rss[name])
+               for name in phases}
+    results["extract.total"] = summarize(totals, records, "records/s", [p for r in rss.values() for p in r])
+    return results
+
+
+def _extraction_text(output_dir) -> str:
+    # Mesma entrada que um usuário colaria nos scripts: os .txt gerados pelo extrator
+    parts = []
+    for name in ("branches_overview.txt", "branches_recent_commits_sample.txt", "tags_timeline.txt", "git_describe.txt"):
+        p = Path(output_dir) / name
+        if p.exists():
+            parts.append(p.read_text(encoding="utf-8"))
+    return "\n".join(parts)
+
+
+def bench_zero_shot(output_dir, repeat: int) -> dict:
+    from chunking import chunk_text, token_counter
+
+    ns = _run_script("Zero-Shot/Zero_Shot.py", output_dir)  # também aquece o modelo
+    texto = _extraction_text(output_dir)
+    # Mesma contagem de tokens que classify() usa para dividir o texto
+    janelas = len(chunk_text(texto, ns["TOKEN_BUDGET"], token_counter(ns["MODEL_NAME"])) or [texto])
+    times, rss = [], []
+    for _ in range(repeat):
+        dt, _, peak = _timed(lambda: ns["classify"](texto, ns["BRANCHING_DESCRIPTIONS"]))
+        times.append(dt)
+        rss.append(peak)
+    return {"classify.zero_shot": summarize(times, janelas, "windows/s", rss)}
+
+
+def bench_reranker(output_dir, repeat: int) -> dict:
+    ns = _run_script("text/text-classification.py", output_dir)
+    taxonomias = {"branching": ns["BRANCHING_DESCRIPTIONS"], "release": ns["RELEASE_STRATEGY_DESCRIPTIONS"]}
+    pares = len(ns["janelas"]) * sum(len(d) for d in taxonomias.values())
+    times, rss = [], []
+    for _ in range(repeat):
+        dt, _, peak = _timed(lambda: ns["score_taxonomias"](ns["janelas"], taxonomias))
+        times.append(dt)
+        rss.append(peak)
+    return {"classify.reranker": summarize(times, pares, "pairs/s", rss)}
+
+
+def bench_embedding(output_dir, cache_root, repeat: int) -> dict:
+    from chunking import chunk_text, pool, token_counter, window_weights
+    from embedding_cache import EmbeddingCache
+
+    ns = _run_script("feature-extraction/extracao-embbeding.py", output_dir)
+    texto = _extraction_text(output_dir)
+    janelas = chunk_text(texto, ns["TOKEN_BUDGET"], token_counter(ns["MODEL_NAME"])) or [texto]
+
+    def run():
+        emb = pool(ns["get_embeddings"](janelas), ns["POOLING"], weights=window_weights(janelas))
+        with _quiet():
+            ns["analisar_categoria"]("Modelos de Branching", ns["BRANCHING_DESCRIPTIONS"], emb)
+            ns["analisar_categoria"]("Estratégias de Release", ns["RELEASE_STRATEGY_DESCRIPTIONS"], emb)
+
+    frio, quente, rss_frio, rss_quente = [], [], [], []
+    for i in range(repeat):
+        # Cache vazio a cada rodada: mede a codificação; a segunda passada mede o cache
+        cache_dir = Path(cache_root) / f"run-{i}"
+        shutil.rmtree(cache_dir, ignore_errors=True)
+        # run_path devolve uma cópia dos globals: troca o cache no módulo do script
+        # (unwrap: get_embeddings pode estar decorada pela instrumentação)
+        inspect.unwrap(ns["get_embeddings"]).__globals__["cache"] = EmbeddingCache(ns["MODEL_NAME"], cache_dir)
+        dt, _, peak = _timed(run)
+        frio.append(dt)
+        rss_frio.append(peak)
+        dt, _, peak = _timed(run)
+        quente.append(dt)
+        rss_quente.append(peak)
+    return {
+        "classify.embedding": summarize(frio, len(janelas), "windows/s", rss_frio),
+        "classify.embedding_cached": summarize(quente, len(janelas), "windows/s", rss_quente),
+    }
+
+
+def run_benchmarks(branches: int = 50, commits: int = 500, branch_commits: int = 5, tags: int = 20,
+                   commits_per_branch: int = 20, repeat: int = 5, suites=SUITES, backend: str = "torch",
+                   threads: int = None, work_dir=DEFAULT_BENCH_DIR, seed: int = 0) -> dict:
+    work_dir = Path(work_dir)
+    params = {"branches": branches, "commits": commits, "branch_commits": branch_commits, "tags": tags,
+              "commits_per_branch": commits_per_branch, "repeat": repeat, "backend": backend,
+              "threads": threads, "seed": seed}
+    repo = make_repo(work_dir / "repos" / f"b{branches}-c{commits}-bc{branch_commits}-t{tags}-s{seed}",
+                     branches, commits, branch_commits, tags, seed)
+
+    out_root = work_dir / "out"
+    results = {}
+    if "extract" in suites:
+        results.update(bench_extract(repo, out_root, commits_per_branch, repeat))
+
+    model_suites = [s for s in suites if s != "extract"]
+    if model_suites:
+        # Dataset de entrada para os classificadores (uma extração completa)
+        output_dir = out_root / "dataset"
+        if not (output_dir / "dataset.jsonl").exists() or "extract" in suites:
+            from DataSet_extractor import GitStrategyExtractorEssential
+            shutil.rmtree(output_dir, ignore_errors=True)
+            GitStrategyExtractorEssential(str(repo), str(output_dir),
+                                          recent_commits_per_branch=commits_per_branch).extract_all()
+        install_standins(make_tiny_models(work_dir / "models"), backend, threads)
+        if "zero-shot" in suites:
+            results.update(bench_zero_shot(output_dir, repeat))
+        if "reranker" in suites:
+            results.update(bench_reranker(output_dir, repeat))
+        if "embedding" in suites:
+            results.update(bench_embedding(output_dir, work_dir / "embeddings", repeat))
+
+    return {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "params": params,
+            # Processos git e afins não têm pico por etapa: só o maior filho da execução inteira
+            "peak_rss_children_mb": round(peak_rss_mb(children=True), 1),
+        },
+        "results": results,
+    }
+
+
+# ===============================================================
+# 🔹 Regressão
+# ===============================================================
+def compare(current: dict, baseline: dict, tolerance: float = 0.2):
+    """Etapas cujo p50 piorou mais que `tolerance` (fração) em relação ao baseline."""
+    regressions = []
+    base = baseline.get("results", {})
+    for name, res in current.get("results", {}).items():
+        if name not in base or not base[name].get("p50_ms"):
+            continue
+        ratio = res["p50_ms"] / base[name]["p50_ms"]
+        if ratio > 1 + tolerance:
+            regressions.append({"name": name, "baseline_p50_ms": base[name]["p50_ms"],
+                                "p50_ms": res["p50_ms"], "ratio": ratio})
+    return regressions
+
+
+def print_table(report: dict, baseline: dict = None):
+    base = (baseline or {}).get("results", {})
+    print(f"{'etapa':36} {'p50 ms':>10} {'p99 ms':>10} {'vazão':>16} {'RSS MB':>8}" + ("  vs baseline" if base else ""))
+    for name, r in report["results"].items():
+        vazao = f"{r['throughput']:.1f} {r['unit']}" if r["throughput"] else "-"
+        rss = f"{r['peak_rss_mb']:.1f}" if r.get("peak_rss_mb") is not None else "-"
+        linha = f"{name:36} {r['p50_ms']:10.2f} {r['p99_ms']:10.2f} {vazao:>16} {rss:>8}"
+        if name in base and base[name].get("p50_ms"):
+            linha += f"  {r['p50_ms'] / base[name]['p50_ms']:.2f}x"
+        print(linha)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark da extração e dos classificadores com repositórios sintéticos")
+    parser.add_argument("--branches", type=int, default=50)
+    parser.add_argument("--commits", type=int, default=500, help="commits na main")
+    parser.add_argument("--branch-commits", type=int, default=5, help="máximo de commits por branch")
+    parser.add_argument("--tags", type=int, default=20)
+    parser.add_argument("-n", "--commits-per-branch", type=int, default=20, help="amostra do extrator por branch")
+    parser.add_argument("--repeat", type=int, default=5, help="rodadas por etapa")
+    parser.add_argument("--only", nargs="+", choices=SUITES, default=SUITES)
+    parser.add_argument("--backend", choices=["torch", "onnx"], default="torch")
+    parser.add_argument("--threads", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--work-dir", default=str(DEFAULT_BENCH_DIR),
+                        help="repositórios, modelos e saídas (reaproveitados entre execuções)")
+    parser.add_argument("--output", default=None, help="grava o relatório JSON neste arquivo")
+    parser.add_argument("--baseline", default=None, help="relatório JSON anterior para o modo de regressão")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="piora aceita no p50 (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    # Sem cache de resultados: cada repetição precisa chegar aos modelos
+    os.environ["RESULT_CACHE"] = "0"
+    os.environ.setdefault("EMBEDDING_CACHE_DIR", str(Path(args.work_dir) / "embeddings" / "scripts"))
+    sys.path.insert(0, str(ROOT))
+
+    report = run_benchmarks(args.branches, args.commits, args.branch_commits, args.tags,
+                            args.commits_per_branch, args.repeat, args.only, args.backend,
+                            args.threads, args.work_dir, args.seed)
+    baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8")) if args.baseline else None
+    print_table(report, baseline)
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding="utf-8")
+        print(f"\nRelatório salvo em {Path(args.output).resolve()}")
+
+    if baseline is not None:
+        regressions = compare(report, baseline, args.tolerance)
+        if regressions:
+            print(f"\n❌ {len(regressions)} etapa(s) acima da tolerância de {args.tolerance:.0%}:")
+            for r in regressions:
+                print(f"  - {r['name']}: {r['baseline_p50_ms']:.2f} ms -> {r['p50_ms']:.2f} ms ({r['ratio']:.2f}x)")
+            sys.exit(1)
+        print(f"\n✅ Sem regressões acima de {args.tolerance:.0%}")
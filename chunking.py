@@ -0,0 +1,217 @@
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+
+from dataset_sink import iter_jsonl
+
+# Divisão do dataset extraído em janelas que cabem no contexto dos modelos.
+# Em vez de concatenar tudo em uma única `entrada` (que o modelo trunca em silêncio),
+# os registros são agrupados por tipo (branches, commits, tags) e cortados em janelas
+# com um orçamento de tokens. Cada janela é pontuada em lote e os scores (ou embeddings)
+# são agregados com um pooling configurável.
+
+DEFAULT_TOKEN_BUDGET = 448  # 512 do modelo menos espaço para a hipótese e tokens especiais
+
+RECORD_GROUPS = {
+    "branch_overview": "branches",
+    "commit_sample": "commits",
+    "tag": "tags",
+    "describe": "tags",
+    "history_summary": "history",
+    "clone_info": "clone",
+}
+
+GROUP_HEADERS = {
+    "branches": "branch|last_commit_date|author|subject",
+    "commits": "branch|hash|date|author|subject",
+    "tags": "tag|date|subject",
+    "history": "full history summary",
+    "clone": "clone type",
+}
+
+
+# Estimativa sem tokenizer: hashes, datas e separadores (|, -) viram tokens curtos, então
+# a conta usa ~2 caracteres por token (3 subestimava as janelas de commits)
+APPROX_CHARS_PER_TOKEN = 2
+
+
+def approx_tokens(text: str) -> int:
+    # Estimativa barata e conservadora, sem rodar o tokenizer
+    return max(1, -(-len(text) // APPROX_CHARS_PER_TOKEN))
+
+
+def _local_file(model_name: str, filename: str):
+    # Arquivo do modelo já em disco (pasta local ou cache da Hugging Face), sem ir à rede
+    if Path(model_name).is_dir():
+        path = Path(model_name) / filename
+        return path if path.exists() else None
+    try:
+        from huggingface_hub import try_to_load_from_cache
+    except ImportError:
+        return None
+    path = try_to_load_from_cache(model_name, filename)
+    return Path(path) if isinstance(path, str) else None
+
+
+@lru_cache(maxsize=8)
+def token_counter(model_name: str):
+    """
+    Contador de tokens com o tokenizer do modelo que vai pontuar as janelas.
+    Só usa arquivos já baixados (não vai à rede só para contar tokens). O tokenizer.json
+    é lido com a biblioteca tokenizers, bem mais leve que importar transformers; sem
+    nenhum tokenizer em disco, usa approx_tokens.
+    """
+    fast = _local_file(model_name, "tokenizer.json")
+    try:
+        if fast is not None:
+            from tokenizers import Tokenizer
+            tokenizer = Tokenizer.from_file(str(fast))
+            return lambda text: max(1, len(tokenizer.encode(text, add_special_tokens=False).ids))
+        if _local_file(model_name, "tokenizer_config.json") is not None:
+            from transformers import AutoTokenizer
+            slow = AutoTokenizer.from_pretrained(model_name, local_files_only=True)
+            return lambda text: max(1, len(slow(text, add_special_tokens=False)["input_ids"]))
+    except Exception:
+        pass
+    return approx_tokens
+
+
+def render_record(rec: dict) -> str:
+    kind = rec.get("type")
+    if kind == "branch_overview":
+        last = rec.get("last_commit", {})
+        return f"{rec['branch']}|{last.get('date', '')}|{last.get('author', '')}|{last.get('subject', '')}"
+    if kind == "commit_sample":
+        return f"{rec['branch']}|{rec['hash']}|{rec['date']}|{rec['author']}|{rec['subject']}"
+    if kind == "tag":
+        return f"{rec['tag']}|{rec['date']}|{rec['subject']}"
+    if kind == "describe":
+        return f"describe: {rec['describe']}"
+    if kind == "history_summary":
+        parts = []
+        if "commits" in rec:
+            parts.append(f"{rec['commits']} commits, {rec['merges']} merges ({rec['merge_ratio']:.0%}), "
+                         f"{rec['authors']} authors, {rec['active_days']} active days "
+                         f"({rec['commits_per_active_day']:.1f} commits/day)")
+        if rec.get("incomplete"):
+            parts.append("incomplete (git failed on part of the history)")
+        main = rec.get("main")
+        if main:
+            parts.append(f"{main['branch']}: {main['first_parent_merges']} merge commits, "
+                         f"{main['first_parent_direct']} direct commits")
+        if "lifespan_median_days" in rec:
+            parts.append(f"branch lifespan median {rec['lifespan_median_days']:.1f} days, "
+                         f"p90 {rec['lifespan_p90_days']:.1f} days, {rec['merged_branches']} merged branches")
+        return "; ".join(parts)
+    if kind == "clone_info":
+        parts = [name for name in ("bare", "shallow") if rec.get(name)]
+        if rec.get("partial_filter"):
+            parts.append(f"partial ({rec['partial_filter']})")
+        if rec.get("truncated_branches"):
+            parts.append(f"truncated history: {', '.join(rec['truncated_branches'])}")
+        return "; ".join(parts)
+    return ""
+
+
+def _windows(lines, header: str, token_budget: int, count_tokens):
+    header_cost = count_tokens(header)
+    # Espaço de uma linha numa janela que só tem o cabeçalho (+1 por linha: a quebra
+    # de linha entre elas também pode virar token)
+    room = max(1, token_budget - header_cost)
+    window, used = [header], header_cost
+    for line in lines:
+        cost = count_tokens(line) + 1
+        while cost > room and len(line) > 1:
+            # linha maior que o orçamento: corta na proporção do excesso até caber
+            line = line[:max(1, len(line) * room // cost - 1)]
+            cost = count_tokens(line) + 1
+        if used + cost > token_budget and len(window) > 1:
+            yield "\n".join(window)
+            window, used = [header], header_cost
+        window.append(line)
+        used += cost
+    if len(window) > 1:
+        yield "\n".join(window)
+
+
+def chunk_text(text: str, token_budget: int = DEFAULT_TOKEN_BUDGET, count_tokens=approx_tokens):
+    """Divide um texto livre em janelas de linhas inteiras dentro do orçamento de tokens."""
+    lines = [l for l in (text or "").splitlines() if l.strip()]
+    if not lines:
+        return []
+    if count_tokens(text) <= token_budget:
+        return [text]
+    return [w for w in _windows(lines[1:], lines[0], token_budget, count_tokens)] or [lines[0]]
+
+
+def chunk_records(records, token_budget: int = DEFAULT_TOKEN_BUDGET, count_tokens=approx_tokens):
+    """
+    Agrupa registros do extrator por tipo (branches, commits, tags) e devolve janelas
+    [{"group": ..., "text": ...}], cada uma dentro do orçamento de tokens.
+    """
+    lines = {group: [] for group in GROUP_HEADERS}
+    for rec in records:
+        group = RECORD_GROUPS.get(rec.get("type"))
+        if group is not None:
+            lines[group].append(render_record(rec))
+
+    windows = []
+    for group, header in GROUP_HEADERS.items():
+        for text in _windows(lines[group], f"[{group}] {header}", token_budget, count_tokens):
+            windows.append({"group": group, "text": text})
+    return windows
+
+
+def chunk_dataset(dataset_path, token_budget: int = DEFAULT_TOKEN_BUDGET, count_tokens=approx_tokens):
+    """Janelas a partir de um dataset.jsonl (ver chunk_records)."""
+    return chunk_records(iter_jsonl(dataset_path), token_budget, count_tokens)
+
+
+def _softmax(x: np.ndarray, temperature: float = 1.0) -> np.ndarray:
+    z = np.asarray(x, dtype=np.float64) / max(temperature, 1e-6)
+    z = np.exp(z - z.max())
+    return z / z.sum()
+
+
+def pool(matrix, strategy: str = "mean", weights=None, temperature: float = 1.0) -> np.ndarray:
+    """
+    Agrega uma matriz janelas x colunas (scores por rótulo ou dimensões de embedding):
+    - "mean": média das janelas
+    - "max": máximo de cada coluna
+    - "attention": média ponderada por softmax(weights / temperature); sem `weights`,
+      usa o maior valor de cada janela (janelas mais relevantes pesam mais)
+    """
+    m = np.asarray(matrix, dtype=np.float64)
+    if m.ndim == 1:
+        m = m[None, :]
+    if strategy == "mean":
+        return m.mean(axis=0)
+    if strategy == "max":
+        return m.max(axis=0)
+    if strategy == "attention":
+        w = m.max(axis=1) if weights is None else np.asarray(weights, dtype=np.float64)
+        return _softmax(w, temperature) @ m
+    raise ValueError(f"Pooling desconhecido: {strategy} (use mean, max ou attention)")
+
+
+def window_weights(windows, count_tokens=approx_tokens) -> np.ndarray:
+    """Peso por janela proporcional ao log do número de tokens (para pooling de embeddings)."""
+    texts = [w["text"] if isinstance(w, dict) else w for w in windows]
+    return np.log1p([count_tokens(t) for t in texts])
+
+
+def load_windows(paths, token_budget: int = DEFAULT_TOKEN_BUDGET, count_tokens=approx_tokens):
+    """
+    Janelas a partir do dataset.jsonl, se existir entre `paths`; caso contrário,
+    a partir do texto dos demais arquivos (.txt) encontrados.
+    """
+    paths = [Path(p) for p in paths]
+    for p in paths:
+        if p.name == "dataset.jsonl" and p.exists():
+            return [w["text"] for w in chunk_dataset(p, token_budget, count_tokens)]
+    windows = []
+    for p in paths:
+        if p.exists():
+            windows.extend(chunk_text(p.read_text(encoding="utf-8"), token_budget, count_tokens))
+    return windows
@@ -0,0 +1,73 @@
+import os
+import runpy
+import sys
+from pathlib import Path
+
+# Ponto de entrada único: `python cli.py <comando> [args]`.
+# Nada além da biblioteca padrão é importado aqui; o módulo do comando escolhido só é
+# carregado na hora de executar (e os modelos só quando a primeira inferência acontece),
+# então `--help` e execuções servidas pelos caches não pagam o import de torch/transformers.
+
+ROOT = Path(__file__).resolve().parent
+
+# comando -> (módulo ou script, descrição)
+COMMANDS = {
+    "extract": ("DataSet_extractor", "extrai branches, commits e tags para o dataset.jsonl"),
+    "fleet": ("fleet_extractor", "extração paralela de vários repositórios"),
+    "columnar": ("columnar", "converte/consulta o formato colunar do dataset"),
+    "pre-classify": ("pre_classifier", "pré-classificação estatística de um dataset.jsonl"),
+    "report": ("data_report", "resumo em prosa (formato data_input.md) de um dataset.jsonl"),
+    "classify-corpus": ("corpus_classifier", "classifica muitos repositórios de uma vez"),
+    "serve": ("model_server", "servidor local de modelos"),
+    "onnx": ("onnx_backend", "exporta/verifica modelos ONNX int8"),
+    "benchmark": ("benchmark", "benchmark da extração e dos classificadores"),
+    "zero-shot": ("Zero-Shot/Zero_Shot.py", "classificação zero-shot (NLI) do texto do script"),
+    "text": ("text/text-classification.py", "reranker sobre os arquivos de extração do diretório"),
+    "embedding": ("feature-extraction/extracao-embbeding.py", "similaridade por embeddings do texto do script"),
+}
+
+
+def usage() -> str:
+    linhas = ["uso: python cli.py <comando> [argumentos]", "", "comandos:"]
+    linhas += [f"  {nome:16} {desc}" for nome, (_, desc) in COMMANDS.items()]
+    linhas += ["", "`python cli.py <comando> --help` mostra as opções de cada comando.",
+               "Os scripts (zero-shot, text, embedding) aceitam `-C DIR` para rodar em outro diretório."]
+    return "\n".join(linhas)
+
+
+def run_script(comando: str, path: Path, args) -> int:
+    # Scripts de classificação não têm argumentos próprios: só o diretório de trabalho
+    if args and args[0] in ("-h", "--help"):
+        print(f"uso: python cli.py {comando} [-C DIR]\n\n{COMMANDS[comando][1]}")
+        return 0
+    if len(args) == 2 and args[0] == "-C":
+        os.chdir(args[1])
+    elif args:
+        print(f"argumentos desconhecidos: {' '.join(args)}", file=sys.stderr)
+        return 2
+    sys.argv = [str(path)]
+    runpy.run_path(str(path), run_name="__main__")
+    return 0
+
+
+def main(argv=None) -> int:
+    argv = list(sys.argv[1:] if argv is None else argv)
+    if not argv or argv[0] in ("-h", "--help"):
+        print(usage())
+        return 0
+    comando, args = argv[0], argv[1:]
+    if comando not in COMMANDS:
+        print(f"comando desconhecido: {comando}\n\n{usage()}", file=sys.stderr)
+        return 2
+
+    alvo = COMMANDS[comando][0]
+    if alvo.endswith(".py"):
+        return run_script(comando, ROOT / alvo, args)
+    sys.path.insert(0, str(ROOT))
+    sys.argv = [alvo] + args  # run_module troca argv[0] pelo caminho do módulo
+    runpy.run_module(alvo, run_name="__main__", alter_sys=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
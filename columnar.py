@@ -0,0 +1,306 @@
+import argparse
+import json
+import shutil
+import sys
+from array import array
+from pathlib import Path
+
+import numpy as np
+
+from dataset_sink import dumps_line, iter_jsonl
+
+# Formato colunar do dataset, gravado ao lado do dataset.jsonl (pasta dataset.columns/):
+#   meta.json               -> nº de linhas, tipos das colunas, dicionários e índice
+#   type.bin                -> uint8, código do tipo do registro (TYPES)
+#   repo/ref/author/date.bin-> int32, códigos nos dicionários (-1 = ausente);
+#                              ref = branch (branch_overview, commit_sample) ou tag (tag)
+#   hash/subject.offsets.bin-> int64 (n + 1) e hash/subject.data.bin com os textos em UTF-8
+#                              (history_summary e clone_info guardam o registro inteiro, em
+#                              JSON, em subject)
+#   index.rows.bin          -> int64, linhas ordenadas por (tipo, ref); meta.json guarda o
+#                              intervalo de cada tipo e de cada (tipo, ref) nesse vetor
+# Os arquivos são lidos com memory-map: buscar os commits de uma branch lê só as linhas dela.
+
+TYPES = ["branch_overview", "commit_sample", "tag", "describe", "history_summary", "clone_info"]
+DICT_COLUMNS = {"repo": "<i4", "ref": "<i4", "author": "<i4", "date": "<i4"}
+HEAP_COLUMNS = ["hash", "subject"]
+VERSION = 1
+
+
+def _fields(rec: dict):
+    """(tipo, repo, ref, author, date, hash, subject) de um registro do extrator."""
+    kind = rec.get("type")
+    if kind == "branch_overview":
+        last = rec.get("last_commit", {})
+        return kind, rec.get("repo"), rec["branch"], last.get("author"), last.get("date"), "", last.get("subject", "")
+    if kind == "commit_sample":
+        return kind, rec.get("repo"), rec["branch"], rec.get("author"), rec.get("date"), rec.get("hash", ""), rec.get("subject", "")
+    if kind == "tag":
+        return kind, rec.get("repo"), rec["tag"], None, rec.get("date"), "", rec.get("subject", "")
+    if kind == "describe":
+        return kind, rec.get("repo"), None, None, None, "", rec.get("describe", "")
+    if kind in ("history_summary", "clone_info"):
+        summary = {k: v for k, v in rec.items() if k not in ("type", "repo")}
+        return kind, rec.get("repo"), None, None, None, "", json.dumps(summary, ensure_ascii=False)
+    raise ValueError(f"Tipo de registro desconhecido: {kind}")
+
+
+class ColumnarSink:
+    """
+    Escrita em streaming do formato colunar, com a mesma interface do JsonlSink
+    (write/flush/close/records). Colunas fixas e textos vão direto para os arquivos
+    a cada lote; dicionários e índice são gravados no close().
+    """
+
+    def __init__(self, path, batch_size: int = 1000):
+        self.path = Path(path)
+        shutil.rmtree(self.path, ignore_errors=True)
+        self.path.mkdir(parents=True)
+        self.batch_size = max(1, int(batch_size))
+        self.records = 0
+        self._dicts = {name: {} for name in DICT_COLUMNS}
+        self._files = {name: (self.path / f"{name}.bin").open("wb") for name in ["type", *DICT_COLUMNS]}
+        self._heap_files = {}
+        self._heap_size = {}
+        for name in HEAP_COLUMNS:
+            self._heap_files[name] = ((self.path / f"{name}.offsets.bin").open("wb"),
+                                      (self.path / f"{name}.data.bin").open("wb"))
+            self._heap_size[name] = 0
+            self._heap_files[name][0].write(np.zeros(1, dtype="<i8").tobytes())
+        self._new_buffers()
+        self._closed = False
+
+    def _new_buffers(self):
+        self._buf = {"type": array("B"), **{name: array("i") for name in DICT_COLUMNS}}
+        self._heap_buf = {name: [] for name in HEAP_COLUMNS}
+
+    def _code(self, column: str, value) -> int:
+        if value is None:
+            return -1
+        codes = self._dicts[column]
+        code = codes.get(value)
+        if code is None:
+            code = codes[value] = len(codes)
+        return code
+
+    def write(self, obj: dict):
+        kind, repo, ref, author, date, sha, subject = _fields(obj)
+        self._buf["type"].append(TYPES.index(kind))
+        self._buf["repo"].append(self._code("repo", repo))
+        self._buf["ref"].append(self._code("ref", ref))
+        self._buf["author"].append(self._code("author", author))
+        self._buf["date"].append(self._code("date", date))
+        self._heap_buf["hash"].append(sha.encode("utf-8"))
+        self._heap_buf["subject"].append(subject.encode("utf-8"))
+        self.records += 1
+        if len(self._buf["type"]) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if self._buf["type"]:
+            self._files["type"].write(np.frombuffer(self._buf["type"], dtype=np.uint8).tobytes())
+            for name, dtype in DICT_COLUMNS.items():
+                self._files[name].write(np.asarray(self._buf[name], dtype=dtype).tobytes())
+            for name, values in self._heap_buf.items():
+                offsets_f, data_f = self._heap_files[name]
+                lengths = np.fromiter((len(v) for v in values), dtype="<i8", count=len(values))
+                offsets_f.write((self._heap_size[name] + np.cumsum(lengths)).astype("<i8").tobytes())
+                data_f.write(b"".join(values))
+                self._heap_size[name] += int(lengths.sum())
+            self._new_buffers()
+        for f in self._files.values():
+            f.flush()
+        for offsets_f, data_f in self._heap_files.values():
+            offsets_f.flush()
+            data_f.flush()
+
+    def _build_index(self):
+        n = self.records
+        if n == 0:
+            (self.path / "index.rows.bin").write_bytes(b"")
+            return {}, {}
+        types = np.fromfile(self.path / "type.bin", dtype=np.uint8).astype(np.int64)
+        refs = np.fromfile(self.path / "ref.bin", dtype="<i4").astype(np.int64)
+        order = np.lexsort((refs, types))  # estável: dentro do grupo, ordem do arquivo
+        order.astype("<i8").tofile(self.path / "index.rows.bin")
+
+        keys = types[order] * (len(self._dicts["ref"]) + 1) + refs[order] + 1
+        bounds = np.concatenate([[0], np.flatnonzero(np.diff(keys)) + 1, [n]])
+        ref_names = list(self._dicts["ref"])
+        by_type, by_ref = {}, {}
+        for start, end in zip(bounds[:-1], bounds[1:]):
+            row = order[start]
+            kind = TYPES[types[row]]
+            lo, hi = by_type.get(kind, (int(start), int(end)))
+            by_type[kind] = (min(lo, int(start)), max(hi, int(end)))
+            if refs[row] >= 0:
+                by_ref.setdefault(kind, {})[ref_names[refs[row]]] = (int(start), int(end))
+        return by_type, by_ref
+
+    def close(self):
+        if self._closed:
+            return
+        self.flush()
+        for f in self._files.values():
+            f.close()
+        for offsets_f, data_f in self._heap_files.values():
+            offsets_f.close()
+            data_f.close()
+        by_type, by_ref = self._build_index()
+        meta = {
+            "version": VERSION,
+            "rows": self.records,
+            "types": TYPES,
+            "columns": {"type": "|u1", **DICT_COLUMNS},
+            "heaps": HEAP_COLUMNS,
+            "dictionaries": {name: list(codes) for name, codes in self._dicts.items()},
+            "index": {"type": by_type, "ref": by_ref},
+        }
+        # meta.json por último: a pasta só é considerada válida depois dele
+        (self.path / "meta.json").write_text(json.dumps(meta, ensure_ascii=False), encoding="utf-8")
+        self._closed = True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def write_columnar(records, path, batch_size: int = 10_000) -> int:
+    with ColumnarSink(path, batch_size=batch_size) as sink:
+        for rec in records:
+            sink.write(rec)
+    return sink.records
+
+
+# ===============================================================
+# 🔹 Leitura (memory-map)
+# ===============================================================
+class ColumnarDataset:
+    """
+    Leitor do formato colunar. Só as colunas e linhas pedidas são lidas:
+        ds = ColumnarDataset("git_strategy_output/dataset.columns")
+        for rec in ds.records("commit_sample", branch="main"): ...
+    Os registros devolvidos são iguais aos do dataset.jsonl.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.meta = json.loads((self.path / "meta.json").read_text(encoding="utf-8"))
+        if self.meta.get("version") != VERSION:
+            raise ValueError(f"Versão do formato colunar não suportada: {self.meta.get('version')}")
+        self.rows = int(self.meta["rows"])
+        self.dictionaries = self.meta["dictionaries"]
+        self._maps = {}
+
+    def __len__(self):
+        return self.rows
+
+    def _map(self, filename: str, dtype, count: int):
+        if filename not in self._maps:
+            if count == 0:
+                self._maps[filename] = np.zeros(0, dtype=dtype)
+            else:
+                self._maps[filename] = np.memmap(self.path / filename, dtype=dtype, mode="r", shape=(count,))
+        return self._maps[filename]
+
+    def _column(self, name: str) -> np.ndarray:
+        return self._map(f"{name}.bin", self.meta["columns"][name], self.rows)
+
+    def _text(self, heap: str, i: int) -> str:
+        offsets = self._map(f"{heap}.offsets.bin", "<i8", self.rows + 1)
+        start, end = int(offsets[i]), int(offsets[i + 1])
+        if start == end:
+            return ""
+        data = self._map(f"{heap}.data.bin", np.uint8, int(offsets[-1]))
+        return bytes(data[start:end]).decode("utf-8")
+
+    def _decode(self, name: str, code) -> str:
+        return None if code < 0 else self.dictionaries[name][code]
+
+    # --- seleção ---
+    def refs(self, kind: str = "commit_sample"):
+        """Branches (ou tags, com kind="tag") presentes no índice."""
+        return list(self.meta["index"]["ref"].get(kind, {}))
+
+    def select(self, kind: str = None, branch: str = None) -> np.ndarray:
+        """Números das linhas (em ordem do arquivo) do tipo e/ou branch/tag pedidos."""
+        index = self._map("index.rows.bin", "<i8", self.rows)
+        if kind is not None and kind not in TYPES:
+            raise ValueError(f"Tipo de registro desconhecido: {kind}")
+        kinds = [kind] if kind is not None else TYPES
+        parts = []
+        for k in kinds:
+            if branch is None:
+                bounds = self.meta["index"]["type"].get(k)
+            else:
+                bounds = self.meta["index"]["ref"].get(k, {}).get(branch)
+            if bounds:
+                parts.append(np.asarray(index[bounds[0]:bounds[1]]))
+        if not parts:
+            return np.zeros(0, dtype=np.int64)
+        rows = np.concatenate(parts)
+        # Dentro de um (tipo, ref) a ordem já é a do arquivo; entre grupos, reordena
+        return rows if kind is not None and branch is not None else np.sort(rows)
+
+    def record(self, i: int) -> dict:
+        i = int(i)
+        kind = TYPES[int(self._column("type")[i])]
+        repo = self._decode("repo", int(self._column("repo")[i]))
+        if kind == "describe":
+            return {"type": kind, "repo": repo, "describe": self._text("subject", i)}
+        if kind in ("history_summary", "clone_info"):
+            return {"type": kind, "repo": repo, **json.loads(self._text("subject", i))}
+        ref = self._decode("ref", int(self._column("ref")[i]))
+        date = self._decode("date", int(self._column("date")[i]))
+        subject = self._text("subject", i)
+        if kind == "tag":
+            return {"type": kind, "repo": repo, "tag": ref, "date": date, "subject": subject}
+        author = self._decode("author", int(self._column("author")[i]))
+        if kind == "branch_overview":
+            return {"type": kind, "repo": repo, "branch": ref,
+                    "last_commit": {"date": date, "author": author, "subject": subject}}
+        return {"type": kind, "repo": repo, "branch": ref, "hash": self._text("hash", i),
+                "date": date, "author": author, "subject": subject}
+
+    def records(self, kind: str = None, branch: str = None):
+        """Registros (dicts do dataset.jsonl) filtrados por tipo e/ou branch/tag."""
+        rows = range(self.rows) if kind is None and branch is None else self.select(kind, branch)
+        for i in rows:
+            yield self.record(i)
+
+    def commits(self, branch: str):
+        return list(self.records("commit_sample", branch))
+
+    def tags(self):
+        return list(self.records("tag"))
+
+    def column(self, name: str, rows=None) -> list:
+        """Valores decodificados de uma coluna (repo, ref, author, date, hash ou subject)."""
+        rows = range(self.rows) if rows is None else rows
+        if name in HEAP_COLUMNS:
+            return [self._text(name, int(i)) for i in rows]
+        codes = self._column(name)
+        return [self._decode(name, int(codes[int(i)])) for i in rows]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Formato colunar do dataset (conversão e consulta)")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    p_conv = sub.add_parser("convert", help="converte um dataset.jsonl existente")
+    p_conv.add_argument("dataset", help="caminho do dataset.jsonl")
+    p_conv.add_argument("--output", default=None, help="pasta de saída (padrão: dataset.columns ao lado)")
+    p_show = sub.add_parser("show", help="imprime registros em JSONL")
+    p_show.add_argument("path", help="pasta dataset.columns")
+    p_show.add_argument("--type", choices=TYPES, default=None)
+    p_show.add_argument("--branch", default=None, help="branch (ou tag, com --type tag)")
+    args = parser.parse_args()
+
+    if args.cmd == "convert":
+        out = Path(args.output) if args.output else Path(args.dataset).with_name("dataset.columns")
+        n = write_columnar(iter_jsonl(args.dataset), out)
+        print(f"{n} registros -> {out.resolve()}")
+    else:
+        for rec in ColumnarDataset(args.path).records(args.type, args.branch):
+            sys.stdout.buffer.write(dumps_line(rec))
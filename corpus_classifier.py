@@ -0,0 +1,326 @@
+import argparse
+import csv
+import time
+from pathlib import Path
+
+import numpy as np
+
+from chunking import DEFAULT_TOKEN_BUDGET, approx_tokens, chunk_records, chunk_text, pool, token_counter, window_weights
+from data_report import render_report
+from dataset_sink import iter_jsonl, loads_line
+from embedding_cache import EmbeddingCache
+from model_server import EMBEDDING_MODEL, RERANKER_MODEL, ModelClient
+from pre_classifier import DEFAULT_THRESHOLD, pre_classify
+from result_cache import open_cache, result_key, texts_hash
+from strategies import TAXONOMIES
+
+# Classificação em lote de muitos repositórios de uma vez.
+# Entrada: uma pasta com as saídas do extrator (ex.: fleet_output/, um dataset.jsonl
+# por repositório) ou um único JSONL com registros de vários repositórios (campo "repo").
+# Os repositórios são lidos um a um e as janelas dos que precisam de modelo são
+# acumuladas até `max_windows` e codificadas em lotes; a matriz repositórios x
+# estratégias é calculada com NumPy e gravada em CSV (ou Parquet).
+# Antes dos modelos, o pré-classificador estatístico (pre_classifier.py) decide os
+# casos óbvios; só os repositórios ambíguos passam pelos modelos. Repositórios cujas
+# janelas não mudaram desde a última execução vêm do cache de resultados (result_cache.py).
+
+
+# ===============================================================
+# 🔹 Leitura dos repositórios
+# ===============================================================
+def _repo_runs(path):
+    """
+    Trechos contíguos de linhas de cada repositório num JSONL com vários repositórios:
+    {repo: [(início, fim), ...]} em bytes, na ordem em que os repositórios aparecem.
+    Só os limites ficam em memória, não os registros.
+    """
+    runs = {}
+    atual, inicio, pos = None, 0, 0
+    with Path(path).open("rb") as f:
+        for line in f:
+            if line.strip():
+                repo = loads_line(line).get("repo", "")
+                if repo != atual:
+                    if atual is not None:
+                        runs[atual].append((inicio, pos))
+                    runs.setdefault(repo, [])
+                    atual, inicio = repo, pos
+            pos += len(line)
+    if atual is not None:
+        runs[atual].append((inicio, pos))
+    return runs
+
+
+def load_records(source):
+    """
+    Gera (repo_id, [registros]) a partir de uma pasta de saídas ou de um JSONL único,
+    um repositório por vez: só os registros do repositório atual ficam em memória.
+    """
+    source = Path(source)
+    if source.is_dir():
+        for dataset in sorted(source.rglob("dataset.jsonl")):
+            records = list(iter_jsonl(dataset))
+            repo_id = next((r["repo"] for r in records if r.get("repo")), dataset.parent.name)
+            yield repo_id, records
+        return
+
+    with source.open("rb") as f:
+        for repo_id, trechos in _repo_runs(source).items():
+            records = []
+            for inicio, fim in trechos:
+                f.seek(inicio)
+                records.extend(loads_line(line) for line in f.read(fim - inicio).splitlines() if line.strip())
+            yield repo_id, records
+
+
+def repo_windows(records, token_budget: int = DEFAULT_TOKEN_BUDGET, input_mode: str = "windows",
+                 count_tokens=approx_tokens):
+    """
+    Janelas de texto de um repositório: os registros agrupados por tipo ("windows") ou
+    o resumo em prosa gerado pelo data_report.py ("report"), bem menor.
+    """
+    windows = [w["text"] for w in chunk_records(records, token_budget, count_tokens)]
+    if input_mode == "report" and windows:
+        return chunk_text(render_report(records), token_budget, count_tokens)
+    return windows
+
+
+def load_corpus(source, token_budget: int = DEFAULT_TOKEN_BUDGET, input_mode: str = "windows",
+                count_tokens=approx_tokens):
+    """Devolve [(repo_id, [janelas])] a partir de uma pasta de saídas ou de um JSONL único."""
+    return [(repo_id, repo_windows(records, token_budget, input_mode, count_tokens))
+            for repo_id, records in load_records(source)]
+
+
+def _labels():
+    return [(tax, nome, desc) for tax, descricoes in TAXONOMIES.items() for nome, desc in descricoes.items()]
+
+
+def _normalize(m: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(m, axis=1, keepdims=True)
+    return m / np.where(norms == 0, 1.0, norms)
+
+
+# ===============================================================
+# 🔹 Motores de pontuação (repositórios x estratégias)
+# ===============================================================
+def score_embedding(corpus, client: ModelClient, model: str = EMBEDDING_MODEL,
+                    batch_size: int = 32, pooling: str = "mean") -> np.ndarray:
+    labels = _labels()
+    cache = EmbeddingCache(model)
+    emb_labels = cache.get_many(
+        [d for _, _, d in labels],
+        lambda faltantes: client.embed(faltantes, model=model, batch_size=batch_size),
+    )
+
+    # Todas as janelas de todos os repositórios em lotes sequenciais
+    janelas = [j for _, js in corpus for j in js]
+    emb = []
+    for inicio in range(0, len(janelas), batch_size * 8):
+        emb.extend(client.embed(janelas[inicio:inicio + batch_size * 8], model=model, batch_size=batch_size))
+    emb = np.asarray(emb, dtype=np.float32)
+
+    repos, inicio = [], 0
+    for _, js in corpus:
+        fim = inicio + len(js)
+        if fim == inicio:
+            repos.append(np.zeros(emb_labels.shape[1], dtype=np.float32))
+        else:
+            repos.append(pool(emb[inicio:fim], pooling, weights=window_weights(js)))
+        inicio = fim
+
+    return _normalize(np.asarray(repos, dtype=np.float32)) @ _normalize(np.asarray(emb_labels)).T
+
+
+def score_reranker(corpus, client: ModelClient, model: str = RERANKER_MODEL,
+                   batch_size: int = 16, pooling: str = "attention") -> np.ndarray:
+    labels = _labels()
+    hipoteses = [d for _, _, d in labels]
+    # Janelas em requisições limitadas (como em score_embedding), não todas de uma vez
+    janelas = [j for _, js in corpus for j in js]
+    pares = []
+    for inicio in range(0, len(janelas), batch_size * 8):
+        pares.extend(client.rerank_documents(janelas[inicio:inicio + batch_size * 8], hipoteses,
+                                             model=model, batch_size=batch_size))
+    matriz = np.asarray(pares, dtype=np.float32).reshape(len(janelas), len(labels))
+
+    scores, inicio = [], 0
+    for _, js in corpus:
+        fim = inicio + len(js)
+        linha = np.full(len(labels), np.nan, dtype=np.float32)
+        if fim > inicio:
+            for tax in TAXONOMIES:
+                cols = [i for i, (t, _, _) in enumerate(labels) if t == tax]
+                linha[cols] = pool(matriz[inicio:fim][:, cols], pooling)
+        scores.append(linha)
+        inicio = fim
+    return np.asarray(scores)
+
+
+ENGINES = {
+    "embedding": score_embedding,
+    "reranker": score_reranker,
+}
+
+ENGINE_MODELS = {
+    "embedding": EMBEDDING_MODEL,
+    "reranker": RERANKER_MODEL,
+}
+
+
+# ===============================================================
+# 🔹 Saída
+# ===============================================================
+def build_row(repo_id, janelas, linha: np.ndarray, source: dict = None) -> dict:
+    labels = _labels()
+    row = {"repo": repo_id, "windows": len(janelas)}
+    for tax in TAXONOMIES:
+        cols = [i for i, (t, _, _) in enumerate(labels) if t == tax]
+        pontuado = len(janelas) or (source is not None and source.get(tax) == "stats")
+        best = cols[int(np.nanargmax(linha[cols]))] if pontuado and not np.all(np.isnan(linha[cols])) else None
+        row[f"{tax}_best"] = labels[best][1] if best is not None else ""
+        if source is not None:
+            row[f"{tax}_source"] = source.get(tax, "")
+    for (tax, nome, _), valor in zip(labels, linha):
+        row[f"{tax}:{nome}"] = float(valor)
+    return row
+
+
+def build_rows(corpus, scores: np.ndarray, sources=None):
+    return [build_row(repo_id, janelas, linha, sources[k] if sources is not None else None)
+            for k, ((repo_id, janelas), linha) in enumerate(zip(corpus, scores))]
+
+
+def write_rows(rows, output):
+    output = Path(output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    if output.suffix == ".parquet":
+        import pandas as pd  # opcional, só para Parquet (requer pyarrow)
+        pd.DataFrame(rows).to_parquet(output, index=False)
+        return
+    with output.open("w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0].keys()) if rows else ["repo"])
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def classify_corpus(source, output="corpus_scores.csv", engine: str = "embedding",
+                    batch_size: int = 32, pooling: str = None, token_budget: int = DEFAULT_TOKEN_BUDGET,
+                    client: ModelClient = None, pre_threshold: float = DEFAULT_THRESHOLD,
+                    use_cache: bool = True, input_mode: str = "windows", max_windows: int = 4096):
+    """
+    Classifica todos os repositórios de `source`. Com `pre_threshold`, as taxonomias
+    decididas pelo pré-classificador estatístico usam as probabilidades dele; só os
+    repositórios com alguma taxonomia ambígua vão para o motor (`pre_threshold=None` desativa).
+    Com `use_cache`, scores de repositórios com as mesmas janelas, descrições e modelo
+    saem do cache de resultados em vez do motor. `input_mode="report"` classifica o
+    resumo gerado pelo data_report.py em vez das janelas com todos os registros.
+    Os repositórios são lidos um a um; os que precisam do motor são acumulados até
+    `max_windows` janelas e pontuados juntos, então a memória não cresce com o corpus.
+    """
+    labels = _labels()
+    results = open_cache() if use_cache else None
+    # Janelas medidas com o tokenizer do modelo do motor (estimativa conservadora se não houver)
+    count_tokens = token_counter(ENGINE_MODELS[engine])
+    rows = []
+    lote = []  # (posição em rows, repo_id, janelas, scores, sources, chaves)
+    acumuladas = 0
+
+    def pontuar():
+        nonlocal client
+        if not lote:
+            return
+        client = client or ModelClient()
+        kwargs = {"batch_size": batch_size}
+        if pooling:
+            kwargs["pooling"] = pooling
+        modelo = ENGINES[engine]([(repo_id, janelas) for _, repo_id, janelas, *_ in lote], client, **kwargs)
+        for linha, (k, repo_id, janelas, scores, sources, chaves) in zip(modelo, lote):
+            for j, (tax, _, _) in enumerate(labels):
+                if sources[tax] != "stats":
+                    scores[j] = linha[j]
+            if results is not None:
+                for tax, chave in chaves.items():
+                    valores = {nome: float(linha[j]) for j, (t, nome, _) in enumerate(labels) if t == tax}
+                    results.put(chave, valores, ENGINE_MODELS[engine])
+            rows[k] = build_row(repo_id, janelas, scores, sources)
+        lote.clear()
+
+    for repo_id, records in load_records(source):
+        janelas = repo_windows(records, token_budget, input_mode, count_tokens)
+        scores = np.full(len(labels), np.nan, dtype=np.float32)
+        sources = {tax: engine for tax in TAXONOMIES}
+
+        if pre_threshold is not None:
+            pre = pre_classify(records, pre_threshold)
+            for tax in TAXONOMIES:
+                if pre[tax]["decided"]:
+                    cols = [j for j, (t, _, _) in enumerate(labels) if t == tax]
+                    scores[cols] = [pre[tax]["scores"].get(labels[j][1], 0.0) for j in cols]
+                    sources[tax] = "stats"
+        del records
+        pendente = any(src != "stats" for src in sources.values())
+
+        chaves = {}
+        if pendente and results is not None:
+            entrada = texts_hash(janelas) if janelas else None
+            faltou = False
+            for tax in TAXONOMIES:
+                if sources[tax] == "stats":
+                    continue
+                if entrada is None:
+                    faltou = True
+                    continue
+                chaves[tax] = result_key(ENGINE_MODELS[engine], TAXONOMIES[tax], entrada, engine=engine, pooling=pooling)
+                cached = results.get(chaves[tax])
+                if cached is None:
+                    faltou = True
+                    continue
+                for j, (t, nome, _) in enumerate(labels):
+                    if t == tax:
+                        scores[j] = cached[nome]
+            pendente = faltou
+
+        if not pendente:
+            rows.append(build_row(repo_id, janelas, scores, sources))
+            continue
+        rows.append(None)
+        lote.append((len(rows) - 1, repo_id, janelas, scores, sources, chaves))
+        acumuladas += len(janelas)
+        if acumuladas >= max_windows:
+            pontuar()
+            acumuladas = 0
+    pontuar()
+
+    write_rows(rows, output)
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Classifica estratégias de branching/release de muitos repositórios")
+    parser.add_argument("source", help="pasta com saídas do extrator ou JSONL com registros de vários repositórios")
+    parser.add_argument("--output", default="corpus_scores.csv", help="arquivo de saída (.csv ou .parquet)")
+    parser.add_argument("--engine", choices=sorted(ENGINES), default="embedding")
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--pooling", choices=["mean", "max", "attention"], default=None)
+    parser.add_argument("--token-budget", type=int, default=DEFAULT_TOKEN_BUDGET, help="tokens por janela")
+    parser.add_argument("--max-windows", type=int, default=4096,
+                        help="janelas acumuladas antes de chamar o motor (limita a memória)")
+    parser.add_argument("--pre-threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="confiança mínima do pré-classificador estatístico para pular os modelos")
+    parser.add_argument("--no-pre", action="store_true", help="sempre usa os modelos")
+    parser.add_argument("--no-cache", action="store_true", help="ignora o cache de resultados")
+    parser.add_argument("--input", choices=["windows", "report"], default="windows",
+                        help="texto classificado: registros em janelas ou o resumo do data_report.py")
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    rows = classify_corpus(args.source, args.output, args.engine, args.batch_size,
+                           args.pooling, args.token_budget,
+                           pre_threshold=None if args.no_pre else args.pre_threshold,
+                           use_cache=not args.no_cache, input_mode=args.input,
+                           max_windows=args.max_windows)
+    dt = time.perf_counter() - t0
+    atalhos = sum(1 for r in rows if all(r.get(f"{tax}_source") == "stats" for tax in TAXONOMIES))
+    print(f"{len(rows)} repositórios classificados em {dt:.1f}s "
+          f"({len(rows) / max(dt, 1e-9) * 3600:.0f} repos/hora; {atalhos} sem modelo) -> {Path(args.output).resolve()}")
@@ -0,0 +1,191 @@
+import argparse
+import re
+from collections import Counter
+from datetime import datetime, timedelta
+from pathlib import Path
+from string import Template
+
+from dataset_sink import iter_jsonl
+from pre_classifier import (DEVELOP_BRANCHES, ENV_BRANCHES, MERGE_RE, RELEASE_PREFIXES, SEMVER_RE,
+                            extract_features)
+
+# Gera o resumo em prosa (no formato do data_input.md) a partir do dataset.jsonl do
+# extrator, preenchendo data_input.template.md. O texto é curto (algumas centenas de
+# tokens), cabe no contexto dos modelos e substitui o texto escrito à mão, permitindo
+# classificar cada repositório sem intervenção.
+
+DEFAULT_TEMPLATE = Path(__file__).resolve().parent / "data_input.template.md"
+ACTIVE_DAYS = 90      # branch "ativa": último commit até N dias antes do commit mais recente
+WINDOW_DAYS = 30      # janela para contar merges/PRs na branch principal
+TOP_PATTERNS = 5
+ISSUE_RE = re.compile(r"^\d+-")
+
+
+def _date(value):
+    try:
+        return datetime.strptime((value or "")[:10], "%Y-%m-%d")
+    except ValueError:
+        return None
+
+
+def _strip_remote(name: str) -> str:
+    return name[len("origin/"):] if name.startswith("origin/") else name
+
+
+def _pattern(name: str):
+    # Padrão de nomenclatura: prefixo com barra (feat/...) ou número da issue (123-...)
+    if "/" in name:
+        return name.split("/", 1)[0] + "/..."
+    if ISSUE_RE.match(name):
+        return "<issue>-..."
+    return None
+
+
+def _fmt_date(d) -> str:
+    return d.strftime("%d/%m/%Y") if d else "?"
+
+
+def _pct(part: int, total: int) -> str:
+    return f"{part / total:.0%}" if total else "0%"
+
+
+def report_fields(records) -> dict:
+    """Valores do template calculados a partir dos registros do dataset.jsonl."""
+    records = list(records)
+    features = extract_features(records)
+    repo = next((r["repo"] for r in records if r.get("repo")), "desconhecido")
+
+    # --- branches (locais e remotas com o mesmo nome contam uma vez) ---
+    last_date = {}
+    for rec in records:
+        if rec.get("type") == "branch_overview":
+            name = _strip_remote(rec.get("branch", ""))
+            if name in ("HEAD", "origin"):  # origin/HEAD aparece como "origin"
+                continue
+            d = _date(rec.get("last_commit", {}).get("date"))
+            if name not in last_date or (d and (last_date[name] is None or d > last_date[name])):
+                last_date[name] = d
+    datas = [d for d in last_date.values() if d]
+    recente = max(datas) if datas else None
+    ativas = sum(1 for d in datas if d >= recente - timedelta(days=ACTIVE_DAYS)) if recente else 0
+
+    prefixos = Counter(p for p in map(_pattern, last_date) if p)
+    if prefixos:
+        top = ", ".join(f"{p} ({n})" for p, n in prefixos.most_common(TOP_PATTERNS))
+        padroes = f"{_pct(sum(prefixos.values()), len(last_date))} seguem padrões de nomenclatura: {top}."
+    else:
+        padroes = "As branches não seguem padrões de nomenclatura (ex.: feat/..., 123-...)."
+
+    main = next((b for b in ("main", "master", "trunk") if b in last_date), None)
+    develop = [b for b in last_date if b in DEVELOP_BRANCHES]
+    develop_txt = (f"Existe uma branch intermediária fixa ({', '.join(sorted(develop))})." if develop
+                   else 'Não foi identificada uma branch intermediária fixa chamada "develop".')
+    fixas = sorted(b for b in last_date
+                   if b.startswith(RELEASE_PREFIXES) or b in ENV_BRANCHES)
+    fixas_txt = (f"{len(fixas)} de release/hotfix ou de ambiente ({', '.join(fixas[:5])}"
+                 f"{', ...' if len(fixas) > 5 else ''})." if fixas else "nenhuma branch de release, hotfix ou de ambiente.")
+
+    # --- integração na branch principal ---
+    amostra = [r for r in records if r.get("type") == "commit_sample" and r.get("branch") == main]
+    history = next((r for r in records if r.get("type") == "history_summary"), None)
+    if history and history.get("main"):
+        m = history["main"]
+        total = m["first_parent_merges"] + m["first_parent_direct"]
+        integracao = (f"em todo o histórico da {m['branch']}, {m['first_parent_merges']} commits entraram via merge "
+                      f"e {m['first_parent_direct']} foram diretos ({_pct(m['first_parent_merges'], total)} via merge).")
+    elif amostra:
+        datas_main = [d for d in (_date(r.get("date")) for r in amostra) if d]
+        fim = max(datas_main) if datas_main else None
+        janela = [r for r in amostra if fim and (_date(r.get("date")) or fim) >= fim - timedelta(days=WINDOW_DAYS)]
+        merges = [r for r in janela if MERGE_RE.search(r.get("subject", ""))]
+        diretos = {r.get("author") for r in janela if not MERGE_RE.search(r.get("subject", ""))}
+        integracao = (f"nos últimos {len(janela)} commits amostrados da {main} ({WINDOW_DAYS} dias até "
+                      f"{_fmt_date(fim)}), {len(merges)} são merges/PRs e {len(janela) - len(merges)} são diretos, "
+                      f"de {len(diretos)} autores.")
+    else:
+        integracao = "sem commits amostrados da branch principal."
+
+    historico, duracao = "", ""
+    if history and "commits" in history:
+        historico = (f"• Histórico completo: {history['commits']} commits de {history['authors']} autores "
+                     f"({history['merges']} merges), {history['commits_per_active_day']:.1f} commits por dia ativo.\n")
+    if history and history.get("open_branches"):
+        duracao = (f"• Duração das branches abertas: mediana de {history['lifespan_median_days']:.0f} dias "
+                   f"(p90 {history['lifespan_p90_days']:.0f}); {history['merged_branches']} já integradas à main.\n")
+
+    # --- releases ---
+    tags = sorted(((_date(r.get("date")), r.get("tag", "")) for r in records if r.get("type") == "tag"),
+                  key=lambda t: (t[0] is None, t[0]))
+    nomes = [t for _, t in tags]
+    n_semver = sum(1 for t in nomes if SEMVER_RE.match(t))
+    if not nomes:
+        versionamento = "o projeto não possui tags de release."
+    elif n_semver:
+        versionamento = (f"{_pct(n_semver, len(nomes))} das tags seguem o formato de Versionamento Semântico "
+                         f"(ex.: {', '.join(nomes[-3:])}).")
+    else:
+        versionamento = f"as tags não seguem o Versionamento Semântico (ex.: {', '.join(nomes[-3:])})."
+    datas_tags = [d for d, _ in tags if d]
+    periodo_tags = f", de {_fmt_date(datas_tags[0])} a {_fmt_date(datas_tags[-1])}" if datas_tags else ""
+    cv = features["tag_interval_cv"]
+    if cv is None:
+        cadencia = "indefinida (poucas tags ou datas iguais)."
+    else:
+        regular = "regular" if cv < 0.5 else "irregular"
+        cadencia = (f"{regular}, em média uma release a cada {features['tag_interval_mean_days']:.0f} dias "
+                    f"(coeficiente de variação {cv:.2f}).")
+
+    clone = next((r for r in records if r.get("type") == "clone_info"), None)
+    clone_txt = ""
+    if clone and clone.get("shallow"):
+        cortadas = clone.get("truncated_branches", [])
+        clone_txt = ("• Atenção: clone raso (--depth); o histórico anterior ao corte não está disponível"
+                     + (f" e a amostra de {len(cortadas)} branches foi truncada.\n" if cortadas else ".\n"))
+
+    describe = next((r["describe"] for r in records if r.get("type") == "describe"), "") or "indisponível"
+    periodo = (f"{_fmt_date(min(datas))} a {_fmt_date(recente)}" if datas else "indisponível")
+    return {
+        "repo": repo,
+        "periodo": periodo,
+        "historico": historico,
+        "clone": clone_txt,
+        "n_branches": len(last_date),
+        "n_ativas": ativas,
+        "dias_ativas": ACTIVE_DAYS,
+        "padroes": padroes,
+        "main": main or "não identificada",
+        "develop": develop_txt,
+        "fixas": fixas_txt,
+        "integracao": integracao,
+        "duracao": duracao,
+        "versionamento": versionamento,
+        "n_tags": len(nomes),
+        "periodo_tags": periodo_tags,
+        "cadencia": cadencia,
+        "describe": describe,
+    }
+
+
+def render_report(records, template=DEFAULT_TEMPLATE) -> str:
+    """Resumo em prosa de um repositório, no formato do data_input.md."""
+    text = Path(template).read_text(encoding="utf-8")
+    return Template(text).safe_substitute(report_fields(records))
+
+
+def report_from_dataset(dataset_path, template=DEFAULT_TEMPLATE) -> str:
+    return render_report(iter_jsonl(dataset_path), template)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Gera o resumo (formato data_input.md) a partir do dataset.jsonl")
+    parser.add_argument("dataset", help="caminho do dataset.jsonl")
+    parser.add_argument("--template", default=str(DEFAULT_TEMPLATE))
+    parser.add_argument("--output", default=None, help="arquivo de saída (padrão: imprime na tela)")
+    args = parser.parse_args()
+
+    texto = report_from_dataset(args.dataset, args.template)
+    if args.output:
+        Path(args.output).write_text(texto, encoding="utf-8")
+        print(f"Resumo salvo em {Path(args.output).resolve()}")
+    else:
+        print(texto)
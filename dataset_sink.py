@@ -0,0 +1,135 @@
+import json
+from pathlib import Path
+
+import instrumentation
+
+# orjson é opcional: se estiver instalado, a serialização fica bem mais rápida
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def dumps_line(obj: dict) -> bytes:
+    """Serializa um registro como uma linha JSONL (UTF-8, sem escapar acentos)."""
+    if orjson is not None:
+        return orjson.dumps(obj) + b"\n"
+    return (json.dumps(obj, ensure_ascii=False) + "\n").encode("utf-8")
+
+
+def loads_line(line):
+    if orjson is not None:
+        return orjson.loads(line)
+    return json.loads(line)
+
+
+def iter_jsonl(path, contains: str = None):
+    """
+    Lê um JSONL registro a registro. Com `contains`, só interpreta as linhas que
+    contêm o trecho (ex.: '"commit_sample"'), evitando parsear o arquivo todo.
+    """
+    with Path(path).open("r", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            if contains is not None and contains not in line:
+                continue
+            yield loads_line(line)
+
+
+class JsonlSink:
+    """
+    Escrita em streaming do dataset.jsonl:
+    - um único handle aberto durante toda a extração
+    - registros acumulados em lotes de `batch_size` e gravados de uma vez
+    A memória usada fica limitada ao tamanho do lote, seja qual for o tamanho do repositório.
+    """
+
+    def __init__(self, path, batch_size: int = 1000, append: bool = False):
+        self.path = Path(path)
+        self.batch_size = max(1, int(batch_size))
+        self._f = self.path.open("ab" if append else "wb")
+        self._buf = []
+        self.records = 0
+
+    def write(self, obj: dict):
+        self._buf.append(dumps_line(obj))
+        self.records += 1
+        if len(self._buf) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if self._buf:
+            with instrumentation.span("jsonl.flush"):
+                data = b"".join(self._buf)
+                self._f.write(data)
+            instrumentation.count("jsonl_records_written_total", len(self._buf))
+            instrumentation.count("jsonl_bytes_written_total", len(data))
+            self._buf.clear()
+        self._f.flush()
+
+    def close(self):
+        if self._f.closed:
+            return
+        self.flush()
+        self._f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class TeeSink:
+    """Repassa cada registro para vários sinks (ex.: dataset.jsonl + formato colunar)."""
+
+    def __init__(self, *sinks):
+        self.sinks = sinks
+
+    @property
+    def records(self) -> int:
+        return self.sinks[0].records
+
+    def write(self, obj: dict):
+        for s in self.sinks:
+            s.write(obj)
+
+    def flush(self):
+        for s in self.sinks:
+            s.flush()
+
+    def close(self):
+        for s in self.sinks:
+            s.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class TextSink:
+    """Arquivo .txt de conferência humana escrito linha a linha (mesmo formato de save_txt)."""
+
+    def __init__(self, path):
+        self._f = Path(path).open("w", encoding="utf-8")
+        self.lines = 0
+
+    def write_line(self, line: str):
+        self._f.write(line + "\n")
+        self.lines += 1
+
+    def close(self):
+        if self._f.closed:
+            return
+        if not self.lines:
+            self._f.write("\n")
+        self._f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
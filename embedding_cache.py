@@ -0,0 +1,211 @@
+import hashlib
+import json
+import os
+from contextlib import contextmanager
+from pathlib import Path
+
+import numpy as np
+
+import instrumentation
+
+# fcntl só existe em sistemas POSIX: sem ele (Windows) não há trava entre processos
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# Cache de embeddings em disco, endereçado por conteúdo e dividido em segmentos imutáveis:
+#   <cache_dir>/<modelo>/seg-<geração>.npy   -> matriz (n_textos x dim), lida com memory-map
+#   <cache_dir>/<modelo>/seg-<geração>.keys  -> sha256 de cada linha do segmento (JSON)
+#   <cache_dir>/<modelo>/manifest.json       -> {"generation": n, "segments": [...]}
+# Cada lote de textos novos vira um segmento novo, e o manifesto (pequeno) é o único arquivo
+# substituído: a troca dele publica o segmento de forma atômica, e quem leu o manifesto
+# anterior continua vendo um conjunto consistente. Segmentos vizinhos de tamanho parecido
+# são fundidos (como um contador binário), então cada linha é regravada O(log n) vezes e
+# o número de segmentos fica pequeno. Escritores concorrentes são serializados por uma
+# trava de arquivo. Textos já vistos (ex.: descrições fixas das estratégias) não são
+# reenviados ao modelo.
+
+DEFAULT_CACHE_DIR = Path(os.environ.get(
+    "EMBEDDING_CACHE_DIR", Path.home() / ".cache" / "git-strategy" / "embeddings"
+))
+
+
+def text_key(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    def __init__(self, model_name: str, cache_dir=DEFAULT_CACHE_DIR):
+        self.model_name = model_name
+        self.dir = Path(cache_dir) / model_name.replace("/", "__")
+        self.dir.mkdir(parents=True, exist_ok=True)
+        self.manifest_path = self.dir / "manifest.json"
+        self.lock_path = self.dir / "lock"
+        self._generation = None
+        self._segments = []   # [(nome, n_linhas)]
+        self._vectors = {}    # nome do segmento -> matriz (memory-map)
+        self._keys = {}       # nome do segmento -> chaves das linhas
+        self._index = {}      # sha256 do texto -> (nome do segmento, linha)
+        self._migrate_legacy()
+
+    @contextmanager
+    def _locked(self):
+        with open(self.lock_path, "a") as f:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _read_manifest(self) -> dict:
+        try:
+            return json.loads(self.manifest_path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return {"generation": 0, "segments": []}
+
+    def _read_keys(self, name: str) -> list:
+        if name not in self._keys:
+            self._keys[name] = json.loads((self.dir / f"{name}.keys").read_text(encoding="utf-8"))
+        return self._keys[name]
+
+    def _load(self):
+        """
+        (Re)lê o manifesto. Só os segmentos novos são abertos e só as chaves dos
+        segmentos que entraram ou saíram atualizam o índice.
+        """
+        for _ in range(3):
+            manifest = self._read_manifest()
+            if manifest["generation"] == self._generation:
+                return
+            names = manifest["segments"]
+            try:
+                added = {n: (np.load(self.dir / f"{n}.npy", mmap_mode="r"), self._read_keys(n))
+                         for n in names if n not in self._vectors}
+            except FileNotFoundError:
+                # Um escritor fundiu e apagou segmentos depois da leitura do manifesto
+                continue
+            for name in set(self._vectors) - set(names):
+                for k in self._keys.pop(name, ()):
+                    if self._index.get(k, (None,))[0] == name:
+                        del self._index[k]
+                del self._vectors[name]
+            for name, (vectors, keys) in added.items():
+                self._vectors[name] = vectors
+                for row, k in enumerate(keys):
+                    self._index[k] = (name, row)
+            self._generation = manifest["generation"]
+            self._segments = [(n, len(self._keys[n])) for n in names]
+            return
+        raise RuntimeError(f"cache de embeddings em {self.dir} mudou durante a leitura")
+
+    def _migrate_legacy(self):
+        # Formato antigo (vectors.npy + index.json reescritos a cada lote) vira o primeiro segmento
+        legacy_index, legacy_vectors = self.dir / "index.json", self.dir / "vectors.npy"
+        if self.manifest_path.exists() or not legacy_index.exists():
+            return
+        with self._locked():
+            if self.manifest_path.exists() or not legacy_index.exists():
+                return
+            if legacy_vectors.exists():
+                index = json.loads(legacy_index.read_text(encoding="utf-8"))
+                keys = sorted(index, key=index.get)
+                self._write_segment("seg-00000001", keys, np.load(legacy_vectors))
+                self._publish(1, [("seg-00000001", len(keys))])
+                legacy_vectors.unlink()
+            legacy_index.unlink()
+
+    def _write_segment(self, name: str, keys, vectors: np.ndarray):
+        # Segmento gravado com nomes temporários e renomeado: nunca é visto pela metade
+        tmp = self.dir / f"{name}.tmp.npy"
+        np.save(tmp, vectors)
+        os.replace(tmp, self.dir / f"{name}.npy")
+        tmp = self.dir / f"{name}.keys.tmp"
+        tmp.write_text(json.dumps(list(keys)), encoding="utf-8")
+        os.replace(tmp, self.dir / f"{name}.keys")
+
+    def _publish(self, generation: int, segments):
+        tmp = self.dir / "manifest.tmp.json"
+        tmp.write_text(json.dumps({"generation": generation, "segments": [n for n, _ in segments]}),
+                       encoding="utf-8")
+        os.replace(tmp, self.manifest_path)
+
+    def _append(self, keys, vectors: np.ndarray):
+        with self._locked():
+            # Outro processo pode ter publicado segmentos desde a última leitura
+            self._load()
+            fresh = [i for i, k in enumerate(keys) if k not in self._index]
+            if not fresh:
+                return
+            generation = self._generation + 1
+            segments = list(self._segments) + [(f"seg-{generation:08d}", len(fresh))]
+            self._keys[segments[-1][0]] = [keys[i] for i in fresh]
+            self._write_segment(segments[-1][0], self._keys[segments[-1][0]], vectors[fresh])
+
+            merged = []
+            while len(segments) > 1 and segments[-1][1] >= segments[-2][1]:
+                (a, na), (b, nb) = segments[-2:]
+                generation += 1
+                name = f"seg-{generation:08d}"
+                keys_ab = self._read_keys(a) + self._read_keys(b)
+                self._write_segment(name, keys_ab, np.concatenate([
+                    np.load(self.dir / f"{a}.npy", mmap_mode="r"),
+                    np.load(self.dir / f"{b}.npy", mmap_mode="r"),
+                ]))
+                self._keys[name] = keys_ab
+                segments[-2:] = [(name, na + nb)]
+                merged += [a, b]
+
+            self._publish(generation, segments)
+            # Quem já abriu os segmentos fundidos continua lendo pelo memory-map
+            for name in merged:
+                for suffix in (".npy", ".keys"):
+                    (self.dir / f"{name}{suffix}").unlink(missing_ok=True)
+                if name not in self._vectors:
+                    # Segmento intermediário (criado e fundido nesta mesma chamada)
+                    self._keys.pop(name, None)
+            self._load()
+
+    def get_many(self, texts, encode) -> np.ndarray:
+        """
+        Devolve a matriz de embeddings de `texts` (na mesma ordem).
+        Só os textos ausentes do cache são passados, em um único lote, para `encode(lista)`.
+        """
+        self._load()
+        texts = list(texts)
+        keys = [text_key(t) for t in texts]
+
+        missing, seen = [], set()
+        for k, t in zip(keys, texts):
+            if k not in self._index and k not in seen:
+                seen.add(k)
+                missing.append((k, t))
+        instrumentation.count("embedding_cache_hits_total", len(keys) - len(missing))
+        instrumentation.count("embedding_cache_misses_total", len(missing))
+        if missing:
+            new = np.asarray(encode([t for _, t in missing]), dtype=np.float32)
+            self._append([k for k, _ in missing], new)
+
+        if not keys:
+            return np.zeros((0, 0), dtype=np.float32)
+        locs = [self._index[k] for k in keys]
+        first = self._vectors[locs[0][0]]
+        out = np.empty((len(keys), first.shape[1]), dtype=first.dtype)
+        por_segmento = {}
+        for i, (name, row) in enumerate(locs):
+            por_segmento.setdefault(name, ([], []))
+            por_segmento[name][0].append(i)
+            por_segmento[name][1].append(row)
+        for name, (pos, rows) in por_segmento.items():
+            out[pos] = self._vectors[name][rows]
+        return out
+
+
+def cosine_scores(matrix: np.ndarray, vector: np.ndarray) -> np.ndarray:
+    """Similaridade de cosseno de cada linha de `matrix` com `vector` (um único produto matriz-vetor)."""
+    matrix = np.asarray(matrix, dtype=np.float32)
+    vector = np.asarray(vector, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1) * np.linalg.norm(vector)
+    return (matrix @ vector) / np.where(norms == 0, 1.0, norms)
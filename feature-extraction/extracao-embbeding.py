@@ -1,58 +1,38 @@
-from sentence_transformers import SentenceTransformer
-from sklearn.metrics.pairwise import cosine_similarity
+import os
+import sys
+from pathlib import Path
 import numpy as np
 
-# Inicialização do modelo
-model = SentenceTransformer("Qwen/Qwen3-Embedding-0.6B")
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import instrumentation
+from chunking import chunk_text, pool, token_counter, window_weights
+from data_report import report_from_dataset
+from embedding_cache import EmbeddingCache, cosine_scores
+from model_server import ModelClient
+from result_cache import open_cache, result_key, texts_hash
+from strategies import BRANCHING_DESCRIPTIONS, RELEASE_STRATEGY_DESCRIPTIONS
+
+# O modelo de embeddings fica carregado no servidor de modelos (model_server.py)
+MODEL_NAME = "Qwen/Qwen3-Embedding-0.6B"
+BATCH_SIZE = 32
+TOKEN_BUDGET = 2048      # tokens por janela; textos maiores são divididos
+POOLING = "mean"         # mean, max ou attention (ponderado pelo tamanho da janela)
+client = ModelClient()
+
+# Cache em disco: textos já codificados (ex.: descrições das estratégias) não vão ao modelo de novo
+cache = EmbeddingCache(MODEL_NAME)
+# Cache de resultados: a mesma entrada com as mesmas descrições pula embeddings e similaridade
+results = open_cache()
+
+@instrumentation.timed("embedding.get_embeddings")
+def get_embeddings(texts):
+    # Apenas os textos fora do cache são codificados, todos em um único lote
+    return cache.get_many(texts, lambda faltantes: client.embed(faltantes, model=MODEL_NAME, batch_size=BATCH_SIZE))
 
 def get_embedding(text):
-    return model.encode(text)
-
-# --- Dicionários de Padrões ---
-
-BRANCHING_DESCRIPTIONS = {
-    "GitHub Flow": (
-         "GitHub Flow, caracterizado por uma única branch principal (main) e branches curtas de feature, "
-         "com integração contínua via pull requests"
-    ),
-
-    "Gitflow": (
-         "Gitflow, caracterizado pelo uso de branches fixas como develop, master, release e hotfix, "
-         "com ciclos de desenvolvimento bem definidos"
-    ),
-
-    "Trunk-Based Development": (
-        "Trunk-Based Development, caracterizado por commits frequentes diretamente na branch principal "
-        "ou em branches de vida muito curta, com forte uso de CI"
-    ),
-
-    "GitLab Flow": (
-        "GitLab Flow, caracterizado pela combinação de branches de feature com branches específicas "
-        "por ambiente ou versão"
-    ),
-}
-
-RELEASE_STRATEGY_DESCRIPTIONS = {
-    "Semantic Versioning": (
-        "Semantic Versioning, caracterizado pelo uso de versões no formato MAJOR.MINOR.PATCH, "
-        "indicando compatibilidade e tipo de mudança"
-    ),
-
-    "Release Train": (
-        "Release Train, caracterizado por releases em datas fixas e previsíveis, "
-        "independentemente do volume de mudanças"
-    ),
-
-    "Rolling Release": (
-        "Rolling Release, caracterizado por entregas contínuas sem versões bem definidas, "
-        "onde o software está sempre sendo atualizado"
-    ),
-
-    "Ad-hoc Release": (
-        "Ad-hoc Release, caracterizado por releases manuais e pontuais, "
-        "sem periodicidade fixa ou estratégia formal"
-    ),
-}
+    return get_embeddings([text])[0]
+
+# --- Dicionários de Padrões: strategies.py ---
 
 # --- Entrada de Texto para Análise ---
 entrada = """
@@ -88,24 +68,38 @@ GitHub Actions), garantindo integridade antes do merge.
 • Gestão de Mudanças: As releases parecem ser isoladas pontualmente em branches específicas ou tags para garantir estabilidade sem travar o desenvolvimento paralelo na branch principal.
 """
 
-print("Gerando embeddings da entrada...\n")
-emb_entrada = get_embedding(entrada)
+# Com um dataset.jsonl no diretório atual (saída do extrator), a entrada é gerada a
+# partir dele pelo data_report.py em vez de usar o texto escrito à mão acima
+if os.path.exists("dataset.jsonl"):
+    entrada = report_from_dataset("dataset.jsonl")
+
+janelas = chunk_text(entrada, TOKEN_BUDGET, token_counter(MODEL_NAME)) or [entrada]
+entrada_hash = texts_hash(janelas)
+
+def chave_categoria(dicionario_padroes):
+    return result_key(MODEL_NAME, dicionario_padroes, entrada_hash, engine="embedding", pooling=POOLING)
 
 # --- Função de Análise Genérica ---
-def analisar_categoria(nome_categoria, dicionario_padroes, embedding_input):
+def analisar_categoria(nome_categoria, dicionario_padroes, embedding_input, chave=None, cached=None):
+    # `cached`: resultado já lido do cache de resultados pelo chamador (lido uma única vez,
+    # pois a entrada pode ser descartada pelo LRU/TTL entre duas leituras)
     print(f"--- Analisando: {nome_categoria} ---")
     
-    # Gera embeddings para o dicionário atual
-    emb_padroes = {k: get_embedding(v) for k, v in dicionario_padroes.items()}
-    
-    resultados = []
-    for nome, emb in emb_padroes.items():
-        # Calcula similaridade
-        sim = cosine_similarity([embedding_input], [emb])[0][0]
-        resultados.append((nome, sim))
-    
-    # Ordena e exibe
-    resultados.sort(key=lambda x: x[1], reverse=True)
+    if cached is not None:
+        resultados = [tuple(item) for item in cached]
+    else:
+        # Embeddings do dicionário atual (do cache, quando já calculados)
+        nomes = list(dicionario_padroes.keys())
+        emb_padroes = get_embeddings(list(dicionario_padroes.values()))
+        
+        # Similaridade de todos os padrões em um único produto matriz-vetor
+        sims = cosine_scores(emb_padroes, embedding_input)
+        resultados = [(nome, float(sim)) for nome, sim in zip(nomes, sims)]
+        
+        # Ordena e guarda
+        resultados.sort(key=lambda x: x[1], reverse=True)
+        if results is not None and chave:
+            results.put(chave, resultados, MODEL_NAME)
     
     for nome, score in resultados:
         print(f"{nome:25s} -> Similaridade: {score:.4f}")
@@ -115,8 +109,18 @@ def analisar_categoria(nome_categoria, dicionario_padroes, embedding_input):
 
 # --- Execução das Análises ---
 
+chaves = {"branching": chave_categoria(BRANCHING_DESCRIPTIONS), "release": chave_categoria(RELEASE_STRATEGY_DESCRIPTIONS)}
+cacheados = {tax: results.get(c) if results is not None else None for tax, c in chaves.items()}
+# A entrada só é codificada se alguma categoria não estiver no cache de resultados
+emb_entrada = None
+if any(c is None for c in cacheados.values()):
+    print("Gerando embeddings da entrada...\n")
+    emb_entrada = pool(get_embeddings(janelas), POOLING, weights=window_weights(janelas))
+
 # 1. Análise de Branching
-analisar_categoria("Modelos de Branching", BRANCHING_DESCRIPTIONS, emb_entrada)
+analisar_categoria("Modelos de Branching", BRANCHING_DESCRIPTIONS, emb_entrada, chaves["branching"],
+                   cacheados["branching"])
 
 # 2. Análise de Release
-analisar_categoria("Estratégias de Release", RELEASE_STRATEGY_DESCRIPTIONS, emb_entrada)
\ No newline at end of file
+analisar_categoria("Estratégias de Release", RELEASE_STRATEGY_DESCRIPTIONS, emb_entrada, chaves["release"],
+                   cacheados["release"])
\ No newline at end of file
@@ -0,0 +1,177 @@
+import argparse
+import hashlib
+import json
+import os
+import signal
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+
+from DataSet_extractor import repo_id_from_url
+
+# Extração em lote para uma frota de repositórios.
+# Cada repositório roda em um processo Python separado (DataSet_extractor.py),
+# então a vazão escala com os núcleos e um repositório travado ou quebrado é
+# encerrado pelo timeout sem parar o restante do lote.
+
+EXTRACTOR = Path(__file__).resolve().parent / "DataSet_extractor.py"
+
+
+def read_manifest(path: str):
+    """Manifesto: um caminho de repositório por linha (linhas vazias e # são ignoradas)."""
+    repos = []
+    for line in Path(path).read_text(encoding="utf-8").splitlines():
+        line = line.strip()
+        if line and not line.startswith("#"):
+            repos.append(line)
+    return repos
+
+
+def resolve_repo_id(repo: str) -> str:
+    r = subprocess.run(
+        ["git", "config", "--get", "remote.origin.url"],
+        cwd=repo,
+        capture_output=True,
+        text=True,
+        encoding="utf-8",
+        errors="replace",
+        timeout=30,
+    )
+    return repo_id_from_url(r.stdout, fallback=Path(repo).resolve().name)
+
+
+def _safe_repo_id(repo: str):
+    try:
+        return resolve_repo_id(repo)
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def output_dir_for(output_root: Path, repo_id: str, shards: int = 0) -> Path:
+    # github.com/owner/name -> github.com__owner__name (opcionalmente dentro de shard-XX)
+    name = repo_id.replace("/", "__")
+    if shards and shards > 1:
+        shard = int(hashlib.sha1(repo_id.encode("utf-8")).hexdigest(), 16) % shards
+        return output_root / f"shard-{shard:02d}" / name
+    return output_root / name
+
+
+def _kill_group(proc: subprocess.Popen):
+    # os.killpg não existe no Windows: lá só o processo filho é encerrado
+    if hasattr(os, "killpg"):
+        try:
+            os.killpg(proc.pid, signal.SIGKILL)
+            return
+        except ProcessLookupError:
+            pass
+    proc.kill()
+
+
+def extract_one(repo: str, repo_id: str, out: Path, commits: int, timeout: float,
+                incremental: bool = False) -> dict:
+    start = time.perf_counter()
+    report = {"repo": repo, "repo_id": repo_id, "output": str(out), "status": "ok", "seconds": 0.0}
+    try:
+        cmd = [
+            sys.executable, str(EXTRACTOR),
+            "--repo", repo,
+            "--output", str(out),
+            "-n", str(commits),
+            "--repo-id", repo_id,
+        ]
+        if incremental:
+            cmd.append("--incremental")
+        # Sessão própria: o extrator e os processos git que ele abre formam um grupo,
+        # encerrado inteiro no timeout
+        proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True,
+                                encoding="utf-8", errors="replace", start_new_session=True)
+        try:
+            _, stderr = proc.communicate(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            _kill_group(proc)
+            proc.communicate()
+            raise
+        if proc.returncode != 0:
+            lines = (stderr or "").strip().splitlines()
+            report["status"] = "erro"
+            report["error"] = lines[-1] if lines else f"returncode {proc.returncode}"
+    except subprocess.TimeoutExpired:
+        # O subprocess.run/kill() só mataria o extrator; os git filhos continuariam rodando
+        report["status"] = "timeout"
+        report["error"] = f"excedeu {timeout}s"
+    except Exception as e:
+        report["status"] = "erro"
+        report["error"] = str(e)
+
+    report["seconds"] = round(time.perf_counter() - start, 3)
+    return report
+
+
+def extract_fleet(repos, output_root="fleet_output", workers: int = None, commits: int = 20,
+                  timeout: float = 600, shards: int = 0, incremental: bool = False):
+    """
+    Executa a extração de vários repositórios em paralelo, com no máximo `workers`
+    extrações simultâneas. Grava fleet_report.jsonl com status e tempo por repositório.
+    """
+    output_root = Path(output_root)
+    output_root.mkdir(parents=True, exist_ok=True)
+    workers = workers or os.cpu_count() or 1
+
+    reports = []
+    report_path = output_root / "fleet_report.jsonl"
+    with report_path.open("w", encoding="utf-8") as f, ThreadPoolExecutor(max_workers=workers) as pool:
+        # 1) identificadores (uma chamada rápida de git config por repositório)
+        ids = list(pool.map(_safe_repo_id, repos))
+
+        # 2) extrações; clones do mesmo remote recebem pastas distintas
+        futures = []
+        used = {}
+        for repo, repo_id in zip(repos, ids):
+            if repo_id is None:
+                rep = {"repo": repo, "repo_id": None, "output": None, "status": "erro",
+                       "seconds": 0.0, "error": "não foi possível ler o repositório"}
+                reports.append(rep)
+                f.write(json.dumps(rep, ensure_ascii=False) + "\n")
+                print(f"[{rep['status']:>7}] {rep['seconds']:8.2f}s  {rep['repo']}")
+                continue
+            used[repo_id] = used.get(repo_id, 0) + 1
+            out = output_dir_for(output_root, repo_id, shards)
+            if used[repo_id] > 1:
+                out = out.with_name(f"{out.name}-{used[repo_id]}")
+            futures.append(pool.submit(extract_one, repo, repo_id, out, commits, timeout, incremental))
+
+        for fut in as_completed(futures):
+            rep = fut.result()
+            reports.append(rep)
+            f.write(json.dumps(rep, ensure_ascii=False) + "\n")
+            f.flush()
+            print(f"[{rep['status']:>7}] {rep['seconds']:8.2f}s  {rep['repo_id'] or rep['repo']}")
+    return reports
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Extração paralela para uma lista de repositórios Git")
+    parser.add_argument("repos", nargs="*", help="caminhos dos repositórios")
+    parser.add_argument("--manifest", help="arquivo com um caminho de repositório por linha")
+    parser.add_argument("--output", default="fleet_output", help="pasta raiz das saídas")
+    parser.add_argument("--workers", type=int, default=None, help="extrações simultâneas (padrão: nº de CPUs)")
+    parser.add_argument("-n", "--commits", type=int, default=20, help="últimos N commits por branch")
+    parser.add_argument("--timeout", type=float, default=600, help="tempo máximo por repositório (s)")
+    parser.add_argument("--shards", type=int, default=0, help="distribui as saídas em N pastas shard-XX")
+    parser.add_argument("--incremental", action="store_true", help="usa o modo incremental em cada repositório")
+    args = parser.parse_args()
+
+    repos = list(args.repos)
+    if args.manifest:
+        repos += read_manifest(args.manifest)
+    if not repos:
+        parser.error("informe repositórios ou --manifest")
+
+    t0 = time.perf_counter()
+    reports = extract_fleet(repos, args.output, args.workers, args.commits,
+                            args.timeout, args.shards, args.incremental)
+    ok = sum(1 for r in reports if r["status"] == "ok")
+    print(f"\n{ok}/{len(reports)} repositórios extraídos em {time.perf_counter() - t0:.2f}s")
+    print(f"Relatório: {(Path(args.output) / 'fleet_report.jsonl').resolve()}")
@@ -0,0 +1,272 @@
+import heapq
+import subprocess
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+
+import instrumentation
+from git_runner import GIT_ENV, Watchdog
+
+# Leitura em lote do Git:
+# - refs (branches locais, remotas e tags) em UMA chamada de for-each-ref
+# - objetos commit lidos por UM processo `git cat-file --batch` de longa duração
+# O custo passa a crescer com o número de commits lidos, e não com o número de branches.
+
+REF_PATTERNS = ["refs/heads", "refs/remotes/origin", "refs/tags"]
+
+REF_FORMAT = "%00".join([
+    "%(refname)",
+    "%(refname:short)",
+    "%(objectname)",
+    "%(objectname:short)",
+    "%(objecttype)",
+    "%(committerdate:unix)",
+    "%(committerdate:short)",
+    "%(creatordate:unix)",
+    "%(creatordate:short)",
+    "%(authorname)",
+    "%(subject)",
+])
+
+REF_KEYS = [
+    "refname", "short", "sha", "abbrev", "objecttype",
+    "committer_ts", "committer_date", "creator_ts", "creator_date",
+    "author", "subject",
+]
+
+
+def parse_refs(lines):
+    """Converte as linhas de for-each-ref (campos separados por NUL) em dicts, sob demanda."""
+    for line in lines:
+        parts = line.split("\0")
+        if len(parts) != len(REF_KEYS):
+            continue
+        ref = dict(zip(REF_KEYS, parts))
+        ref["committer_ts"] = int(ref["committer_ts"] or 0)
+        ref["creator_ts"] = int(ref["creator_ts"] or 0)
+        yield ref
+
+
+def read_refs(git_lines) -> list:
+    """Lê todas as refs de interesse com uma única chamada a `git for-each-ref`."""
+    return list(parse_refs(git_lines(["for-each-ref", f"--format={REF_FORMAT}"] + REF_PATTERNS)))
+
+
+def _parse_ident(raw: bytes):
+    # "Nome <email> 1700000000 -0300" -> (nome, timestamp, offset em minutos)
+    text = raw.decode("utf-8", errors="replace")
+    lt = text.find(" <")
+    gt = text.rfind("> ")
+    name = text[:lt] if lt >= 0 else text
+    ts, offset = 0, 0
+    if gt >= 0:
+        tail = text[gt + 2:].split()
+        if tail:
+            ts = int(tail[0])
+        if len(tail) > 1 and len(tail[1]) == 5:
+            sign = -1 if tail[1][0] == "-" else 1
+            offset = sign * (int(tail[1][1:3]) * 60 + int(tail[1][3:5]))
+    return name, ts, offset
+
+
+def _short_date(ts: int, offset: int) -> str:
+    # Equivalente a --date=short: data no fuso horário do próprio commit
+    return datetime.fromtimestamp(ts, timezone(timedelta(minutes=offset))).strftime("%Y-%m-%d")
+
+
+def _subject(message: bytes) -> str:
+    # Equivalente a %s: primeiro parágrafo da mensagem, em uma linha
+    lines = message.decode("utf-8", errors="replace").split("\n")
+    out = []
+    for line in lines:
+        if not line.strip():
+            if out:
+                break
+            continue
+        out.append(line.strip())
+    return " ".join(out)
+
+
+def parse_commit(sha: str, data: bytes) -> dict:
+    header, _, message = data.partition(b"\n\n")
+    parents = []
+    author = committer = b""
+    for line in header.split(b"\n"):
+        if line.startswith(b"parent "):
+            parents.append(line[7:].decode())
+        elif line.startswith(b"author "):
+            author = line[7:]
+        elif line.startswith(b"committer "):
+            committer = line[10:]
+
+    author_name, author_ts, author_tz = _parse_ident(author)
+    _, committer_ts, committer_tz = _parse_ident(committer)
+    return {
+        "sha": sha,
+        "parents": parents,
+        "author": author_name,
+        "date": _short_date(author_ts, author_tz),
+        "committer_ts": committer_ts,
+        "committer_date": _short_date(committer_ts, committer_tz),
+        "subject": _subject(message),
+    }
+
+
+class CatFileBatch:
+    """
+    Processo `git cat-file --batch` aberto durante toda a extração.
+    Cada commit é lido e interpretado uma única vez (cache LRU por SHA), mesmo
+    que seja compartilhado por várias branches. O cache tem tamanho máximo
+    para que a memória não cresça com o tamanho do histórico.
+    `shallow` são os commits de fronteira de um clone raso: os pais deles não
+    existem localmente e não são pedidos (num clone parcial, isso iria à rede).
+    `timeout` é o tempo máximo de resposta a cada pedido: ao expirar, o processo é
+    encerrado e a leitura levanta subprocess.TimeoutExpired (None desativa).
+    """
+
+    def __init__(self, repo_path, cache_size: int = 100_000, shallow=(), timeout: float = None):
+        self.proc = subprocess.Popen(
+            ["git", "cat-file", "--batch"],
+            cwd=repo_path,
+            env=GIT_ENV,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+        )
+        self.watchdog = Watchdog(self.proc, timeout)
+        self.cache_size = int(cache_size)
+        self.commits = OrderedDict()
+        self.shallow = set(shallow)
+        # Refs cuja última amostra (recent_commits_by_ref) parou em histórico ausente
+        self.truncated_refs = set()
+
+    def read(self, sha: str):
+        self.watchdog.arm()
+        try:
+            self.proc.stdin.write(sha.encode() + b"\n")
+            self.proc.stdin.flush()
+            header = self.proc.stdout.readline()
+            parts = header.split()
+            if len(parts) == 3:
+                size = int(parts[2])
+                data = self.proc.stdout.read(size)
+                self.proc.stdout.read(1)  # LF final
+        except BrokenPipeError:
+            parts = ()
+        self.watchdog.disarm()
+        if self.watchdog.expired:
+            raise subprocess.TimeoutExpired(self.proc.args, self.watchdog.timeout)
+        if len(parts) != 3:
+            # "<sha> missing" (ex.: objeto fora de um clone raso)
+            return None, None
+        instrumentation.count("git_objects_read_total", command="cat-file")
+        instrumentation.count("git_bytes_read_total", size, command="cat-file")
+        return parts[1].decode(), data
+
+    def commit(self, sha: str):
+        if sha in self.commits:
+            self.commits.move_to_end(sha)
+            return self.commits[sha]
+        kind, data = self.read(sha)
+        c = parse_commit(sha, data) if kind == "commit" else None
+        self.commits[sha] = c
+        if len(self.commits) > self.cache_size:
+            self.commits.popitem(last=False)
+        return c
+
+    def recent_commits_by_ref(self, tips: dict, n: int) -> dict:
+        """
+        Últimos `n` commits de cada ref de `tips` ({ref: sha}) em UMA caminhada
+        pelo grafo: cada commit entra uma vez na fila de prioridade, marcado com
+        as refs que o alcançam e ainda precisam de commits, e é atribuído a todas
+        elas ao sair. Cada commit é lido e enfileirado uma vez por visita, em vez
+        de uma vez por ref.
+        Devolve {ref: [commit, ...]} na ordem de `git log -n{n} <ref>`: pela data do
+        committer, mais recente primeiro, com empates na ordem de descoberta de cada
+        ref; um commit compartilhado é o mesmo dicionário em todas as listas.
+        As refs cuja amostra parou em histórico ausente ficam em `self.truncated_refs`.
+        """
+        samples = {ref: [] for ref in tips}
+        self.truncated_refs = set()
+        if n <= 0:
+            return samples
+        pending = {}  # sha na fila -> {ref: ordem em que a ref o descobriu}
+        seen = {}     # sha -> refs que já o descobriram (cada ref visita um commit uma vez)
+        found = dict.fromkeys(tips, 0)
+        heap = []
+        seq = 0
+
+        def enqueue(sha, ts, ref):
+            nonlocal seq
+            if sha not in pending:
+                pending[sha] = {}
+                heapq.heappush(heap, (-ts, seq, sha))
+                seq += 1
+            pending[sha][ref] = found[ref]
+            found[ref] += 1
+            seen.setdefault(sha, set()).add(ref)
+
+        for ref, tip in tips.items():
+            c = self.commit(tip)
+            if c is None:
+                self.truncated_refs.add(ref)
+            else:
+                enqueue(tip, c["committer_ts"], ref)
+
+        while heap:
+            # Commits com a mesma data saem juntos e cada ref os recebe na própria ordem
+            key = heap[0][0]
+            per_ref, commits = {}, {}
+            while heap and heap[0][0] == key:
+                sha = heapq.heappop(heap)[2]
+                commits[sha] = self.commit(sha)
+                for ref, order in pending.pop(sha).items():
+                    per_ref.setdefault(ref, []).append((order, sha))
+            for ref, items in per_ref.items():
+                sample = samples[ref]
+                items.sort()
+                for k, (_, sha) in enumerate(items):
+                    if len(sample) >= n:
+                        break
+                    c = commits[sha]
+                    sample.append(c)
+                    if len(sample) >= n:
+                        break
+                    if sha in self.shallow:
+                        self.truncated_refs.add(ref)
+                        continue
+                    newer = False
+                    for p in c["parents"]:
+                        if ref in seen.get(p, ()):
+                            continue
+                        pc = self.commit(p)
+                        if pc is None:
+                            self.truncated_refs.add(ref)
+                            continue
+                        enqueue(p, pc["committer_ts"], ref)
+                        newer = newer or -pc["committer_ts"] < key
+                    if newer:
+                        # Pai mais novo que o grupo (relógio fora de ordem): no git log ele sai
+                        # antes dos demais commits do grupo, que voltam para a fila
+                        for order, rest in items[k + 1:]:
+                            if rest not in pending:
+                                pending[rest] = {}
+                                heapq.heappush(heap, (key, seq, rest))
+                                seq += 1
+                            pending[rest][ref] = order
+                        break
+        return samples
+
+    def close(self):
+        self.watchdog.close()
+        if self.watchdog.expired:
+            self.proc.wait()
+            return
+        if self.proc.stdin:
+            self.proc.stdin.close()
+        self.proc.wait()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,161 @@
+import asyncio
+import os
+import subprocess
+import threading
+import time
+from typing import List, NamedTuple
+
+import instrumentation
+
+# Execução de comandos git com timeout, limite de concorrência e resultado estruturado.
+# A versão assíncrona (asyncio.create_subprocess_exec) permite sobrepor consultas
+# independentes, como refs, describe e HEAD, em vez de executá-las uma após a outra.
+
+# Em clones parciais (--filter), objetos ausentes seriam baixados do remote sob demanda.
+# A extração nunca deve ir à rede: o git >= 2.45 respeita GIT_NO_LAZY_FETCH, e a leitura
+# de commits não pede árvores nem blobs (ver git_bulk.CatFileBatch).
+GIT_ENV = {**os.environ, "GIT_NO_LAZY_FETCH": "1", "GIT_TERMINAL_PROMPT": "0"}
+
+
+class GitResult(NamedTuple):
+    args: List[str]
+    stdout: str
+    stderr: str
+    returncode: int
+    duration: float
+    timed_out: bool = False
+
+    @property
+    def ok(self) -> bool:
+        return self.returncode == 0 and not self.timed_out
+
+
+def _decode(data: bytes) -> str:
+    return (data or b"").decode("utf-8", errors="replace")
+
+
+def _record(result: GitResult, stdout: bytes = b"") -> GitResult:
+    # Chamadas git, bytes lidos e tempo por subcomando (ver instrumentation.py)
+    command = result.args[0] if result.args else ""
+    instrumentation.observe("git", result.duration, command=command)
+    instrumentation.count("git_calls_total", command=command)
+    instrumentation.count("git_bytes_read_total", len(stdout or b""), command=command)
+    if result.timed_out:
+        instrumentation.count("git_timeouts_total", command=command)
+    return result
+
+
+class Watchdog:
+    """
+    Timeout para processos git lidos em streaming (git log, cat-file --batch), onde
+    não há communicate(timeout=...): uma thread encerra `proc` se ficar `timeout`
+    segundos armada sem que arm() seja chamado de novo. Quem lê arma a cada linha ou
+    pedido e desarma enquanto não espera nada do processo. `timeout=None` desativa.
+    """
+
+    def __init__(self, proc: subprocess.Popen, timeout: float = None):
+        self.proc = proc
+        self.timeout = timeout
+        self.deadline = None
+        self.expired = False
+        self._stop = threading.Event()
+        if timeout is not None:
+            threading.Thread(target=self._watch, daemon=True).start()
+
+    def arm(self):
+        if self.timeout is not None:
+            self.deadline = time.monotonic() + self.timeout
+
+    def disarm(self):
+        self.deadline = None
+
+    def close(self):
+        self._stop.set()
+
+    def _watch(self):
+        while not self._stop.wait(min(self.timeout, 1.0)):
+            deadline = self.deadline
+            if deadline is not None and time.monotonic() > deadline:
+                self.expired = True
+                instrumentation.count("git_timeouts_total", command=self.proc.args[1])
+                self.proc.kill()
+                return
+
+
+class AsyncGitRunner:
+    """
+    Executa git em um repositório com:
+    - timeout por comando (`timeout`, em segundos; None desativa)
+    - semáforo que limita quantos processos git rodam ao mesmo tempo
+    """
+
+    def __init__(self, repo_path, max_concurrency: int = 4, timeout: float = 120):
+        self.repo = str(repo_path)
+        self.max_concurrency = max(1, int(max_concurrency))
+        self.timeout = timeout
+        self._semaphore = None
+        self._loop = None
+
+    def _sem(self) -> asyncio.Semaphore:
+        # O semáforo é criado dentro do event loop em uso; cada gather_sync roda em um
+        # loop novo (asyncio.run), e um semáforo já disputado fica preso ao loop antigo
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._loop = loop
+        return self._semaphore
+
+    async def run(self, args, timeout: float = None) -> GitResult:
+        args = list(args)
+        timeout = self.timeout if timeout is None else timeout
+        async with self._sem():
+            start = time.perf_counter()
+            proc = await asyncio.create_subprocess_exec(
+                "git", *args,
+                cwd=self.repo,
+                env=GIT_ENV,
+                stdin=asyncio.subprocess.DEVNULL,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+            )
+            try:
+                out, err = await asyncio.wait_for(proc.communicate(), timeout)
+            except asyncio.TimeoutError:
+                proc.kill()
+                await proc.wait()
+                return _record(GitResult(args, "", f"timeout após {timeout}s", -1,
+                                         time.perf_counter() - start, timed_out=True))
+            return _record(GitResult(args, _decode(out), _decode(err), proc.returncode,
+                                     time.perf_counter() - start), out)
+
+    async def gather(self, commands) -> List[GitResult]:
+        """Executa vários comandos em paralelo (respeitando o limite) e devolve na mesma ordem."""
+        return list(await asyncio.gather(*(self.run(c) for c in commands)))
+
+    def run_sync(self, args, timeout: float = None) -> GitResult:
+        """Versão síncrona, com o mesmo timeout e o mesmo resultado estruturado."""
+        args = list(args)
+        timeout = self.timeout if timeout is None else timeout
+        start = time.perf_counter()
+        try:
+            r = subprocess.run(
+                ["git"] + args,
+                cwd=self.repo,
+                env=GIT_ENV,
+                stdin=subprocess.DEVNULL,
+                capture_output=True,
+                timeout=timeout,
+            )
+        except subprocess.TimeoutExpired:
+            return _record(GitResult(args, "", f"timeout após {timeout}s", -1,
+                                     time.perf_counter() - start, timed_out=True))
+        return _record(GitResult(args, _decode(r.stdout), _decode(r.stderr), r.returncode,
+                                 time.perf_counter() - start), r.stdout)
+
+    def gather_sync(self, commands) -> List[GitResult]:
+        """Roda gather() a partir de código síncrono (sequencial se já houver um event loop ativo)."""
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(self.gather(commands))
+        return [self.run_sync(c) for c in commands]
@@ -0,0 +1,163 @@
+from collections import Counter
+from datetime import datetime, timezone
+
+import numpy as np
+
+# Estatísticas do histórico completo, agregadas em streaming: o `git log` de todas as
+# branches, remotas e tags é lido uma única vez, linha a linha, e cada commit só atualiza
+# contadores. A memória depende do número de autores e de dias com commits, nunca do
+# número de commits. (Não usa --all: stash e notes também são commits, e o stash é um merge.)
+
+LOG_FORMAT = "%P%x1f%at%x1f%aN"
+LOG_ARGS = ["log", "--branches", "--remotes", "--tags", "--parents", f"--format={LOG_FORMAT}"]
+TOP_AUTHORS = 20
+# Faixas do histograma de commits por dia (dias com pelo menos um commit)
+DAY_BINS = [(1, 1), (2, 3), (4, 7), (8, 15), (16, None)]
+WEEKDAYS = ["mon", "tue", "wed", "thu", "fri", "sat", "sun"]
+
+
+class HistoryStats:
+    """Contadores do histórico, atualizados commit a commit (add)."""
+
+    def __init__(self):
+        self.commits = 0
+        self.merges = 0
+        self.first_ts = None
+        self.last_ts = None
+        self.authors = Counter()
+        self.days = Counter()     # ordinal do dia (UTC) -> commits
+        self.weekdays = [0] * 7
+
+    def add(self, n_parents: int, ts: int, author: str):
+        self.commits += 1
+        self.merges += n_parents > 1
+        self.authors[author] += 1
+        if ts:
+            day = ts // 86400
+            self.days[day] += 1
+            self.weekdays[(day + 3) % 7] += 1  # 1970-01-01 foi uma quinta-feira
+            self.first_ts = ts if self.first_ts is None else min(self.first_ts, ts)
+            self.last_ts = ts if self.last_ts is None else max(self.last_ts, ts)
+
+    def add_line(self, line: str):
+        parts = line.split("\x1f")
+        if len(parts) != 3:
+            return
+        parents, ts, author = parts
+        self.add(len(parents.split()), int(ts or 0), author)
+
+    def summary(self, top_authors: int = TOP_AUTHORS) -> dict:
+        per_day = np.fromiter(self.days.values(), dtype=np.int64, count=len(self.days))
+        histogram = {}
+        for lo, hi in DAY_BINS:
+            label = str(lo) if lo == hi else (f"{lo}-{hi}" if hi else f"{lo}+")
+            mask = (per_day >= lo) if hi is None else ((per_day >= lo) & (per_day <= hi))
+            histogram[label] = int(mask.sum())
+        date = (lambda ts: datetime.fromtimestamp(ts, timezone.utc).strftime("%Y-%m-%d") if ts else None)
+        top = self.authors.most_common(top_authors)
+        return {
+            "commits": self.commits,
+            "merges": self.merges,
+            "direct": self.commits - self.merges,
+            "merge_ratio": self.merges / self.commits if self.commits else 0.0,
+            "first_commit": date(self.first_ts),
+            "last_commit": date(self.last_ts),
+            "active_days": len(self.days),
+            "commits_per_active_day": float(per_day.mean()) if len(per_day) else 0.0,
+            "commits_per_day_histogram": histogram,
+            "weekday_histogram": dict(zip(WEEKDAYS, self.weekdays)),
+            "authors": len(self.authors),
+            "top_author_share": top[0][1] / self.commits if top else 0.0,
+            "top_authors": [[name, n] for name, n in top],
+        }
+
+
+def stream_history(git_lines, stats: HistoryStats = None) -> HistoryStats:
+    """Percorre o `git log --parents` de todas as refs uma vez, atualizando `stats` linha a linha."""
+    stats = stats or HistoryStats()
+    for line in git_lines(LOG_ARGS):
+        stats.add_line(line)
+    return stats
+
+
+def branch_divergence(git_lines, base: str, tips: dict) -> dict:
+    """
+    Para cada ref de `tips` ({nome: sha}): commits fora de `base` (como
+    `rev-list --count base..ref`), quantos são merges e o merge-base com `base`,
+    com duas chamadas a `git rev-list` para todas as refs juntas (em vez de três
+    processos por ref). `in_base` indica que a ponta da ref já está em `base`.
+    """
+    shas = list(dict.fromkeys(tips.values()))
+    bit = {sha: 1 << i for i, sha in enumerate(shas)}
+    commits, merges = [0] * len(shas), [0] * len(shas)
+    bases = [[] for _ in shas]
+    outside = set()
+    # Na ordem topológica um commit só sai depois dos filhos: cada um carrega a máscara
+    # de bits das refs que o alcançam e a repassa aos pais, então só a fronteira da
+    # caminhada fica em memória. Os commits de fronteira (--boundary, já em `base`)
+    # alcançados por uma ref são os candidatos a merge-base dela.
+    masks = {}
+    revs = "\n".join([f"^{base}"] + shas) + "\n"
+    for line in git_lines(["rev-list", "--topo-order", "--boundary", "--parents", "--stdin"], input=revs):
+        if not line:
+            continue
+        parts = line.lstrip("-").split()
+        sha, parents = parts[0], parts[1:]
+        mask = masks.pop(sha, 0) | bit.get(sha, 0)
+        boundary = line.startswith("-")
+        if not boundary:
+            if sha in bit:
+                outside.add(sha)
+            for p in parents:
+                masks[p] = masks.get(p, 0) | mask
+        merge = len(parents) > 1
+        while mask:
+            low = mask & -mask
+            i = low.bit_length() - 1
+            mask ^= low
+            if boundary:
+                bases[i].append(sha)
+            else:
+                commits[i] += 1
+                merges[i] += merge
+
+    # Com mais de um candidato (a ref trouxe `base` por merge), o merge-base é o que não
+    # é ancestral de outro: o primeiro deles na ordem topológica de `base`
+    pending = {}
+    unresolved = set()
+    for i, candidates in enumerate(bases):
+        if len(candidates) > 1:
+            for sha in candidates:
+                pending.setdefault(sha, []).append(i)
+            bases[i] = []
+            unresolved.add(i)
+    if unresolved:
+        for sha in git_lines(["rev-list", "--topo-order", base]):
+            for i in pending.pop(sha, ()):
+                if i in unresolved:
+                    bases[i] = [sha]
+                    unresolved.discard(i)
+            if not unresolved:
+                break
+
+    stats = {}
+    for name, sha in tips.items():
+        i = bit[sha].bit_length() - 1
+        stats[name] = {
+            "commits": commits[i],
+            "merges": merges[i],
+            "merge_base": bases[i][0] if bases[i] else "",
+            "in_base": sha not in outside,
+        }
+    return stats
+
+
+def lifespan_summary(branches) -> dict:
+    """Mediana e p90 (dias) da duração das branches ainda não integradas à main."""
+    days = [b["lifespan_days"] for b in branches.values() if b["lifespan_days"] is not None and not b["merged"]]
+    return {
+        "open_branches": len(days),
+        "lifespan_median_days": float(np.median(days)) if days else 0.0,
+        "lifespan_p90_days": float(np.percentile(days, 90)) if days else 0.0,
+        "merged_branches": sum(1 for b in branches.values() if b["merged"]),
+    }
@@ -0,0 +1,214 @@
+import atexit
+import functools
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+# Instrumentação opcional: spans (tempo por etapa) e contadores (chamadas git, bytes
+# lidos, registros gravados, tokens processados). Desligada por padrão, com custo
+# desprezível; é ativada por variáveis de ambiente, sem mudar código:
+#   METRICS_TEXTFILE=/var/lib/node_exporter/git_strategy.prom   -> textfile do Prometheus
+#   METRICS_TRACE=trace.json     -> trace no formato Chrome (chrome://tracing, Perfetto)
+#   METRICS_PROFILE=perfil.prof  -> cProfile (ou pyinstrument, se terminar em .html)
+# "{pid}" no caminho é trocado pelo PID (útil com vários processos, ex.: fleet_extractor.py).
+# Os arquivos são gravados ao final do processo (ou em flush()).
+
+PREFIX = "git_strategy_"
+MAX_TRACE_EVENTS = 200_000
+
+ENABLED = False
+_lock = threading.Lock()
+_counters = {}
+_spans = {}
+_events = []
+_outputs = {"textfile": None, "trace": None, "profile": None}
+_profiler = None
+_registered = False
+_t0 = time.perf_counter()
+
+
+def _key(name: str, labels: dict):
+    return name, tuple(sorted(labels.items()))
+
+
+def _path(value):
+    return Path(value.replace("{pid}", str(os.getpid()))) if value else None
+
+
+def configure(textfile=None, trace=None, profile=None, enabled: bool = True):
+    """Ativa a coleta e define as saídas (qualquer uma pode ser None)."""
+    global ENABLED, _profiler, _registered
+    ENABLED = enabled or bool(textfile or trace or profile)
+    _outputs.update(textfile=_path(textfile), trace=_path(trace), profile=_path(profile))
+    if profile and _profiler is None:
+        if str(profile).endswith(".html"):
+            try:
+                from pyinstrument import Profiler
+                _profiler = Profiler()
+            except ImportError:
+                _profiler = None
+        if _profiler is None:
+            import cProfile
+            _profiler = cProfile.Profile()
+            _profiler.enable()
+        else:
+            _profiler.start()
+    if (textfile or trace or profile) and not _registered:
+        atexit.register(flush)
+        _registered = True
+
+
+# ===============================================================
+# 🔹 Coleta
+# ===============================================================
+def count(name: str, value: float = 1, **labels):
+    if not ENABLED:
+        return
+    k = _key(name, labels)
+    with _lock:
+        _counters[k] = _counters.get(k, 0) + value
+
+
+def observe(name: str, seconds: float, **labels):
+    """Registra um span já medido (ex.: GitResult.duration)."""
+    if not ENABLED:
+        return
+    end = time.perf_counter()
+    k = _key(name, labels)
+    with _lock:
+        total, n, peak = _spans.get(k, (0.0, 0, 0.0))
+        _spans[k] = (total + seconds, n + 1, max(peak, seconds))
+        if _outputs["trace"] is not None and len(_events) < MAX_TRACE_EVENTS:
+            _events.append({
+                "name": name, "ph": "X", "pid": os.getpid(), "tid": threading.get_ident(),
+                "ts": (end - seconds - _t0) * 1e6, "dur": seconds * 1e6,
+                "args": {k: str(v) for k, v in labels.items()},
+            })
+
+
+class _Span:
+    __slots__ = ("name", "labels", "start")
+
+    def __init__(self, name, labels):
+        self.name, self.labels = name, labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        observe(self.name, time.perf_counter() - self.start, **self.labels)
+
+
+class _NoSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NO_SPAN = _NoSpan()
+
+
+def span(name: str, **labels):
+    """Context manager que mede o bloco: `with span("model.load", kind="reranker"): ...`"""
+    return _Span(name, labels) if ENABLED else _NO_SPAN
+
+
+def timed(name: str, **labels):
+    """Decorator equivalente a span() em volta de toda a função."""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not ENABLED:
+                return fn(*args, **kwargs)
+            with _Span(name, labels):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+# ===============================================================
+# 🔹 Saídas
+# ===============================================================
+def snapshot() -> dict:
+    with _lock:
+        return {
+            "counters": [{"name": n, "labels": dict(l), "value": v} for (n, l), v in _counters.items()],
+            "spans": [{"name": n, "labels": dict(l), "count": c, "total_s": t, "max_s": m}
+                      for (n, l), (t, c, m) in _spans.items()],
+        }
+
+
+def _labels_text(labels: dict) -> str:
+    if not labels:
+        return ""
+    def escape(v):
+        return str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    return "{" + ",".join(f'{k}="{escape(v)}"' for k, v in labels.items()) + "}"
+
+
+def prometheus_text() -> str:
+    """Métricas no formato de exposição do Prometheus (textfile collector ou /metrics)."""
+    snap = snapshot()
+    lines = []
+    by_name = {}
+    for c in snap["counters"]:
+        by_name.setdefault(PREFIX + c["name"].replace(".", "_"), []).append(c)
+    for metric, items in sorted(by_name.items()):
+        lines.append(f"# TYPE {metric} counter")
+        for c in items:
+            lines.append(f"{metric}{_labels_text(c['labels'])} {c['value']:g}")
+
+    if snap["spans"]:
+        metric = PREFIX + "span_seconds"
+        lines.append(f"# TYPE {metric} summary")
+        for s in snap["spans"]:
+            labels = _labels_text({"span": s["name"], **s["labels"]})
+            lines.append(f"{metric}_sum{labels} {s['total_s']:.6f}")
+            lines.append(f"{metric}_count{labels} {s['count']}")
+        lines.append(f"# TYPE {metric}_max gauge")
+        for s in snap["spans"]:
+            lines.append(f"{metric}_max{_labels_text({'span': s['name'], **s['labels']})} {s['max_s']:.6f}")
+    return "\n".join(lines) + "\n"
+
+
+def _atomic_write(path: Path, data: str):
+    # O textfile collector pode ler a qualquer momento: grava em .tmp e troca
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(data, encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def flush():
+    """Grava as saídas configuradas (textfile, trace e perfil)."""
+    global _profiler
+    if _outputs["textfile"] is not None:
+        _atomic_write(_outputs["textfile"], prometheus_text())
+    if _outputs["trace"] is not None:
+        with _lock:
+            events = list(_events)
+        _atomic_write(_outputs["trace"], json.dumps({
+            "traceEvents": events,
+            "displayTimeUnit": "ms",
+            "otherData": snapshot(),
+        }))
+    if _profiler is not None and _outputs["profile"] is not None:
+        path = _outputs["profile"]
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if hasattr(_profiler, "dump_stats"):
+            _profiler.disable()
+            _profiler.dump_stats(str(path))
+        else:
+            _profiler.stop()
+            path.write_text(_profiler.output_html(), encoding="utf-8")
+        _profiler = None
+
+
+if any(os.environ.get(v) for v in ("METRICS_TEXTFILE", "METRICS_TRACE", "METRICS_PROFILE")):
+    configure(os.environ.get("METRICS_TEXTFILE"), os.environ.get("METRICS_TRACE"),
+              os.environ.get("METRICS_PROFILE"))
@@ -0,0 +1,549 @@
+import argparse
+import hashlib
+import json
+import os
+import sys
+import threading
+import urllib.error
+import urllib.request
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import instrumentation
+from chunking import approx_tokens
+
+# Servidor local de inferência: mantém os modelos (zero-shot, reranker e embeddings)
+# carregados entre execuções. Os scripts de classificação viram clientes finos
+# (ModelClient); o custo de carregar um modelo é pago uma vez por processo do servidor.
+#
+# Uso:
+#   python model_server.py --port 8765
+#   MODEL_SERVER_URL=http://127.0.0.1:8765 python Zero-Shot/Zero_Shot.py
+
+DEFAULT_URL = os.environ.get("MODEL_SERVER_URL", "http://127.0.0.1:8765")
+# "torch" (padrão) ou "onnx" (ONNX Runtime int8 em CPU, ver onnx_backend.py)
+DEFAULT_BACKEND = os.environ.get("INFERENCE_BACKEND", "torch")
+# Diagnóstico: confere o tamanho real das janelas também no zero-shot e nos embeddings
+# (custa uma tokenização extra por janela; ver check_lengths)
+CHECK_LENGTHS = os.environ.get("CHECK_WINDOW_LENGTHS", "0").lower() not in ("0", "off", "false", "no")
+
+ZERO_SHOT_MODEL = "MoritzLaurer/mDeBERTa-v3-base-xnli-multilingual-nli-2mil7"
+RERANKER_MODEL = "BAAI/bge-reranker-v2-m3"
+EMBEDDING_MODEL = "Qwen/Qwen3-Embedding-0.6B"
+
+
+# ===============================================================
+# 🔹 Carregamento dos modelos (imports pesados só quando necessários)
+# ===============================================================
+def _load_zero_shot(model_name: str):
+    from transformers import pipeline
+    return pipeline("zero-shot-classification", model=model_name)
+
+
+def _load_reranker(model_name: str):
+    import torch
+    from FlagEmbedding import FlagReranker
+    # fp16 só faz sentido com GPU; em CPU fica mais lento
+    return FlagReranker(model_name, use_fp16=torch.cuda.is_available())
+
+
+def _load_embedding(model_name: str):
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(model_name)
+
+
+LOADERS = {
+    "zero-shot": _load_zero_shot,
+    "reranker": _load_reranker,
+    "embedding": _load_embedding,
+}
+
+
+# ===============================================================
+# 🔹 Pares (documento, hipótese) a partir de ids já tokenizados
+# ===============================================================
+def _find(seq, sub, start: int = 0) -> int:
+    for i in range(start, len(seq) - len(sub) + 1):
+        if seq[i:i + len(sub)] == sub:
+            return i
+    raise ValueError("não foi possível identificar o formato de par do tokenizer")
+
+
+def pair_template(tokenizer) -> dict:
+    """
+    Tokens especiais que o tokenizer põe em volta de um par (texto, texto), ex.:
+    <s> A </s></s> B </s> (XLM-R) ou [CLS] A [SEP] B [SEP] (BERT/DeBERTa), com os
+    token_type_ids de cada parte. Descoberto uma vez, codificando um par conhecido.
+    """
+    a = tokenizer("a", add_special_tokens=False)["input_ids"]
+    b = tokenizer("b", add_special_tokens=False)["input_ids"]
+    enc = tokenizer("a", "b", return_token_type_ids=True)
+    ids = list(enc["input_ids"])
+    i = _find(ids, a)
+    j = _find(ids, b, i + len(a))
+    types = None
+    if "token_type_ids" in getattr(tokenizer, "model_input_names", ()):
+        t = list(enc["token_type_ids"])
+        types = (t[:i], t[i], t[i + len(a):j], t[j], t[j + len(b):])
+    return {"prefix": ids[:i], "middle": ids[i + len(a):j], "suffix": ids[j + len(b):], "types": types}
+
+
+def pair_features(template: dict, doc_ids, hyp_ids, max_length: int) -> dict:
+    """
+    Monta um par a partir de ids já tokenizados, cortando só o documento (como
+    truncation="only_first") para que o par inteiro caiba em `max_length`.
+    """
+    special = len(template["prefix"]) + len(template["middle"]) + len(template["suffix"])
+    doc_ids = doc_ids[:max(0, max_length - special - len(hyp_ids))]
+    ids = template["prefix"] + doc_ids + template["middle"] + hyp_ids + template["suffix"]
+    feat = {"input_ids": ids, "attention_mask": [1] * len(ids)}
+    if template["types"]:
+        prefix, a, middle, b, suffix = template["types"]
+        feat["token_type_ids"] = prefix + [a] * len(doc_ids) + middle + [b] * len(hyp_ids) + suffix
+    return feat
+
+
+# ===============================================================
+# 🔹 Conferência do tamanho real das janelas
+# ===============================================================
+# Hipótese padrão do pipeline zero-shot da Hugging Face (e do OnnxZeroShot)
+HYPOTHESIS_TEMPLATE = "This example is {}."
+
+
+def _context_limit(tokenizer, default: int = 512) -> int:
+    # Tokenizers sem limite configurado usam um valor sentinela enorme
+    limit = getattr(tokenizer, "model_max_length", None) or default
+    return limit if limit < 1_000_000 else default
+
+
+def check_lengths(kind: str, lengths, limit: int) -> int:
+    """
+    Confere, na hora de pontuar, o tamanho real (em tokens) das janelas: as que passam
+    de `limit` seriam truncadas em silêncio pelo modelo, sinal de que o orçamento de
+    tokens do chunking não bastou. Conta em windows_truncated_total e avisa no stderr.
+    No reranker os ids já estão em cache e a conferência é gratuita; no zero-shot e nos
+    embeddings ela exigiria tokenizar cada janela mais uma vez (as janelas já vêm do
+    chunking medidas com o tokenizer do modelo), então só roda com `check_lengths=True`
+    no ModelRegistry (CHECK_WINDOW_LENGTHS=1 ou `--check-lengths` no servidor).
+    """
+    over = sum(1 for n in lengths if n > limit)
+    if over:
+        instrumentation.count("windows_truncated_total", over, kind=kind)
+        print(f"Aviso: {over} janela(s) passam do contexto do modelo ({kind}, {limit} tokens) e foram "
+              f"truncadas; reduza o orçamento de tokens", file=sys.stderr)
+    return over
+
+
+class ModelRegistry:
+    """
+    Registro de modelos carregados com política LRU: no máximo `max_models`
+    ficam em memória; o menos usado recentemente é descartado.
+    Cada modelo tem seu próprio lock, já que os pipelines não são thread-safe.
+    `backend` escolhe entre PyTorch ("torch") e ONNX Runtime int8 ("onnx").
+    `check_lengths` liga a conferência de tamanho no zero-shot e nos embeddings.
+    """
+
+    def __init__(self, max_models: int = 3, backend: str = DEFAULT_BACKEND, threads: int = None,
+                 check_lengths: bool = CHECK_LENGTHS):
+        self.max_models = max(1, int(max_models))
+        self.backend = backend
+        self.check_lengths = check_lengths
+        if backend == "onnx":
+            import onnx_backend
+            self.loaders = onnx_backend.loaders(threads)
+        elif backend == "torch":
+            if threads:
+                import torch
+                torch.set_num_threads(int(threads))
+            self.loaders = LOADERS
+        else:
+            raise ValueError(f"Backend desconhecido: {backend} (use torch ou onnx)")
+        self._models = OrderedDict()
+        self._lock = threading.Lock()
+        self._loading = {}  # (tipo, modelo) -> lock da carga em andamento
+        # Tokenização dos documentos já vistos: (modelo, sha1 do texto) -> ids
+        self._doc_tokens = OrderedDict()
+        self.max_cached_docs = 64
+        self._pair_templates = {}
+
+    def get(self, kind: str, model_name: str):
+        if kind not in self.loaders:
+            raise ValueError(f"Tipo de modelo desconhecido: {kind}")
+        key = (kind, model_name)
+        with self._lock:
+            if key in self._models:
+                self._models.move_to_end(key)
+                return self._models[key]
+            loading = self._loading.setdefault(key, threading.Lock())
+        # A carga (segundos) acontece fora do lock geral: pedidos a modelos já carregados e o
+        # /health seguem atendidos. O lock de carga por modelo evita carregar o mesmo duas vezes.
+        with loading:
+            with self._lock:
+                if key in self._models:
+                    self._models.move_to_end(key)
+                    return self._models[key]
+            try:
+                with instrumentation.span("model.load", kind=kind, model=model_name):
+                    entry = (self.loaders[kind](model_name), threading.Lock())
+                with self._lock:
+                    self._models[key] = entry
+                    while len(self._models) > self.max_models:
+                        self._models.popitem(last=False)
+            finally:
+                with self._lock:
+                    self._loading.pop(key, None)
+            return entry
+
+    def loaded(self):
+        with self._lock:
+            return [{"kind": k, "model": m} for k, m in self._models]
+
+    @staticmethod
+    def _count(kind: str, texts, tokens: int = None):
+        # Tokens exatos quando os ids já estão à mão; senão, estimados (approx_tokens)
+        if not instrumentation.ENABLED:
+            return
+        texts = list(texts)
+        instrumentation.count("inference_items_total", len(texts), kind=kind)
+        if tokens is None:
+            instrumentation.count("tokens_processed_total", sum(approx_tokens(t) for t in texts),
+                                  kind=kind, source="estimate")
+        else:
+            instrumentation.count("tokens_processed_total", tokens, kind=kind, source="tokenizer")
+
+    def _check_zero_shot(self, model_name: str, classifier, sequences, labels):
+        # Tokeniza as janelas só para medir (o pipeline faz a própria tokenização): diagnóstico
+        tokenizer = getattr(classifier, "tokenizer", None)
+        if not self.check_lengths or tokenizer is None or not labels:
+            return
+        try:
+            template = self._pair_template(model_name, tokenizer)
+        except ValueError:
+            return
+        special = len(template["prefix"]) + len(template["middle"]) + len(template["suffix"])
+        hyp = max(len(tokenizer(HYPOTHESIS_TEMPLATE.format(label), add_special_tokens=False)["input_ids"])
+                  for label in labels)
+        ids = tokenizer(list(sequences), add_special_tokens=False)["input_ids"]
+        check_lengths("zero-shot", [len(i) for i in ids], _context_limit(tokenizer) - special - hyp)
+
+    # --- inferência ---
+    def zero_shot(self, model_name: str, sequence: str, labels, multi_label: bool = True) -> dict:
+        classifier, lock = self.get("zero-shot", model_name)
+        with lock:
+            self._check_zero_shot(model_name, classifier, [sequence], list(labels))
+        with lock, instrumentation.span("inference", kind="zero-shot"):
+            result = classifier(sequence, list(labels), multi_label=multi_label)
+        self._count("zero-shot", [sequence] * len(labels))
+        return {
+            "sequence": result.get("sequence", sequence),
+            "labels": list(result["labels"]),
+            "scores": [float(s) for s in result["scores"]],
+        }
+
+    def zero_shot_many(self, model_name: str, sequences, labels, multi_label: bool = True,
+                       batch_size: int = 8) -> list:
+        """Várias sequências (ex.: janelas de um documento longo) em uma única chamada ao pipeline."""
+        classifier, lock = self.get("zero-shot", model_name)
+        sequences = list(sequences)
+        with lock:
+            self._check_zero_shot(model_name, classifier, sequences, list(labels))
+        with lock, instrumentation.span("inference", kind="zero-shot"):
+            results = classifier(sequences, list(labels), multi_label=multi_label, batch_size=batch_size)
+        self._count("zero-shot", [s for s in sequences for _ in labels])
+        if isinstance(results, dict):
+            results = [results]
+        return [
+            {
+                "sequence": r.get("sequence", seq),
+                "labels": list(r["labels"]),
+                "scores": [float(s) for s in r["scores"]],
+            }
+            for seq, r in zip(sequences, results)
+        ]
+
+    def rerank(self, model_name: str, pairs, batch_size: int = 16) -> list:
+        reranker, lock = self.get("reranker", model_name)
+        pairs = [list(p) for p in pairs]
+        with lock, instrumentation.span("inference", kind="reranker"):
+            scores = reranker.compute_score(pairs, batch_size=batch_size)
+        self._count("reranker", [d + " " + h for d, h in pairs])
+        if not isinstance(scores, (list, tuple)):
+            scores = [scores]
+        return [float(s) for s in scores]
+
+    def _tokenize_document(self, model_name: str, tokenizer, document: str):
+        key = (model_name, hashlib.sha1(document.encode("utf-8")).hexdigest())
+        ids = self._doc_tokens.get(key)
+        if ids is None:
+            ids = tokenizer(document, add_special_tokens=False)["input_ids"]
+            self._doc_tokens[key] = ids
+            while len(self._doc_tokens) > self.max_cached_docs:
+                self._doc_tokens.popitem(last=False)
+        else:
+            self._doc_tokens.move_to_end(key)
+        return ids
+
+    def _pair_template(self, model_name: str, tokenizer) -> dict:
+        if model_name not in self._pair_templates:
+            self._pair_templates[model_name] = pair_template(tokenizer)
+        return self._pair_templates[model_name]
+
+    def rerank_documents(self, model_name: str, documents, hypotheses,
+                         batch_size: int = 16, max_length: int = 512) -> list:
+        """
+        Pontua todos os pares (documento, hipótese) em lotes de `batch_size`.
+        Cada documento é tokenizado uma única vez (e fica em cache); os pares são
+        montados a partir dos ids já tokenizados. Retorna a matriz documentos x hipóteses.
+        """
+        documents, hypotheses = list(documents), list(hypotheses)
+        reranker, lock = self.get("reranker", model_name)
+        tokenizer = getattr(reranker, "tokenizer", None)
+        model = getattr(reranker, "model", None)
+        score_features = getattr(reranker, "score_features", None)
+        if tokenizer is None or (model is None and score_features is None):
+            flat = self.rerank(model_name, [[d, h] for d in documents for h in hypotheses], batch_size)
+            return [flat[i * len(hypotheses):(i + 1) * len(hypotheses)] for i in range(len(documents))]
+
+        if score_features is None:
+            import torch
+
+            def score_features(feats):
+                inputs = tokenizer.pad(feats, return_tensors="pt").to(next(model.parameters()).device)
+                with torch.no_grad():
+                    return model(**inputs, return_dict=True).logits.view(-1).float().cpu().tolist()
+
+        with lock:
+            with instrumentation.span("tokenize", kind="reranker"):
+                template = self._pair_template(model_name, tokenizer)
+                hyp_ids = [tokenizer(h, add_special_tokens=False)["input_ids"] for h in hypotheses]
+                doc_ids = [self._tokenize_document(model_name, tokenizer, d) for d in documents]
+                pairs = [(d, h) for d in doc_ids for h in hyp_ids]
+            special = len(template["prefix"]) + len(template["middle"]) + len(template["suffix"])
+            check_lengths("reranker", [len(d) for d in doc_ids],
+                          max_length - special - max((len(h) for h in hyp_ids), default=0))
+            flat = []
+            for start in range(0, len(pairs), batch_size):
+                with instrumentation.span("tokenize", kind="reranker"):
+                    feats = [pair_features(template, d, h, max_length) for d, h in pairs[start:start + batch_size]]
+                with instrumentation.span("inference", kind="reranker"):
+                    flat.extend(score_features(feats))
+                self._count("reranker", feats, sum(len(f["input_ids"]) for f in feats))
+        n = len(hypotheses)
+        return [flat[i * n:(i + 1) * n] for i in range(len(documents))]
+
+    def embed(self, model_name: str, texts, batch_size: int = 32) -> list:
+        model, lock = self.get("embedding", model_name)
+        texts = list(texts)
+        tokenizer = getattr(model, "tokenizer", None)
+        limit = getattr(model, "max_seq_length", None) or getattr(model, "max_length", None)
+        if self.check_lengths and tokenizer is not None and limit and texts:
+            # Tokenização extra só para medir (diagnóstico, ver check_lengths)
+            with lock:
+                check_lengths("embedding", [len(i) for i in tokenizer(texts)["input_ids"]], limit)
+        with lock, instrumentation.span("inference", kind="embedding"):
+            emb = model.encode(texts, batch_size=batch_size)
+        self._count("embedding", texts)
+        return [[float(x) for x in row] for row in emb]
+
+
+# ===============================================================
+# 🔹 Servidor HTTP (JSON)
+# ===============================================================
+class _Handler(BaseHTTPRequestHandler):
+    registry: ModelRegistry = None
+
+    def _send(self, status: int, payload: dict):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == "/health":
+            self._send(200, {"status": "ok", "models": self.registry.loaded()})
+        elif self.path == "/metrics":
+            body = instrumentation.prometheus_text().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        else:
+            self._send(404, {"error": "rota não encontrada"})
+
+    def do_POST(self):
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+            req = json.loads(self.rfile.read(length) or b"{}")
+            if self.path == "/zero-shot" and "sequences" in req:
+                out = {"results": self.registry.zero_shot_many(
+                    req.get("model", ZERO_SHOT_MODEL), req["sequences"], req["labels"],
+                    req.get("multi_label", True), req.get("batch_size", 8),
+                )}
+            elif self.path == "/zero-shot":
+                out = self.registry.zero_shot(
+                    req.get("model", ZERO_SHOT_MODEL), req["sequence"], req["labels"],
+                    req.get("multi_label", True),
+                )
+            elif self.path == "/rerank":
+                out = {"scores": self.registry.rerank(
+                    req.get("model", RERANKER_MODEL), req["pairs"], req.get("batch_size", 16),
+                )}
+            elif self.path == "/rerank-documents":
+                out = {"scores": self.registry.rerank_documents(
+                    req.get("model", RERANKER_MODEL), req["documents"], req["hypotheses"],
+                    req.get("batch_size", 16), req.get("max_length", 512),
+                )}
+            elif self.path == "/embed":
+                out = {"embeddings": self.registry.embed(
+                    req.get("model", EMBEDDING_MODEL), req["texts"], req.get("batch_size", 32),
+                )}
+            else:
+                self._send(404, {"error": "rota não encontrada"})
+                return
+            self._send(200, out)
+        except (KeyError, ValueError) as e:
+            self._send(400, {"error": str(e)})
+        except Exception as e:
+            self._send(500, {"error": f"{type(e).__name__}: {e}"})
+
+    def log_message(self, fmt, *args):
+        pass
+
+
+def serve(host: str = "127.0.0.1", port: int = 8765, max_models: int = 3, preload=(),
+          backend: str = DEFAULT_BACKEND, threads: int = None, check_lengths: bool = CHECK_LENGTHS):
+    # O servidor sempre coleta métricas (em memória), expostas em GET /metrics
+    if not instrumentation.ENABLED:
+        instrumentation.configure()
+    registry = ModelRegistry(max_models=max_models, backend=backend, threads=threads,
+                             check_lengths=check_lengths)
+    for spec in preload:
+        kind, _, model_name = spec.partition(":")
+        print(f"Pré-carregando {kind}: {model_name} ...")
+        registry.get(kind, model_name)
+
+    handler = type("Handler", (_Handler,), {"registry": registry})
+    server = ThreadingHTTPServer((host, port), handler)
+    print(f"Servidor de modelos em http://{host}:{port} (backend {backend}, máx. {max_models} modelos em memória)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+# ===============================================================
+# 🔹 Cliente
+# ===============================================================
+_local_registry = None
+# Padrão do argumento `local` de ModelClient. True faz todos os clientes do processo,
+# inclusive os criados pelos scripts, usarem só o registro local (ex.: benchmark.py)
+LOCAL_ONLY = False
+
+
+def _local():
+    # Sem servidor no ar: registro no próprio processo (carrega cada modelo uma vez)
+    global _local_registry
+    if _local_registry is None:
+        _local_registry = ModelRegistry()
+    return _local_registry
+
+
+class ModelClient:
+    """
+    Cliente do servidor de modelos. Se o servidor não estiver no ar e
+    `fallback_local=True`, os modelos são carregados no próprio processo.
+    `local=True` dispensa o servidor: nenhuma requisição é feita e os modelos
+    são sempre os do registro local (None segue LOCAL_ONLY).
+    """
+
+    def __init__(self, url: str = DEFAULT_URL, timeout: float = 600, fallback_local: bool = True,
+                 local: bool = None):
+        self.url = url.rstrip("/")
+        self.timeout = timeout
+        self.fallback_local = fallback_local
+        self.local = LOCAL_ONLY if local is None else local
+        self._remote = False if self.local else None
+
+    def _post(self, route: str, payload: dict):
+        if self._remote is False:
+            return None
+        req = urllib.request.Request(
+            self.url + route,
+            data=json.dumps(payload, ensure_ascii=False).encode("utf-8"),
+            headers={"Content-Type": "application/json"},
+        )
+        try:
+            with urllib.request.urlopen(req, timeout=self.timeout) as r:
+                self._remote = True
+                return json.loads(r.read())
+        except urllib.error.HTTPError as e:
+            raise RuntimeError(f"Servidor de modelos: {e.read().decode('utf-8', 'replace')}") from e
+        except (urllib.error.URLError, ConnectionError):
+            if not self.fallback_local or self._remote:
+                raise
+            self._remote = False
+            return None
+
+    @instrumentation.timed("client", route="zero-shot")
+    def zero_shot(self, sequence: str, labels, model: str = ZERO_SHOT_MODEL, multi_label: bool = True) -> dict:
+        payload = {"model": model, "sequence": sequence, "labels": list(labels), "multi_label": multi_label}
+        out = self._post("/zero-shot", payload)
+        if out is None:
+            out = _local().zero_shot(model, sequence, labels, multi_label)
+        return out
+
+    @instrumentation.timed("client", route="zero-shot")
+    def zero_shot_many(self, sequences, labels, model: str = ZERO_SHOT_MODEL, multi_label: bool = True,
+                       batch_size: int = 8) -> list:
+        sequences = list(sequences)
+        payload = {"model": model, "sequences": sequences, "labels": list(labels),
+                   "multi_label": multi_label, "batch_size": batch_size}
+        out = self._post("/zero-shot", payload)
+        if out is None:
+            return _local().zero_shot_many(model, sequences, labels, multi_label, batch_size)
+        return out["results"]
+
+    @instrumentation.timed("client", route="rerank")
+    def rerank(self, pairs, model: str = RERANKER_MODEL, batch_size: int = 16) -> list:
+        pairs = [list(p) for p in pairs]
+        out = self._post("/rerank", {"model": model, "pairs": pairs, "batch_size": batch_size})
+        return out["scores"] if out is not None else _local().rerank(model, pairs, batch_size)
+
+    @instrumentation.timed("client", route="rerank-documents")
+    def rerank_documents(self, documents, hypotheses, model: str = RERANKER_MODEL,
+                         batch_size: int = 16, max_length: int = 512) -> list:
+        """Matriz de scores documentos x hipóteses, calculada em lotes."""
+        payload = {"model": model, "documents": list(documents), "hypotheses": list(hypotheses),
+                   "batch_size": batch_size, "max_length": max_length}
+        out = self._post("/rerank-documents", payload)
+        if out is None:
+            return _local().rerank_documents(model, documents, hypotheses, batch_size, max_length)
+        return out["scores"]
+
+    @instrumentation.timed("client", route="embed")
+    def embed(self, texts, model: str = EMBEDDING_MODEL, batch_size: int = 32) -> list:
+        texts = list(texts)
+        out = self._post("/embed", {"model": model, "texts": texts, "batch_size": batch_size})
+        return out["embeddings"] if out is not None else _local().embed(model, texts, batch_size)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Servidor local que mantém os modelos de classificação carregados")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--max-models", type=int, default=3, help="modelos mantidos em memória (LRU)")
+    parser.add_argument("--preload", nargs="*", default=[],
+                        help="modelos a carregar na partida, no formato tipo:nome (ex.: reranker:BAAI/bge-reranker-v2-m3)")
+    parser.add_argument("--backend", choices=["torch", "onnx"], default=DEFAULT_BACKEND,
+                        help="torch (padrão) ou onnx (ONNX Runtime com quantização int8)")
+    parser.add_argument("--threads", type=int, default=None, help="threads de inferência em CPU")
+    parser.add_argument("--check-lengths", action="store_true", default=CHECK_LENGTHS,
+                        help="confere o tamanho real das janelas também no zero-shot e nos embeddings "
+                             "(diagnóstico: uma tokenização extra por janela)")
+    args = parser.parse_args()
+    serve(args.host, args.port, args.max_models, args.preload, args.backend, args.threads, args.check_lengths)
@@ -0,0 +1,318 @@
+import argparse
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+
+# Backend de inferência em CPU com ONNX Runtime.
+# Na primeira carga, cada modelo é exportado para ONNX e quantizado dinamicamente
+# para int8 (pesos), e o resultado fica em cache no disco. As classes abaixo expõem a
+# mesma interface dos objetos PyTorch usados pelo model_server.py
+# (pipeline zero-shot, FlagReranker.compute_score e SentenceTransformer.encode),
+# então o servidor troca de backend sem mudar os scripts.
+#
+# Requer: pip install onnxruntime onnx torch transformers
+#   python model_server.py --backend onnx --threads 4
+#   python onnx_backend.py verify --kind reranker --model BAAI/bge-reranker-v2-m3
+
+DEFAULT_ONNX_DIR = Path(os.environ.get(
+    "ONNX_CACHE_DIR", Path.home() / ".cache" / "git-strategy" / "onnx"
+))
+OPSET = 17
+
+
+# ===============================================================
+# 🔹 Exportação + quantização
+# ===============================================================
+def _model_dir(model_name: str, kind: str, cache_dir=DEFAULT_ONNX_DIR) -> Path:
+    return Path(cache_dir) / kind / model_name.replace("/", "__")
+
+
+def export_model(model_name: str, kind: str, cache_dir=DEFAULT_ONNX_DIR, quantize: bool = True) -> Path:
+    """
+    Exporta o modelo para ONNX (eixos dinâmicos de lote e sequência) e, com
+    `quantize=True`, gera a versão int8 dinâmica. Devolve o caminho do .onnx a usar.
+    """
+    import torch
+    from transformers import AutoModel, AutoModelForSequenceClassification, AutoTokenizer
+
+    out = _model_dir(model_name, kind, cache_dir)
+    fp32_path = out / "model.onnx"
+    int8_path = out / "model.int8.onnx"
+    target = int8_path if quantize else fp32_path
+    if target.exists():
+        return target
+    out.mkdir(parents=True, exist_ok=True)
+
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    tokenizer.save_pretrained(out)
+    if kind == "embedding":
+        model = AutoModel.from_pretrained(model_name)
+        model.config.use_cache = False
+        dummy = tokenizer(["exemplo"], return_tensors="pt")
+        output_names = ["last_hidden_state"]
+    else:
+        model = AutoModelForSequenceClassification.from_pretrained(model_name)
+        dummy = tokenizer(["exemplo"], ["hipótese"], return_tensors="pt")
+        output_names = ["logits"]
+    model.eval()
+    model.config.save_pretrained(out)
+
+    input_names = [k for k in ("input_ids", "attention_mask", "token_type_ids") if k in dummy]
+    dynamic_axes = {k: {0: "batch", 1: "sequence"} for k in input_names}
+    dynamic_axes[output_names[0]] = {0: "batch"} if kind != "embedding" else {0: "batch", 1: "sequence"}
+    # Modelos grandes (> 2 GB em fp32) precisam de pesos em arquivo externo
+    large = sum(p.numel() for p in model.parameters()) * 4 > 1.8e9
+
+    class _Wrapper(torch.nn.Module):
+        # forward() com argumentos nomeados: a ordem posicional varia entre versões do transformers
+        def __init__(self, inner):
+            super().__init__()
+            self.inner = inner
+
+        def forward(self, *args):
+            return self.inner(**dict(zip(input_names, args)), return_dict=True)[output_names[0]]
+
+    with torch.no_grad():
+        torch.onnx.export(
+            _Wrapper(model),
+            tuple(dummy[k] for k in input_names),
+            str(fp32_path),
+            input_names=input_names,
+            output_names=output_names,
+            dynamic_axes=dynamic_axes,
+            opset_version=OPSET,
+            dynamo=False,  # exportador TorchScript: aceita dynamic_axes e dispensa onnxscript
+        )
+
+    if quantize:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+        quantize_dynamic(str(fp32_path), str(int8_path), weight_type=QuantType.QInt8,
+                         use_external_data_format=large)
+    return target
+
+
+def _session(path: Path, threads: int = None):
+    import onnxruntime as ort
+
+    opts = ort.SessionOptions()
+    opts.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    if threads:
+        opts.intra_op_num_threads = int(threads)
+    return ort.InferenceSession(str(path), opts, providers=["CPUExecutionProvider"])
+
+
+def _softmax(x: np.ndarray, axis: int = -1) -> np.ndarray:
+    z = np.exp(x - x.max(axis=axis, keepdims=True))
+    return z / z.sum(axis=axis, keepdims=True)
+
+
+class _OnnxModel:
+    def __init__(self, model_name: str, kind: str, threads: int = None,
+                 cache_dir=DEFAULT_ONNX_DIR, quantize: bool = True):
+        from transformers import AutoConfig, AutoTokenizer
+
+        path = export_model(model_name, kind, cache_dir, quantize)
+        self.model_name = model_name
+        self.tokenizer = AutoTokenizer.from_pretrained(path.parent)
+        self.config = AutoConfig.from_pretrained(path.parent)
+        self.session = _session(path, threads)
+        self._inputs = {i.name for i in self.session.get_inputs()}
+
+    def _run(self, encoded) -> np.ndarray:
+        feed = {k: np.asarray(v, dtype=np.int64) for k, v in encoded.items() if k in self._inputs}
+        return self.session.run(None, feed)[0]
+
+
+# ===============================================================
+# 🔹 Modelos
+# ===============================================================
+class OnnxZeroShot(_OnnxModel):
+    """Equivalente ao pipeline("zero-shot-classification") da Hugging Face (NLI)."""
+
+    def __init__(self, model_name: str, threads: int = None, **kwargs):
+        super().__init__(model_name, "zero-shot", threads, **kwargs)
+        label2id = {k.lower(): v for k, v in self.config.label2id.items()}
+        self.entailment_id = next(v for k, v in label2id.items() if k.startswith("entail"))
+        self.contradiction_id = next(v for k, v in label2id.items() if k.startswith("contra"))
+
+    def __call__(self, sequences, candidate_labels, multi_label: bool = False, batch_size: int = 8,
+                 hypothesis_template: str = "This example is {}.", max_length: int = 512):
+        single = isinstance(sequences, str)
+        seqs = [sequences] if single else list(sequences)
+        labels = list(candidate_labels)
+        hyps = [hypothesis_template.format(l) for l in labels]
+        pairs = [(s, h) for s in seqs for h in hyps]
+
+        logits = []
+        for start in range(0, len(pairs), batch_size):
+            batch = pairs[start:start + batch_size]
+            enc = self.tokenizer([p for p, _ in batch], [h for _, h in batch], truncation="only_first",
+                                 max_length=max_length, padding=True, return_tensors="np")
+            logits.append(self._run(enc))
+        logits = np.concatenate(logits) if logits else np.zeros((0, 3))
+
+        results = []
+        n = len(labels)
+        for i, seq in enumerate(seqs):
+            block = logits[i * n:(i + 1) * n]
+            if multi_label or n == 1:
+                scores = _softmax(block[:, [self.contradiction_id, self.entailment_id]], axis=1)[:, 1]
+            else:
+                scores = _softmax(block[:, self.entailment_id])
+            order = np.argsort(-scores)
+            results.append({
+                "sequence": seq,
+                "labels": [labels[j] for j in order],
+                "scores": [float(scores[j]) for j in order],
+            })
+        return results[0] if single else results
+
+
+class OnnxReranker(_OnnxModel):
+    """Equivalente ao FlagReranker (cross-encoder): compute_score devolve os logits brutos."""
+
+    def __init__(self, model_name: str, threads: int = None, **kwargs):
+        super().__init__(model_name, "reranker", threads, **kwargs)
+
+    def score_features(self, features) -> list:
+        # Pares já tokenizados (pair_features), usados por ModelRegistry.rerank_documents
+        enc = self.tokenizer.pad(features, return_tensors="np")
+        return self._run(enc).reshape(-1).astype(np.float32).tolist()
+
+    def compute_score(self, pairs, batch_size: int = 16, max_length: int = 512):
+        pairs = [list(p) for p in pairs]
+        scores = []
+        for start in range(0, len(pairs), batch_size):
+            batch = pairs[start:start + batch_size]
+            enc = self.tokenizer([a for a, _ in batch], [b for _, b in batch], truncation=True,
+                                 max_length=max_length, padding=True, return_tensors="np")
+            scores.extend(self._run(enc).reshape(-1).astype(np.float32).tolist())
+        return scores
+
+
+def _pooling_mode(model_name: str) -> str:
+    # Lê a configuração de pooling do sentence-transformers (ex.: last token no Qwen3-Embedding)
+    try:
+        local = Path(model_name) / "1_Pooling" / "config.json"
+        if not local.exists():
+            from huggingface_hub import hf_hub_download
+            local = Path(hf_hub_download(model_name, "1_Pooling/config.json"))
+        cfg = json.loads(local.read_text())
+    except Exception:
+        return "mean"
+    if cfg.get("pooling_mode_lasttoken"):
+        return "last"
+    if cfg.get("pooling_mode_cls_token"):
+        return "cls"
+    return "mean"
+
+
+class OnnxEmbedder(_OnnxModel):
+    """Equivalente ao SentenceTransformer.encode (pooling do modelo + normalização L2)."""
+
+    def __init__(self, model_name: str, threads: int = None, max_length: int = 8192, **kwargs):
+        super().__init__(model_name, "embedding", threads, **kwargs)
+        self.pooling = _pooling_mode(model_name)
+        self.max_length = min(max_length, getattr(self.tokenizer, "model_max_length", max_length))
+
+    def encode(self, texts, batch_size: int = 32, normalize_embeddings: bool = True) -> np.ndarray:
+        single = isinstance(texts, str)
+        texts = [texts] if single else list(texts)
+        out = []
+        for start in range(0, len(texts), batch_size):
+            enc = self.tokenizer(texts[start:start + batch_size], truncation=True, max_length=self.max_length,
+                                 padding=True, return_tensors="np")
+            hidden = self._run(enc)
+            mask = enc["attention_mask"].astype(np.float32)
+            if self.pooling == "cls":
+                emb = hidden[:, 0]
+            elif self.pooling == "last":
+                if self.tokenizer.padding_side == "left":
+                    emb = hidden[:, -1]
+                else:
+                    idx = mask.sum(axis=1).astype(int) - 1
+                    emb = hidden[np.arange(len(idx)), idx]
+            else:
+                emb = (hidden * mask[..., None]).sum(axis=1) / np.maximum(mask.sum(axis=1, keepdims=True), 1e-9)
+            if normalize_embeddings:
+                emb = emb / np.maximum(np.linalg.norm(emb, axis=1, keepdims=True), 1e-12)
+            out.append(emb.astype(np.float32))
+        emb = np.concatenate(out) if out else np.zeros((0, 0), dtype=np.float32)
+        return emb[0] if single else emb
+
+
+def loaders(threads: int = None, quantize: bool = True):
+    """Carregadores no formato de model_server.LOADERS."""
+    return {
+        "zero-shot": lambda name: OnnxZeroShot(name, threads, quantize=quantize),
+        "reranker": lambda name: OnnxReranker(name, threads, quantize=quantize),
+        "embedding": lambda name: OnnxEmbedder(name, threads, quantize=quantize),
+    }
+
+
+# ===============================================================
+# 🔹 Conferência contra o caminho PyTorch
+# ===============================================================
+VERIFY_TEXTS = [
+    "O repositório possui branches feat/, bug/ e refactor/ mescladas na main via pull request.",
+    "Tags no formato v1.9.0 e v1.9.1 publicadas a cada duas semanas.",
+    "Branches develop, release e hotfix fixas com ciclos definidos.",
+]
+VERIFY_LABELS = ["GitHub Flow", "Gitflow", "Semantic Versioning", "Release Train"]
+
+
+def verify(kind: str, model_name: str, tolerance: float = None, threads: int = None) -> dict:
+    """
+    Roda as mesmas entradas nos backends PyTorch e ONNX e compara:
+    zero-shot -> diferença máxima de score; reranker -> diferença máxima de logit;
+    embedding -> menor similaridade de cosseno entre os vetores.
+    """
+    import model_server
+
+    defaults = {"zero-shot": 0.05, "reranker": 0.5, "embedding": 0.98}
+    tolerance = defaults[kind] if tolerance is None else tolerance
+    ref = model_server.LOADERS[kind](model_name)
+    onnx = loaders(threads)[kind](model_name)
+
+    if kind == "zero-shot":
+        diffs = []
+        for text in VERIFY_TEXTS:
+            a, b = ref(text, VERIFY_LABELS, multi_label=True), onnx(text, VERIFY_LABELS, multi_label=True)
+            sa, sb = dict(zip(a["labels"], a["scores"])), dict(zip(b["labels"], b["scores"]))
+            diffs.extend(abs(sa[l] - sb[l]) for l in VERIFY_LABELS)
+        metric = max(diffs)
+        ok = metric <= tolerance
+    elif kind == "reranker":
+        pairs = [[t, l] for t in VERIFY_TEXTS for l in VERIFY_LABELS]
+        a = np.asarray(ref.compute_score(pairs), dtype=np.float32)
+        b = np.asarray(onnx.compute_score(pairs), dtype=np.float32)
+        metric = float(np.abs(a - b).max())
+        ok = metric <= tolerance
+    else:
+        a = np.asarray(ref.encode(VERIFY_TEXTS), dtype=np.float32)
+        b = np.asarray(onnx.encode(VERIFY_TEXTS), dtype=np.float32)
+        a = a / np.linalg.norm(a, axis=1, keepdims=True)
+        b = b / np.linalg.norm(b, axis=1, keepdims=True)
+        metric = float((a * b).sum(axis=1).min())
+        ok = metric >= tolerance
+    return {"kind": kind, "model": model_name, "metric": metric, "tolerance": tolerance, "ok": bool(ok)}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Exporta/verifica modelos ONNX int8 para inferência em CPU")
+    parser.add_argument("command", choices=["export", "verify"])
+    parser.add_argument("--kind", choices=["zero-shot", "reranker", "embedding"], required=True)
+    parser.add_argument("--model", required=True)
+    parser.add_argument("--no-quantize", action="store_true", help="mantém o modelo em fp32")
+    parser.add_argument("--tolerance", type=float, default=None)
+    parser.add_argument("--threads", type=int, default=None, help="threads intra-op do ONNX Runtime")
+    args = parser.parse_args()
+
+    if args.command == "export":
+        print(export_model(args.model, args.kind, quantize=not args.no_quantize))
+    else:
+        result = verify(args.kind, args.model, args.tolerance, args.threads)
+        print(json.dumps(result, ensure_ascii=False))
+        raise SystemExit(0 if result["ok"] else 1)
@@ -0,0 +1,178 @@
+import argparse
+import json
+import math
+import re
+from datetime import datetime
+
+import numpy as np
+
+from dataset_sink import iter_jsonl
+
+# Pré-classificador estatístico: calcula atributos numéricos a partir dos registros
+# do extrator (tags, branches e amostras de commits) e os pontua com um modelo linear
+# simples por estratégia. Quando a confiança passa do limiar, a resposta sai daqui e os
+# modelos transformer não são chamados; repositórios ambíguos seguem para os modelos.
+
+DEFAULT_THRESHOLD = 0.85
+
+SEMVER_RE = re.compile(r"^(?:v|version-|release-|rel-)?\d+\.\d+\.\d+(?:[-+][0-9A-Za-z.+-]+)?$", re.IGNORECASE)
+MERGE_RE = re.compile(r"^Merge (?:pull request|branch|remote-tracking branch)|\(#\d+\)\s*$")
+MAIN_BRANCHES = {"main", "master", "trunk"}
+DEVELOP_BRANCHES = {"develop", "development", "dev"}
+RELEASE_PREFIXES = ("release/", "releases/", "hotfix/", "hotfixes/", "release-", "hotfix-")
+TOPIC_PREFIXES = ("feat/", "feature/", "features/", "fix/", "bug/", "bugfix/", "chore/", "refactor/",
+                  "docs/", "test/", "perf/", "ci/", "build/", "style/")
+ENV_BRANCHES = {"staging", "production", "prod", "pre-production", "preprod", "qa", "uat", "homolog"}
+SHORT_LIVED_DAYS = 3
+# Abaixo disso não há tags suficientes para julgar a estratégia de release
+MIN_TAGS = 3
+
+
+def _date(value):
+    try:
+        return datetime.strptime((value or "")[:10], "%Y-%m-%d")
+    except ValueError:
+        return None
+
+
+def _branch_name(name: str) -> str:
+    # Remotas aparecem como origin/<branch> na visão geral
+    return name[len("origin/"):] if name.startswith("origin/") else name
+
+
+# ===============================================================
+# 🔹 Atributos
+# ===============================================================
+def extract_features(records) -> dict:
+    """Atributos numéricos de um repositório a partir dos registros do dataset.jsonl."""
+    tags, branches, samples = [], set(), {}
+    for rec in records:
+        kind = rec.get("type")
+        if kind == "tag":
+            tags.append((_date(rec.get("date")), rec.get("tag", "")))
+        elif kind == "branch_overview":
+            branches.add(_branch_name(rec.get("branch", "")))
+        elif kind == "commit_sample":
+            samples.setdefault(rec.get("branch", ""), []).append(rec)
+
+    # --- releases ---
+    tag_names = [name for _, name in tags]
+    dates = sorted(d for d, _ in tags if d is not None)
+    intervals = np.diff([d.timestamp() / 86400 for d in dates]) if len(dates) > 1 else np.zeros(0)
+    interval_mean = float(intervals.mean()) if len(intervals) else 0.0
+    # None: cadência desconhecida (menos de 3 tags ou todas no mesmo dia)
+    interval_cv = float(intervals.std() / interval_mean) if len(intervals) > 1 and interval_mean > 0 else None
+
+    # --- branches ---
+    others = [b for b in branches if b not in MAIN_BRANCHES and b != "HEAD"]
+    # "Vida" de uma branch: intervalo coberto pelos seus últimos N commits amostrados
+    # (inclui commits herdados da main, então é um limite superior)
+    lifetimes = []
+    for b, rows in samples.items():
+        if b in MAIN_BRANCHES:
+            continue
+        ds = [d for d in (_date(r.get("date")) for r in rows) if d is not None]
+        if ds:
+            lifetimes.append((max(ds) - min(ds)).days)
+    main_rows = next((samples[b] for b in ("main", "master", "trunk") if b in samples), [])
+    merges = sum(1 for r in main_rows if MERGE_RE.search(r.get("subject", "")))
+
+    return {
+        "n_tags": len(tags),
+        "semver_ratio": sum(1 for t in tag_names if SEMVER_RE.match(t)) / len(tag_names) if tag_names else 0.0,
+        "tag_interval_mean_days": interval_mean,
+        "tag_interval_cv": interval_cv,
+        "n_branches": len(others),
+        "has_develop": float(any(b in DEVELOP_BRANCHES for b in branches)),
+        "has_release_branches": float(any(b.startswith(RELEASE_PREFIXES) for b in others)),
+        "env_branches": float(any(b in ENV_BRANCHES for b in others)),
+        "topic_branch_ratio": sum(1 for b in others if b.startswith(TOPIC_PREFIXES)) / len(others) if others else 0.0,
+        "branch_lifetime_median_days": float(np.median(lifetimes)) if lifetimes else 0.0,
+        "branch_lifetime_p90_days": float(np.percentile(lifetimes, 90)) if lifetimes else 0.0,
+        "short_lived_ratio": sum(1 for x in lifetimes if x <= SHORT_LIVED_DAYS) / len(lifetimes) if lifetimes else 0.0,
+        "merge_to_main_ratio": merges / len(main_rows) if main_rows else 0.0,
+        "n_main_commits": len(main_rows),
+    }
+
+
+def _inputs(f: dict) -> dict:
+    # Entradas do modelo linear, todas na faixa [0, 1]
+    has_tags = float(f["n_tags"] >= MIN_TAGS)
+    cv = f["tag_interval_cv"]
+    return {
+        "bias": 1.0,
+        "has_tags": has_tags,
+        "semver": f["semver_ratio"] * has_tags,
+        "non_semver": (1.0 - f["semver_ratio"]) * has_tags,
+        "regular_cadence": 0.0 if cv is None else max(0.0, 1.0 - cv) * float(f["n_tags"] >= 6),
+        "irregular_cadence": 0.0 if cv is None else min(1.0, cv / 1.5) * has_tags,
+        "develop": f["has_develop"],
+        "release_branches": f["has_release_branches"],
+        "env_branches": f["env_branches"],
+        "topic_branches": f["topic_branch_ratio"],
+        "few_branches": float(f["n_branches"] <= 3),
+        "short_lived": f["short_lived_ratio"],
+        "merges": f["merge_to_main_ratio"],
+        "direct_commits": 1.0 - f["merge_to_main_ratio"],
+    }
+
+
+# ===============================================================
+# 🔹 Modelo linear (pesos por estratégia; nomes iguais aos de strategies.py)
+# ===============================================================
+WEIGHTS = {
+    "branching": {
+        "GitHub Flow": {"bias": 0.0, "develop": -3.0, "env_branches": -2.0, "topic_branches": 2.0, "merges": 2.0},
+        "Gitflow": {"bias": -3.0, "develop": 3.0, "release_branches": 2.0},
+        "Trunk-Based Development": {"bias": 0.0, "develop": -3.0, "few_branches": 2.0, "direct_commits": 2.0,
+                                    "short_lived": 1.0, "topic_branches": -1.0},
+        "GitLab Flow": {"bias": -3.0, "env_branches": 4.0, "develop": -1.0},
+    },
+    "release": {
+        "Semantic Versioning": {"bias": -2.0, "semver": 5.0, "has_tags": 1.0},
+        "Release Train": {"bias": -2.0, "regular_cadence": 4.0, "has_tags": 1.0},
+        "Rolling Release": {"bias": 1.5, "has_tags": -4.0},
+        "Ad-hoc Release": {"bias": -1.0, "irregular_cadence": 2.0, "non_semver": 2.0, "has_tags": 1.0},
+    },
+}
+
+
+def score(features: dict, taxonomy: str) -> dict:
+    """Probabilidade de cada estratégia (softmax dos escores lineares)."""
+    x = _inputs(features)
+    labels = list(WEIGHTS[taxonomy])
+    logits = [sum(w * x[k] for k, w in WEIGHTS[taxonomy][label].items()) for label in labels]
+    z = [math.exp(v - max(logits)) for v in logits]
+    return {label: v / sum(z) for label, v in zip(labels, z)}
+
+
+def pre_classify(records, threshold: float = DEFAULT_THRESHOLD) -> dict:
+    """
+    {"features": ..., "<taxonomia>": {"scores", "best", "confidence", "decided"}}.
+    `decided` indica que a confiança passou do limiar e os modelos podem ser pulados.
+    """
+    features = records if isinstance(records, dict) else extract_features(records)
+    # Sem nenhum dado (repositório vazio ou extração falha) nada é decidido aqui
+    informativo = features["n_tags"] + features["n_branches"] + features["n_main_commits"] > 0
+    # Com poucas tags, has_tags=0 sozinho empurraria tudo para "Rolling Release":
+    # a estratégia de release fica para os modelos
+    pode_decidir = {"branching": informativo, "release": informativo and features["n_tags"] >= MIN_TAGS}
+    result = {"features": features}
+    for taxonomy in WEIGHTS:
+        scores = score(features, taxonomy)
+        best = max(scores, key=scores.get)
+        result[taxonomy] = {
+            "scores": scores,
+            "best": best,
+            "confidence": scores[best],
+            "decided": pode_decidir[taxonomy] and scores[best] >= threshold,
+        }
+    return result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pré-classificação estatística a partir do dataset.jsonl")
+    parser.add_argument("dataset", help="caminho do dataset.jsonl")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    args = parser.parse_args()
+    print(json.dumps(pre_classify(iter_jsonl(args.dataset), args.threshold), indent=2, ensure_ascii=False))
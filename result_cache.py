@@ -0,0 +1,128 @@
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from pathlib import Path
+
+# Cache persistente de resultados de classificação (SQLite).
+# Chave = hash de (modelo, descrições das estratégias, entrada, parâmetros): se as refs do
+# repositório não mudaram, a entrada é a mesma e o resultado volta sem chamar o modelo.
+# Mudar BRANCHING_DESCRIPTIONS / RELEASE_STRATEGY_DESCRIPTIONS (strategies.py) muda a chave, então os
+# resultados antigos deixam de ser usados automaticamente (e saem pelo LRU/TTL).
+
+DEFAULT_CACHE_PATH = Path(os.environ.get(
+    "RESULT_CACHE_PATH", Path.home() / ".cache" / "git-strategy" / "results.sqlite"
+))
+DEFAULT_MAX_ENTRIES = 50_000
+DEFAULT_TTL = 30 * 24 * 3600  # segundos
+# RESULT_CACHE=0 desativa o cache (ex.: no benchmark, que precisa medir os modelos)
+ENABLED = os.environ.get("RESULT_CACHE", "1").lower() not in ("0", "off", "false", "no")
+
+
+def _digest(obj) -> str:
+    data = obj if isinstance(obj, bytes) else json.dumps(obj, sort_keys=True, ensure_ascii=False).encode("utf-8")
+    return hashlib.sha256(data).hexdigest()
+
+
+def descriptions_hash(descriptions: dict) -> str:
+    """Hash das descrições das estratégias (nome -> texto), em qualquer nível de aninhamento."""
+    return _digest(descriptions)
+
+
+def texts_hash(texts) -> str:
+    """Hash de uma lista de textos (ex.: as janelas geradas a partir do dataset)."""
+    h = hashlib.sha256()
+    for t in texts:
+        data = t.encode("utf-8")
+        h.update(len(data).to_bytes(8, "little"))
+        h.update(data)
+    return h.hexdigest()
+
+
+def result_key(model: str, descriptions: dict, input_hash: str, **params) -> str:
+    return _digest({"model": model, "descriptions": descriptions_hash(descriptions),
+                    "input": input_hash, "params": params})
+
+
+class ResultCache:
+    """
+    Resultados em SQLite com expiração por idade (`ttl`, em segundos; None desativa) e
+    limite de entradas (`max_entries`, descarta as menos acessadas recentemente).
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_entries: int = DEFAULT_MAX_ENTRIES,
+                 ttl: float = DEFAULT_TTL):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_entries = max(1, int(max_entries))
+        self.ttl = ttl
+        self.db = sqlite3.connect(str(self.path), timeout=30)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            " key TEXT PRIMARY KEY, model TEXT, created REAL, accessed REAL, value TEXT)"
+        )
+        self.db.execute("CREATE INDEX IF NOT EXISTS results_accessed ON results (accessed)")
+        self.db.commit()
+
+    def get(self, key: str):
+        row = self.db.execute("SELECT created, value FROM results WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        now = time.time()
+        if self.ttl is not None and now - row[0] > self.ttl:
+            self.db.execute("DELETE FROM results WHERE key = ?", (key,))
+            self.db.commit()
+            return None
+        self.db.execute("UPDATE results SET accessed = ? WHERE key = ?", (now, key))
+        self.db.commit()
+        return json.loads(row[1])
+
+    def put(self, key: str, value, model: str = ""):
+        now = time.time()
+        self.db.execute(
+            "INSERT OR REPLACE INTO results (key, model, created, accessed, value) VALUES (?, ?, ?, ?, ?)",
+            (key, model, now, now, json.dumps(value, ensure_ascii=False)),
+        )
+        self._evict(now)
+        self.db.commit()
+
+    def _evict(self, now: float):
+        if self.ttl is not None:
+            self.db.execute("DELETE FROM results WHERE created < ?", (now - self.ttl,))
+        excess = self.db.execute("SELECT COUNT(*) FROM results").fetchone()[0] - self.max_entries
+        if excess > 0:
+            self.db.execute(
+                "DELETE FROM results WHERE key IN (SELECT key FROM results ORDER BY accessed LIMIT ?)",
+                (excess,),
+            )
+
+    def get_or_compute(self, key: str, compute, model: str = ""):
+        """Devolve o resultado em cache ou calcula com `compute()` e guarda."""
+        value = self.get(key)
+        if value is None:
+            value = compute()
+            self.put(key, value, model)
+        return value
+
+    def clear(self):
+        self.db.execute("DELETE FROM results")
+        self.db.commit()
+
+    def close(self):
+        self.db.close()
+
+    def __len__(self):
+        return self.db.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def open_cache(path=DEFAULT_CACHE_PATH, **kwargs):
+    """ResultCache padrão, ou None quando o cache está desativado por RESULT_CACHE=0."""
+    return ResultCache(path, **kwargs) if ENABLED else None
@@ -0,0 +1,53 @@
+# Estratégias de branching e de release e suas descrições (hipóteses para os modelos).
+# Fonte única para todos os scripts de classificação: as descrições fazem parte da chave
+# do cache de resultados (result_cache.py), então mudá-las aqui invalida os resultados
+# antigos em todos eles ao mesmo tempo.
+
+BRANCHING_DESCRIPTIONS = {
+    "GitHub Flow": (
+         "GitHub Flow, caracterizado por uma única branch principal (main) e branches curtas de feature, "
+         "com integração contínua via pull requests"
+    ),
+
+    "Gitflow": (
+         "Gitflow, caracterizado pelo uso de branches fixas como develop, master, release e hotfix, "
+         "com ciclos de desenvolvimento bem definidos"
+    ),
+
+    "Trunk-Based Development": (
+        "Trunk-Based Development, caracterizado por commits frequentes diretamente na branch principal "
+        "ou em branches de vida muito curta, com forte uso de CI"
+    ),
+
+    "GitLab Flow": (
+        "GitLab Flow, caracterizado pela combinação de branches de feature com branches específicas "
+        "por ambiente ou versão"
+    ),
+}
+
+RELEASE_STRATEGY_DESCRIPTIONS = {
+    "Semantic Versioning": (
+        "Semantic Versioning, caracterizado pelo uso de versões no formato MAJOR.MINOR.PATCH, "
+        "indicando compatibilidade e tipo de mudança"
+    ),
+
+    "Release Train": (
+        "Release Train, caracterizado por releases em datas fixas e previsíveis, "
+        "independentemente do volume de mudanças"
+    ),
+
+    "Rolling Release": (
+        "Rolling Release, caracterizado por entregas contínuas sem versões bem definidas, "
+        "onde o software está sempre sendo atualizado"
+    ),
+
+    "Ad-hoc Release": (
+        "Ad-hoc Release, caracterizado por releases manuais e pontuais, "
+        "sem periodicidade fixa ou estratégia formal"
+    ),
+}
+
+TAXONOMIES = {
+    "branching": BRANCHING_DESCRIPTIONS,
+    "release": RELEASE_STRATEGY_DESCRIPTIONS,
+}
@@ -1,71 +1,96 @@
-from FlagEmbedding import FlagReranker
 import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import instrumentation
+from chunking import load_windows, pool, token_counter
+from dataset_sink import iter_jsonl
+from model_server import ModelClient
+from pre_classifier import pre_classify
+from result_cache import open_cache, result_key, texts_hash
+from strategies import BRANCHING_DESCRIPTIONS, RELEASE_STRATEGY_DESCRIPTIONS
+
+# O reranker BAAI/bge-reranker-v2-m3 fica carregado no servidor de modelos (model_server.py)
+RERANKER_MODEL = 'BAAI/bge-reranker-v2-m3'
+BATCH_SIZE = 16
+TOKEN_BUDGET = 448       # tokens por janela (512 do modelo menos a hipótese)
+POOLING = "attention"    # mean, max ou attention
+PRE_THRESHOLD = 0.85     # confiança do pré-classificador estatístico para pular o reranker (None desativa)
+reranker = ModelClient()
+# Scores já calculados para as mesmas janelas/descrições/modelo voltam do cache em disco
+results = open_cache()
+
+# O histórico é dividido em janelas que cabem no contexto do reranker (por tipo de registro,
+# a partir do dataset.jsonl); assim todo o histórico é usado, e não só o início truncado.
+arquivos = ["branches_overview.txt", "branches_recent_commits_sample.txt", "dataset.jsonl", "tags_timeline.txt", "git_describe.txt"]
+janelas = load_windows([f for f in arquivos if os.path.exists(f)], token_budget=TOKEN_BUDGET,
+                       count_tokens=token_counter(RERANKER_MODEL))
+
+# Casos óbvios (ex.: tags semver, sem branch develop) são decididos pelas estatísticas do dataset.jsonl
+pre = pre_classify(iter_jsonl("dataset.jsonl"), PRE_THRESHOLD) if PRE_THRESHOLD and os.path.exists("dataset.jsonl") else {}
+
+@instrumentation.timed("reranker.score_taxonomias")
+def score_taxonomias(janelas, taxonomias, batch_size=BATCH_SIZE, pooling=POOLING):
+    """
+    Pontua todos os pares (janela, hipótese) de todas as taxonomias em lotes no
+    reranker; cada janela é tokenizada uma só vez. Os scores das janelas são
+    agregados por taxonomia com o pooling escolhido.
+    Retorna um dict {taxonomia: {estratégia: score}}.
+    """
+    hipoteses = [(tax, nome, desc) for tax, descricoes in taxonomias.items() for nome, desc in descricoes.items()]
+    matriz = reranker.rerank_documents(
+        janelas, [desc for _, _, desc in hipoteses],
+        model=RERANKER_MODEL, batch_size=batch_size,
+    )
+    resultado = {}
+    inicio = 0
+    for tax, descricoes in taxonomias.items():
+        fim = inicio + len(descricoes)
+        pooled = pool([linha[inicio:fim] for linha in matriz], pooling)
+        resultado[tax] = {nome: float(score) for nome, score in zip(descricoes, pooled)}
+        inicio = fim
+    return resultado
 
-reranker = FlagReranker('BAAI/bge-reranker-v2-m3', use_fp16=True)
-
-textos = []
-for nome_arquivo in ["branches_overview.txt", "branches_recent_commits_sample.txt", "dataset.jsonl", "tags_timeline.txt", "git_describe.txt"]:
-    if os.path.exists(nome_arquivo):
-        with open(nome_arquivo, "r", encoding="utf-8") as f:
-            textos.append(f.read())
-
-entrada = "\n".join(textos)
-
-BRANCHING_DESCRIPTIONS = {
-    "GitHub Flow": (
-         "GitHub Flow, caracterizado por uma única branch principal (main) e branches curtas de feature, "
-         "com integração contínua via pull requests"
-    ),
-
-    "Gitflow": (
-         "Gitflow, caracterizado pelo uso de branches fixas como develop, master, release e hotfix, "
-         "com ciclos de desenvolvimento bem definidos"
-    ),
-
-    "Trunk-Based Development": (
-        "Trunk-Based Development, caracterizado por commits frequentes diretamente na branch principal "
-        "ou em branches de vida muito curta, com forte uso de CI"
-    ),
+print("🔍 Analisando estratégias de branching e release com base nos arquivos de log...\n")
 
-    "GitLab Flow": (
-        "GitLab Flow, caracterizado pela combinação de branches de feature com branches específicas "
-        "por ambiente ou versão"
-    ),
-}
+print(f"{len(janelas)} janelas de até {TOKEN_BUDGET} tokens (pooling: {POOLING})\n")
 
-RELEASE_STRATEGY_DESCRIPTIONS = {
-    "Semantic Versioning": (
-        "Semantic Versioning, caracterizado pelo uso de versões no formato MAJOR.MINOR.PATCH, "
-        "indicando compatibilidade e tipo de mudança"
-    ),
-
-    "Release Train": (
-        "Release Train, caracterizado por releases em datas fixas e previsíveis, "
-        "independentemente do volume de mudanças"
-    ),
-
-    "Rolling Release": (
-        "Rolling Release, caracterizado por entregas contínuas sem versões bem definidas, "
-        "onde o software está sempre sendo atualizado"
-    ),
-
-    "Ad-hoc Release": (
-        "Ad-hoc Release, caracterizado por releases manuais e pontuais, "
-        "sem periodicidade fixa ou estratégia formal"
-    ),
+taxonomias = {
+    "branching": BRANCHING_DESCRIPTIONS,
+    "release": RELEASE_STRATEGY_DESCRIPTIONS,
 }
-
-print("🔍 Analisando estratégias de branching e release com base nos arquivos de log...\n")
+decididas = {tax for tax in taxonomias if pre.get(tax, {}).get("decided")}
+for tax in sorted(decididas):
+    print(f"⚡ {tax}: {pre[tax]['best']} pelas estatísticas do dataset (confiança {pre[tax]['confidence']:.2f}), sem reranker")
+
+# Hipóteses restantes (branching + release) em uma única passada em lote
+pendentes = {tax: d for tax, d in taxonomias.items() if tax not in decididas}
+scores, chaves = {}, {}
+if results is not None:
+    entrada = texts_hash(janelas)
+    for tax, descricoes in pendentes.items():
+        chaves[tax] = result_key(RERANKER_MODEL, descricoes, entrada, engine="reranker", pooling=POOLING)
+        cached = results.get(chaves[tax])
+        if cached is not None:
+            scores[tax] = cached
+            print(f"💾 {tax}: scores do cache de resultados (entrada e descrições inalteradas), sem reranker")
+    pendentes = {tax: d for tax, d in pendentes.items() if tax not in scores}
+if pendentes:
+    novos = score_taxonomias(janelas, pendentes)
+    for tax, valores in novos.items():
+        if results is not None:
+            results.put(chaves[tax], valores, RERANKER_MODEL)
+    scores.update(novos)
+for tax in decididas:
+    scores[tax] = pre[tax]["scores"]
 
 # Análise 1: Estratégias de Branching
 print("=" * 60)
 print("📊 ANÁLISE 1: ESTRATÉGIAS DE BRANCHING")
 print("=" * 60 + "\n")
 
-scores_branching = {}
-for nome, descricao in BRANCHING_DESCRIPTIONS.items():
-    score = reranker.compute_score([[entrada, descricao]])
-    scores_branching[nome] = float(score[0]) if isinstance(score, (list, tuple)) else float(score)
+scores_branching = scores["branching"]
 
 ordenado_branching = sorted(scores_branching.items(), key=lambda x: x[1], reverse=True)
 
@@ -81,10 +106,7 @@ print("\n" + "=" * 60)
 print("📊 ANÁLISE 2: ESTRATÉGIAS DE RELEASE")
 print("=" * 60 + "\n")
 
-scores_release = {}
-for nome, descricao in RELEASE_STRATEGY_DESCRIPTIONS.items():
-    score = reranker.compute_score([[entrada, descricao]])
-    scores_release[nome] = float(score[0]) if isinstance(score, (list, tuple)) else float(score)
+scores_release = scores["release"]
 
 ordenado_release = sorted(scores_release.items(), key=lambda x: x[1], reverse=True)
 